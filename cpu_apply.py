@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Minimal privileged entry point.
+
+PrivilegeHandler re-executes this script through sudo for every write, so it
+must stay cheap to start: only the standard library and the sysfs writer are
+imported here. Never import PyQt6, psutil or any of the UI modules from this
+file (test/test_startup.py checks for it).
+"""
+import sys
+import json
+import argparse
+from src.core.privilege_handler import PrivilegeHandler
+from src.utils.file_handler import FileHandler
+
+# Writes are only ever allowed under the real cpu sysfs, whatever
+# CPU_MONITOR_SYSFS_ROOT says
+FileHandler.CPU_ROOT = "/sys/devices/system/cpu"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Apply CPU frequency settings (privileged helper)")
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument("--core", type=int, help="Core ID to apply settings to")
+    mode.add_argument("--batch", action="store_true",
+                      help="Read a JSON list of [path, value] writes from stdin and report results as JSON")
+    parser.add_argument("--governor", type=str, help="Governor to set")
+    parser.add_argument("--min-freq", type=str, help="Minimum frequency cap (kHz) to set")
+    parser.add_argument("--max-freq", type=str, help="Maximum frequency cap (kHz) to set")
+    parser.add_argument("--setspeed", type=str, help="Target frequency (kHz) for the userspace governor")
+    parser.add_argument("--epp", type=str, help="Energy Performance Preference to set")
+    args = parser.parse_args(argv)
+
+    if args.batch:
+        results = PrivilegeHandler.write_batch(json.load(sys.stdin))
+        json.dump(results, sys.stdout)
+        return 0 if all(result["ok"] for result in results) else 1
+
+    success = PrivilegeHandler.apply_settings(
+        args.core,
+        max_freq=args.max_freq,
+        governor=args.governor,
+        epp=args.epp,
+        min_freq=args.min_freq,
+        setspeed=args.setspeed
+    )
+    return 0 if success else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,13 +2,11 @@
 import sys
 import os
 import argparse
-from src.core.privilege_handler import PrivilegeHandler
-from src.ui.monitor import CPUMonitor
-from src.ui.tui import CPUMonitorTUI
-from src.utils.signal_handler import SignalHandler
-from PyQt6.QtWidgets import QApplication, QMessageBox, QMainWindow, QWidget, QGridLayout, QTableWidget, QTableWidgetItem, QHBoxLayout, QLabel, QSpinBox, QPushButton
-from PyQt6.QtCore import Qt, QTimer
-import psutil
+from src.core.budget import parse_percent
+
+# Frontends are imported lazily by mode (see run_tui/run_gui) so that the TUI,
+# headless and one-shot CLI paths never load PyQt6 or psutil. test/test_startup.py
+# keeps an eye on start-up time.
 
 def check_root_access():
     test_file = "/sys/devices/system/cpu/cpu0/cpufreq/scaling_governor"
@@ -22,239 +20,356 @@ def check_root_access():
         # If the file doesn't exist, we can't determine if we have root access
         return True
 
-class ProcessWindow(QMainWindow):
-    def __init__(self):
-        super().__init__()
-        self.setWindowTitle("Running Processes")
-        self.setGeometry(100, 100, 1000, 600)
-        self.refresh_period = 5000  # Default refresh period in milliseconds
-        self.is_paused = False
-        self.all_processes = []  # Store all processes
-        self.visible_range = (0, 0)  # Track visible range
-        self.row_height = 30  # Approximate height of each row
-
-        central_widget = QWidget()
-        self.setCentralWidget(central_widget)
-        layout = QGridLayout(central_widget)
-
-        # Create control panel
-        control_panel = QWidget()
-        control_layout = QHBoxLayout(control_panel)
-        
-        self.refresh_label = QLabel("Refresh Period (ms):")
-        self.refresh_input = QSpinBox()
-        self.refresh_input.setRange(1000, 10000)  # Increased minimum to 1 second
-        self.refresh_input.setValue(self.refresh_period)
-        self.refresh_input.valueChanged.connect(self.update_refresh_period)
-        
-        self.pause_button = QPushButton("Pause")
-        self.pause_button.setCheckable(True)
-        self.pause_button.clicked.connect(self.toggle_pause)
-        
-        control_layout.addWidget(self.refresh_label)
-        control_layout.addWidget(self.refresh_input)
-        control_layout.addWidget(self.pause_button)
-        control_layout.addStretch()
-        
-        layout.addWidget(control_panel, 0, 0)
-
-        # Create table
-        self.table = QTableWidget()
-        self.table.setColumnCount(5)
-        self.table.setHorizontalHeaderLabels(["PID", "Process Name", "Core", "CPU %", "Memory %"])
-        self.table.verticalScrollBar().valueChanged.connect(self.handle_scroll)
-        self.table.verticalHeader().setDefaultSectionSize(self.row_height)
-        layout.addWidget(self.table, 1, 0)
-
-        # Initialize process CPU tracking
-        self.prev_cpu_times = {}
-        
-        # Set up timer for auto-refresh
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.load_processes)
-        self.timer.start(self.refresh_period)
-
-        self.load_processes()
-
-    def calculate_visible_range(self):
-        scrollbar = self.table.verticalScrollBar()
-        viewport_height = self.table.viewport().height()
-        scroll_position = scrollbar.value()
-        
-        # Calculate visible rows
-        start_row = max(0, scroll_position // self.row_height - 5)  # Add 5 rows buffer above
-        visible_rows = viewport_height // self.row_height + 10  # Add 5 rows buffer below
-        end_row = start_row + visible_rows
-        
-        return start_row, end_row
-
-    def handle_scroll(self, value):
-        if not self.is_paused:
-            self.update_visible_processes()
-
-    def update_visible_processes(self):
-        if not self.all_processes:
-            return
-
-        start_row, end_row = self.calculate_visible_range()
-        if (start_row, end_row) == self.visible_range:
-            return
-
-        self.visible_range = (start_row, end_row)
-        visible_processes = self.all_processes[start_row:end_row]
-        
-        self.update_table_content(visible_processes, start_row)
-
-    def update_table_content(self, processes, start_row):
-        if not processes:
-            return
-
-        self.table.setRowCount(len(self.all_processes))  # Keep total row count
-        
-        for row, (pid, name, core, cpu, mem) in enumerate(processes, start=start_row):
-            # Create items with proper sorting
-            pid_item = QTableWidgetItem()
-            pid_item.setData(Qt.ItemDataRole.DisplayRole, int(pid))
-            
-            name_item = QTableWidgetItem(name)
-            
-            core_item = QTableWidgetItem()
-            core_item.setData(Qt.ItemDataRole.DisplayRole, int(core))
-            
-            cpu_item = QTableWidgetItem()
-            cpu_item.setData(Qt.ItemDataRole.DisplayRole, float(cpu))
-            cpu_item.setText(f"{cpu:.1f}%")
-            
-            mem_item = QTableWidgetItem()
-            mem_item.setData(Qt.ItemDataRole.DisplayRole, float(mem))
-            mem_item.setText(f"{mem:.1f}%")
-            
-            self.table.setItem(row, 0, pid_item)
-            self.table.setItem(row, 1, name_item)
-            self.table.setItem(row, 2, core_item)
-            self.table.setItem(row, 3, cpu_item)
-            self.table.setItem(row, 4, mem_item)
-
-    def toggle_pause(self, checked):
-        self.is_paused = checked
-        if checked:
-            self.pause_button.setText("Resume")
-            self.timer.stop()
-        else:
-            self.pause_button.setText("Pause")
-            self.timer.start(self.refresh_period)
-            self.load_processes()  # Immediate refresh when resuming
-
-    def update_refresh_period(self, value):
-        self.refresh_period = value
-        if not self.is_paused:
-            self.timer.setInterval(value)
-
-    def calculate_cpu_percent(self, pid):
-        try:
-            proc = psutil.Process(pid)
-            # Get current CPU times
-            current_time = proc.cpu_times()
-            current_total = sum(current_time)
-            
-            # Get previous CPU times
-            if pid in self.prev_cpu_times:
-                prev_total = self.prev_cpu_times[pid]
-                # Calculate CPU usage
-                cpu_percent = ((current_total - prev_total) / (self.refresh_period / 1000)) * 100
-            else:
-                cpu_percent = 0
-                
-            # Store current total for next calculation
-            self.prev_cpu_times[pid] = current_total
-            
-            return min(cpu_percent, 100.0)  # Cap at 100%
-        except (psutil.NoSuchProcess, psutil.AccessDenied):
-            return 0.0
-
-    def load_processes(self):
-        try:
-            if self.is_paused:
-                return
-
-            processes = []
-            # Get all processes at once
-            for proc in psutil.process_iter(['pid', 'name', 'cpu_affinity', 'memory_percent']):
-                try:
-                    info = proc.info
-                    pid = info['pid']
-                    
-                    # Calculate CPU percentage more efficiently
-                    cpu_percent = self.calculate_cpu_percent(pid)
-                    
-                    # Get memory percentage
-                    memory_percent = info['memory_percent']
-                    
-                    # Add entry for each core
-                    for core_id in info['cpu_affinity']:
-                        processes.append((
-                            pid,
-                            info['name'],
-                            core_id,
-                            cpu_percent,
-                            memory_percent
-                        ))
-                except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-                    continue
-
-            # Store all processes but only display visible ones
-            self.all_processes = sorted(processes, key=lambda x: x[0])  # Sort by PID initially
-            self.update_visible_processes()
-            
-            # Enable sorting after initial load
-            if not self.table.isSortingEnabled():
-                self.table.setSortingEnabled(True)
-                self.table.resizeColumnsToContents()
-
-        except Exception as e:
-            print(f"Error updating process list: {e}")
-
 def main():
     parser = argparse.ArgumentParser(description="CPU Monitor")
     parser.add_argument("--core", type=int, help="Core ID to set governor for")
     parser.add_argument("--governor", type=str, help="Governor to set")
-    parser.add_argument("--max-freq", type=str, help="Max frequency to set")
+    parser.add_argument("--min-freq", type=str, help="Minimum frequency cap (kHz) to set")
+    parser.add_argument("--max-freq", type=str, help="Maximum frequency cap (kHz) to set")
+    parser.add_argument("--setspeed", type=str, help="Target frequency (kHz) for the userspace governor")
     parser.add_argument("--epp", type=str, help="Energy Performance Preference to set")
     parser.add_argument("--tui", action="store_true", help="Use terminal user interface instead of GUI")
+    parser.add_argument("--headless", action="store_true",
+                        help="No UI: write one JSON record per sample (frequencies, temperatures, throttle events) to stdout")
+    parser.add_argument("--once", action="store_true",
+                        help="No UI: print one snapshot of all cores (frequency, governor, EPP, driver, limits, topology) and exit")
+    output = parser.add_mutually_exclusive_group()
+    output.add_argument("--json", action="store_true", help="With --once: print JSON (default)")
+    output.add_argument("--csv", action="store_true", help="With --once: print one CSV row per core")
+    parser.add_argument("--window", type=float, metavar="SECONDS",
+                        help="With --once: also measure utilisation over this window (e.g. 0.1)")
+    parser.add_argument("--policy", type=str, metavar="PATH",
+                        help="No UI: switch governor/EPP per core group by load, following the rules in PATH (YAML or JSON)")
+    parser.add_argument("--exporter", type=str, metavar="[HOST]:PORT",
+                        help="No UI: serve OpenMetrics/Prometheus metrics over HTTP (e.g. :9101)")
+    parser.add_argument("--publish", nargs="?", const="cpu_monitor", metavar="NAME",
+                        help="No UI: sample and publish snapshots to /dev/shm/NAME for --attach frontends")
+    parser.add_argument("--attach", nargs="?", const="cpu_monitor", metavar="NAME",
+                        help="Read samples from a --publish process instead of polling sysfs")
+    parser.add_argument("--agent", nargs="?", const=":9102", metavar="[HOST]:PORT",
+                        help="No UI: stream snapshots to aggregators over TCP (default :9102)")
+    parser.add_argument("--aggregate", type=str, metavar="HOST:PORT,...",
+                        help="Show a fleet view of several --agent nodes (GUI, or TUI with --tui)")
+    parser.add_argument("--fleet", type=str, metavar="HOST:PORT,...",
+                        help="Apply --governor/--epp/--min-freq/--max-freq or --apply-profile on these agents")
+    parser.add_argument("--cores", type=str, default="all", metavar="SPEC",
+                        help="Cores for --fleet settings, e.g. 0-7,16 (default: all)")
+    parser.add_argument("--dry-run", action="store_true", help="With --fleet or --policy: only show what would change")
+    parser.add_argument("--concurrency", type=int, default=16, help="Agents contacted at once by --fleet")
+    parser.add_argument("--token-file", type=str, metavar="PATH",
+                        help="Shared secret for --agent and --fleet (default: $CPU_MONITOR_AGENT_TOKEN)")
+    parser.add_argument("--backend", type=str, metavar="SPEC",
+                        help="Where readings come from and settings go: sysfs (default), fake[:CORES], "
+                             "replay:PATH[@SPEED] or agent:HOST[:PORT]")
+    parser.add_argument("--record", type=str, metavar="PATH",
+                        help="Record every reading to PATH for later --backend replay:PATH")
+    parser.add_argument("--change-log", type=str, metavar="PATH",
+                        help="Append governor/EPP changes and hotplug events (ours or external) to PATH as JSON lines")
+    parser.add_argument("--interval", type=float, default=1.0,
+                        help="Sampling interval in seconds for --headless, --exporter, --publish, --agent and --policy")
+    parser.add_argument("--count", type=int, help="Stop --headless or --policy after this many samples")
+    parser.add_argument("--adaptive", action="store_true", help="Adapt the refresh interval to frequency volatility")
+    parser.add_argument("--min-interval", type=float, default=0.1, help="Shortest adaptive refresh interval in seconds")
+    parser.add_argument("--max-interval", type=float, default=5.0, help="Longest adaptive refresh interval in seconds")
+    parser.add_argument("--cpu-budget", type=parse_percent, metavar="PERCENT",
+                        help="Throttle sampling, process scans and redraws to keep the monitor under this CPU usage (e.g. 0.5%%)")
+    parser.add_argument("--profiles", type=str, metavar="PATH",
+                        help="Tuning profiles file (default: ~/.config/cpu_monitor/profiles.json)")
+    parser.add_argument("--apply-profile", type=str, metavar="NAME",
+                        help="Apply a named tuning profile atomically and exit (no UI)")
     args = parser.parse_args()
 
+    if not 0 < args.min_interval <= args.max_interval:
+        parser.error("--min-interval must be positive and not larger than --max-interval")
+    options = {
+        "adaptive": args.adaptive,
+        "min_interval": args.min_interval,
+        "max_interval": args.max_interval,
+        "cpu_budget": args.cpu_budget,
+        "profiles_path": args.profiles,
+        "bus_name": args.attach
+    }
+    try:
+        backend = selected_backend(args.backend, args.record, args.token_file)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        return 1
+    options["backend"] = backend
+    change_log = None
+    if args.change_log:
+        from src.core.changes import ChangeLog
+        try:
+            change_log = ChangeLog(args.change_log)
+        except OSError as e:
+            print(f"Error: {e}")
+            return 1
+    options["change_log"] = change_log
+
+    if args.fleet:
+        return run_fleet_apply(args)
+
     if args.core is not None:
-        PrivilegeHandler.apply_settings(
+        from src.core.privilege_handler import PrivilegeHandler
+        success = PrivilegeHandler.apply_settings(
             args.core,
             max_freq=args.max_freq,
             governor=args.governor,
-            epp=args.epp
+            epp=args.epp,
+            min_freq=args.min_freq,
+            setspeed=args.setspeed
         )
-    else:
-        if not check_root_access():
-            if args.tui:
-                print("Error: Root privileges required. Please run with sudo.")
-                return 1
-            else:
-                app = QApplication(sys.argv)
-                msg = QMessageBox()
-                msg.setIcon(QMessageBox.Icon.Warning)
-                msg.setText("Root privileges required")
-                msg.setInformativeText("CPU Monitor requires root privileges to read and modify CPU settings.\nPlease run the application with sudo.")
-                msg.setWindowTitle("Permission Error")
-                msg.exec()
-                return 1
-
-        if args.tui:
-            monitor = CPUMonitorTUI()
-            monitor.start()
+        return 0 if success else 1
+
+    if args.apply_profile:
+        return apply_profile(args.apply_profile, args.profiles, backend)
+
+    if args.once:
+        return run_once(args.csv, args.window, backend)
+    if args.policy:
+        return run_policy(args.policy, args.interval, args.count, backend, change_log, args.dry_run)
+    if args.agent:
+        return run_agent(args.agent, args.interval, args.count, args.cpu_budget, args.attach, args.token_file, backend,
+                         change_log)
+    if args.aggregate:
+        return run_fleet(args.aggregate.split(","), args.tui)
+    if args.publish:
+        return run_publisher(args.publish, args.interval, args.count, args.cpu_budget, backend, change_log)
+    if args.exporter:
+        return run_exporter(args.exporter, args.interval, args.cpu_budget, args.attach, backend, change_log)
+    if args.headless:
+        return run_headless(args.interval, args.count, args.cpu_budget, args.attach, backend, change_log)
+    if args.tui:
+        return run_tui(options)
+    return run_gui(options)
+
+def selected_backend(spec=None, record=None, token_file=None):
+    """The --backend (wrapped for --record), or None for local sysfs"""
+    if not spec and not record:
+        return None
+    from src.core.backends import open_backend, RecordingBackend
+    from src.core.protocol import load_token
+
+    spec = spec or "sysfs"
+    # Remote reads and writes are both authenticated
+    token = load_token(token_file) if spec.startswith("agent:") else None
+    backend = open_backend(spec, token)
+    return RecordingBackend(backend, record) if record else backend
+
+def apply_profile(name, profiles_path=None, backend=None):
+    """Headless profile apply, suitable for running at boot"""
+    from src.core.cpu_manager import CPUManager
+    from src.core.profiles import ProfileStore
+
+    try:
+        profile = ProfileStore(profiles_path).get(name)
+        result = CPUManager(backend).apply_profile(profile)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        return 1
+
+    if result["success"]:
+        print(f"Applied profile '{name}' ({result['writes']} writes)")
+        return 0
+    print(f"Failed to apply profile '{name}':")
+    for error in result["errors"]:
+        print(f"  {error}")
+    print("Previous settings restored" if result["rolled_back"] else "Warning: rollback failed, settings may be partial")
+    return 1
+
+def attached_manager(bus_name, backend=None, change_log=None):
+    """
+    A CPUManager on the given backend and/or snapshot bus, reporting change
+    events to change_log, or None to let the frontend create its own
+    """
+    if not bus_name and backend is None and change_log is None:
+        return None
+    from src.core.cpu_manager import CPUManager
+
+    manager = CPUManager(backend)
+    if bus_name:
+        from src.core.snapshot_bus import SnapshotReader
+        manager.attach_bus(SnapshotReader(bus_name))
+    if change_log:
+        manager.on_change(change_log)
+    return manager
+
+def run_agent(address, interval, count=None, cpu_budget=None, bus_name=None, token_file=None, backend=None,
+              change_log=None):
+    from src.headless.agent import Agent
+    from src.core.protocol import load_token
+
+    try:
+        # Without a token the agent only streams snapshots
+        token = load_token(token_file) if token_file or os.environ.get("CPU_MONITOR_AGENT_TOKEN") else None
+        agent = Agent(address, interval, count, cpu_budget=cpu_budget,
+                      cpu_manager=attached_manager(bus_name, backend, change_log), token=token)
+        return agent.run()
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        return 1
+    except KeyboardInterrupt:
+        return 0
+
+def run_fleet_apply(args):
+    """Fan a profile (or governor/EPP/caps for --cores) out to agents"""
+    from src.core.fleet import fleet_apply, format_results
+    from src.core.protocol import load_token
+    from src.core.profiles import ProfileStore
+
+    entry = {
+        key: value for key, value in (
+            ("governor", args.governor), ("epp", args.epp), ("min_freq", args.min_freq), ("max_freq", args.max_freq)
+        ) if value is not None
+    }
+    try:
+        if args.apply_profile:
+            if entry:
+                raise ValueError("Use either --apply-profile or individual settings with --fleet")
+            profile = ProfileStore(args.profiles).get(args.apply_profile)
+        elif entry:
+            profile = [{"cores": args.cores, **entry}]
         else:
-            app = QApplication(sys.argv)
-            monitor = CPUMonitor()
-            # Setup signal handler with cleanup callback
-            signal_handler = SignalHandler(app, cleanup_callback=monitor.cleanup)
-            monitor.show()
-            sys.exit(app.exec())
+            raise ValueError("--fleet needs --apply-profile or at least one of --governor/--epp/--min-freq/--max-freq")
+        results = fleet_apply(args.fleet.split(","), load_token(args.token_file), profile,
+                              args.dry_run, args.concurrency)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        return 1
+    for line in format_results(results):
+        print(line)
+    return 0 if all(result["ok"] for result in results) else 1
+
+def run_fleet(addresses, tui=False):
+    """Aggregator view; needs no root since it only reads from agents"""
+    from src.core.aggregator import FleetAggregator
+
+    try:
+        aggregator = FleetAggregator(addresses)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 1
+    if tui:
+        from src.ui.fleet_tui import FleetTUI
+        FleetTUI(aggregator).start()
+        return 0
+
+    from PyQt6.QtWidgets import QApplication
+    from src.ui.fleet_window import FleetWindow
+    from src.utils.signal_handler import SignalHandler
+
+    app = QApplication(sys.argv)
+    window = FleetWindow(aggregator)
+    signal_handler = SignalHandler(app, cleanup_callback=window.cleanup)
+    window.show()
+    return app.exec()
+
+def run_publisher(name, interval, count=None, cpu_budget=None, backend=None, change_log=None):
+    from src.headless.publisher import SnapshotPublisher
+
+    try:
+        publisher = SnapshotPublisher(name, interval, count, cpu_budget=cpu_budget,
+                                      cpu_manager=attached_manager(None, backend, change_log))
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        return 1
+    try:
+        return publisher.run()
+    except KeyboardInterrupt:
+        return 0
+
+def run_once(as_csv=False, window=None, backend=None):
+    from src.headless.once import one_shot, write_json, write_csv
+    from src.utils.file_handler import FileHandler
+
+    if window is not None and window <= 0:
+        print("Error: --window must be positive")
+        return 1
+    if backend is not None:
+        FileHandler.use_backend(backend)
+    snapshot = one_shot(window)
+    if backend is not None:
+        backend.close()
+    (write_csv if as_csv else write_json)(snapshot, sys.stdout)
+    return 0
+
+def run_policy(path, interval, count=None, backend=None, change_log=None, dry_run=False):
+    from src.core.policy import Policy
+    from src.headless.policy import PolicyDaemon
+
+    try:
+        daemon = PolicyDaemon(Policy.load(path), interval, count, dry_run=dry_run,
+                              cpu_manager=attached_manager(None, backend, change_log))
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        return 1
+    try:
+        return daemon.run()
+    except KeyboardInterrupt:
+        return 0
+
+def run_headless(interval, count=None, cpu_budget=None, bus_name=None, backend=None, change_log=None):
+    from src.headless.monitor import HeadlessMonitor
+
+    try:
+        monitor = HeadlessMonitor(interval, count, cpu_budget=cpu_budget,
+                                  cpu_manager=attached_manager(bus_name, backend, change_log))
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 1
+    try:
+        return monitor.run()
+    except KeyboardInterrupt:
+        return 0
+
+def run_exporter(address, interval, cpu_budget=None, bus_name=None, backend=None, change_log=None):
+    from src.headless.exporter import MetricsExporter
+
+    try:
+        exporter = MetricsExporter(address, interval, cpu_budget=cpu_budget,
+                                   cpu_manager=attached_manager(bus_name, backend, change_log))
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        return 1
+    host, port = exporter.address
+    print(f"Serving metrics on http://{host or '0.0.0.0'}:{port}/metrics", file=sys.stderr)
+    try:
+        return exporter.serve_forever()
+    except KeyboardInterrupt:
+        return 0
+
+def run_tui(options):
+    # Only local sysfs needs root; other backends check their own access
+    if options["backend"] is None and not check_root_access():
+        print("Error: Root privileges required. Please run with sudo.")
+        return 1
+
+    from src.ui.tui import CPUMonitorTUI
+    monitor = CPUMonitorTUI(**options)
+    monitor.start()
+    return 0
+
+def run_gui(options):
+    from PyQt6.QtWidgets import QApplication, QMessageBox
+
+    if options["backend"] is None and not check_root_access():
+        app = QApplication(sys.argv)
+        msg = QMessageBox()
+        msg.setIcon(QMessageBox.Icon.Warning)
+        msg.setText("Root privileges required")
+        msg.setInformativeText("CPU Monitor requires root privileges to read and modify CPU settings.\nPlease run the application with sudo.")
+        msg.setWindowTitle("Permission Error")
+        msg.exec()
+        return 1
+
+    from src.ui.monitor import CPUMonitor
+    from src.utils.signal_handler import SignalHandler
+
+    app = QApplication(sys.argv)
+    monitor = CPUMonitor(**options)
+    # Setup signal handler with cleanup callback
+    signal_handler = SignalHandler(app, cleanup_callback=monitor.cleanup)
+    monitor.show()
+    return app.exec()
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
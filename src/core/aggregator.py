@@ -0,0 +1,126 @@
+import asyncio
+import threading
+from .protocol import read_frame, apply_delta
+
+def parse_agent(address, default_port=9102):
+    """'host[:port]' into (host, port)"""
+    host, sep, port = address.strip().rpartition(":")
+    if not sep:
+        return address.strip(), default_port
+    try:
+        return host.strip("[]") or "127.0.0.1", int(port)
+    except ValueError:
+        raise ValueError(f"Invalid agent address '{address}', expected host[:port]")
+
+def node_summary(snapshot):
+    """
+    One line's worth of numbers for a node:
+    {"cores", "frequency_avg", "frequency_max", "utilization", "governors", "throttled", "temperature_max"}.
+    Frequencies are in kHz; values are None when nothing was readable.
+    """
+    cores = snapshot["cores"]
+    frequencies = [values["frequency"] for values in cores.values() if isinstance(values.get("frequency"), int)]
+    busy = [values["utilization"] for values in cores.values() if "utilization" in values]
+    temperatures = list(snapshot["temperatures"].values())
+    return {
+        "cores": len(cores),
+        "frequency_avg": sum(frequencies) // len(frequencies) if frequencies else None,
+        "frequency_max": max(frequencies) if frequencies else None,
+        "utilization": sum(busy) / len(busy) if busy else None,
+        "governors": sorted({values["governor"] for values in cores.values()}),
+        "throttled": sum(1 for values in cores.values() if values.get("throttled")),
+        "temperature_max": max(temperatures) if temperatures else None,
+    }
+
+class FleetAggregator:
+    """
+    Follows any number of agents at once on one asyncio loop.
+
+    Every agent connection keeps its node's latest snapshot up to date by
+    applying delta frames; lost connections are retried every reconnect
+    seconds. The UI side runs the loop on a background thread (start/stop)
+    and reads consistent copies through nodes().
+    """
+    def __init__(self, addresses, reconnect=2.0):
+        self.agents = [parse_agent(address) if isinstance(address, str) else tuple(address) for address in addresses]
+        if not self.agents:
+            raise ValueError("No agents to aggregate")
+        self.reconnect = reconnect
+        self._lock = threading.Lock()
+        # "host:port" -> {"node", "address", "connected", "error", "snapshot", "sequence"}
+        self._nodes = {
+            f"{host}:{port}": {
+                "node": f"{host}:{port}", "address": f"{host}:{port}", "connected": False,
+                "error": None, "snapshot": None, "sequence": None,
+            }
+            for host, port in self.agents
+        }
+        self._loop = None
+        self._thread = None
+        self._task = None
+
+    def _update(self, address, **values):
+        with self._lock:
+            self._nodes[address].update(values)
+
+    async def follow(self, host, port):
+        address = f"{host}:{port}"
+        while True:
+            writer = None
+            try:
+                reader, writer = await asyncio.open_connection(host, port)
+                snapshot = None
+                while True:
+                    message = await read_frame(reader)
+                    if message["type"] == "hello":
+                        self._update(address, node=message["node"], connected=True, error=None)
+                    elif message["type"] == "snapshot":
+                        snapshot = apply_delta(snapshot, message)
+                        self._update(address, snapshot=snapshot, sequence=message["sequence"])
+            except (OSError, asyncio.IncompleteReadError, ValueError, KeyError) as e:
+                self._update(address, connected=False, error=str(e) or "connection closed")
+            finally:
+                if writer is not None:
+                    writer.close()
+            await asyncio.sleep(self.reconnect)
+
+    async def run(self):
+        await asyncio.gather(*(self.follow(host, port) for host, port in self.agents))
+
+    def nodes(self):
+        """Per-node state, in agent order; snapshots are replaced, never mutated, so sharing them is safe"""
+        with self._lock:
+            return [dict(self._nodes[f"{host}:{port}"]) for host, port in self.agents]
+
+    def summaries(self):
+        """nodes() with a "summary" (see node_summary) for every node that sent a snapshot"""
+        nodes = self.nodes()
+        for node in nodes:
+            node["summary"] = node_summary(node["snapshot"]) if node["snapshot"] else None
+        return nodes
+
+    def start(self):
+        """Run the aggregator loop on a background thread"""
+        ready = threading.Event()
+
+        def main():
+            self._loop = asyncio.new_event_loop()
+            self._task = self._loop.create_task(self.run())
+            ready.set()
+            try:
+                self._loop.run_until_complete(self._task)
+            except asyncio.CancelledError:
+                pass
+            finally:
+                self._loop.close()
+
+        self._thread = threading.Thread(target=main, daemon=True)
+        self._thread.start()
+        ready.wait()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._loop.call_soon_threadsafe(self._task.cancel)
+        self._thread.join()
+        self._thread = None
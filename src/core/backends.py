@@ -0,0 +1,564 @@
+import os
+import json
+import time
+import errno
+import random
+import socket
+import threading
+import itertools
+from ..utils.file_handler import FileHandler, LocalFiles
+from .privilege_handler import PrivilegeHandler
+from .protocol import (
+    to_wire_path, from_wire_path, encode_read, decode_read, encode_frame, recv_frame, request_mac
+)
+
+# A backend is where CPUManager's reads and writes go. Everything is
+# addressed by local sysfs path (FileHandler.CPU_ROOT and friends), so the
+# sampler, monitors and frontends are the same whatever the backend:
+#
+#   read(path)             contents of one file, raising OSError like open()
+#   read_snapshot(paths)   {path: contents or the exception} in one batch
+#   exists(path), listdir(path)
+#   apply_batch(writes)    [(path, value)] in order, stopping at the first
+#                          failure; one {"path", "ok", "error"} per attempt
+#   close()
+#
+# CPUManager(backend) installs the backend with FileHandler.use_backend.
+# FileHandler is process-wide, so there is one backend per process.
+
+def _error(code, path=None):
+    return OSError(code, os.strerror(code), path) if path else OSError(code, os.strerror(code))
+
+class SysfsBackend(LocalFiles):
+    """The local machine: sysfs reads, writes through PrivilegeHandler (sudo helper, or in-process as root)"""
+    name = "sysfs"
+
+    def apply_batch(self, writes):
+        return PrivilegeHandler.apply_batch(writes)
+
+class MemoryBackend:
+    """
+    An in-memory sysfs, {path: contents}, with directories implied by the
+    paths.
+
+    Writes are checked roughly like the kernel checks them: the file must
+    exist under CPU_ROOT, governors and EPP values must be advertised, and
+    frequency caps must stay within the cpuinfo limits with min <= max.
+    The performance governor moves scaling_cur_freq to the max cap and
+    caps clamp it. Applied writes are kept in .writes.
+    """
+    name = "memory"
+
+    def __init__(self, files=None):
+        self.files = {path: str(value) for path, value in (files or {}).items()}
+        self.writes = []
+        self._dirs = None
+
+    def set(self, path, value):
+        self.files[path] = str(value)
+        self._dirs = None
+
+    def remove(self, path):
+        self.files.pop(path, None)
+        self._dirs = None
+
+    def _directories(self):
+        if self._dirs is None:
+            dirs = {}
+            for path in self.files:
+                parent, _, name = path.rpartition("/")
+                while parent:
+                    entries = dirs.setdefault(parent, set())
+                    if name in entries:
+                        # Everything above was registered with this entry
+                        break
+                    entries.add(name)
+                    parent, _, name = parent.rpartition("/")
+            self._dirs = dirs
+        return self._dirs
+
+    def _missing(self, path):
+        return _error(errno.EISDIR if path in self._directories() else errno.ENOENT, path)
+
+    def read(self, path):
+        if path in self.files:
+            return self.files[path]
+        raise self._missing(path)
+
+    def read_snapshot(self, paths):
+        files = self.files
+        return {path: files[path] if path in files else self._missing(path) for path in paths}
+
+    def exists(self, path):
+        return path in self.files or path in self._directories()
+
+    def listdir(self, path):
+        entries = self._directories().get(path)
+        if entries is None:
+            raise _error(errno.ENOTDIR if path in self.files else errno.ENOENT, path)
+        return sorted(entries)
+
+    def apply_batch(self, writes):
+        results = []
+        for path, value in writes:
+            value = str(value)
+            error = self.check_write(path, value)
+            results.append({"path": path, "ok": error is None, "error": error})
+            if error:
+                break
+            self.write(path, value)
+        return results
+
+    def check_write(self, path, value):
+        """Why the kernel would reject the write, or None"""
+        if not path.startswith(FileHandler.CPU_ROOT + "/"):
+            return "path outside cpu sysfs"
+        if path not in self.files:
+            return str(_error(errno.ENOENT))
+        directory, _, attribute = path.rpartition("/")
+
+        def sibling(name):
+            return self.files.get(f"{directory}/{name}", "")
+
+        invalid = str(_error(errno.EINVAL))
+        if attribute == "scaling_governor":
+            available = sibling("scaling_available_governors") or self.files.get(
+                f"{FileHandler.CPU_ROOT}/cpufreq/policy0/scaling_available_governors", "")
+            if available and value not in available.split():
+                return invalid
+        elif attribute == "energy_performance_preference":
+            available = sibling("energy_performance_available_preferences")
+            if available and value not in available.split():
+                return invalid
+        elif attribute in ("scaling_min_freq", "scaling_max_freq"):
+            if not value.isdigit():
+                return invalid
+            low, high = sibling("cpuinfo_min_freq"), sibling("cpuinfo_max_freq")
+            if low.isdigit() and int(value) < int(low) or high.isdigit() and int(value) > int(high):
+                return invalid
+            if attribute == "scaling_min_freq":
+                other = sibling("scaling_max_freq")
+                if other.isdigit() and int(value) > int(other):
+                    return invalid
+            else:
+                other = sibling("scaling_min_freq")
+                if other.isdigit() and int(value) < int(other):
+                    return invalid
+        return None
+
+    def write(self, path, value):
+        self.files[path] = value
+        self.writes.append((path, value))
+        directory, _, attribute = path.rpartition("/")
+        current = f"{directory}/scaling_cur_freq"
+        if current not in self.files:
+            return
+        low = self.files.get(f"{directory}/scaling_min_freq", "")
+        high = self.files.get(f"{directory}/scaling_max_freq", "")
+        if attribute == "scaling_governor" and value == "performance" and high.isdigit():
+            self.files[current] = high
+        elif attribute in ("scaling_min_freq", "scaling_max_freq") and self.files[current].isdigit():
+            frequency = int(self.files[current])
+            if low.isdigit():
+                frequency = max(frequency, int(low))
+            if high.isdigit():
+                frequency = min(frequency, int(high))
+            self.files[current] = str(frequency)
+
+    def close(self):
+        pass
+
+class SimulatedBackend(MemoryBackend):
+    """
+    A MemoryBackend that behaves like a live amd-pstate-epp machine: load
+    and frequencies move on every /proc/stat read (once per sample), so
+    frontends and benchmarks have something to show without the hardware.
+    """
+    name = "simulated"
+    MIN_FREQ = 400000
+    MAX_FREQ = 4000000
+
+    def __init__(self, cores=8, seed=0):
+        if cores < 1:
+            raise ValueError("A simulated machine needs at least one core")
+        super().__init__(self.machine(cores))
+        self.cores = cores
+        self.random = random.Random(seed)
+        self._load = [self.random.random() for _ in range(cores)]
+        self._jiffies = [[0, 0] for _ in range(cores)]  # busy, idle
+
+    @classmethod
+    def machine(cls, cores):
+        """sysfs files of an idle machine with two SMT threads per core"""
+        root = FileHandler.CPU_ROOT
+        files = {
+            f"{root}/online": f"0-{cores - 1}",
+            f"{root}/present": f"0-{cores - 1}",
+            f"{root}/cpufreq/policy0/scaling_available_governors": "performance powersave",
+            f"{root}/amd_pstate/status": "active",
+            FileHandler.PROC_STAT: "",
+        }
+        for core in range(cores):
+            base = f"{root}/cpu{core}"
+            first = core - core % 2
+            files.update({
+                f"{base}/cpufreq/scaling_cur_freq": cls.MIN_FREQ,
+                f"{base}/cpufreq/scaling_governor": "powersave",
+                f"{base}/cpufreq/scaling_driver": "amd-pstate-epp",
+                f"{base}/cpufreq/scaling_min_freq": cls.MIN_FREQ,
+                f"{base}/cpufreq/scaling_max_freq": cls.MAX_FREQ,
+                f"{base}/cpufreq/cpuinfo_min_freq": cls.MIN_FREQ,
+                f"{base}/cpufreq/cpuinfo_max_freq": cls.MAX_FREQ,
+                f"{base}/cpufreq/energy_performance_preference": "balance_performance",
+                f"{base}/cpufreq/energy_performance_available_preferences":
+                    "default performance balance_performance balance_power power",
+                f"{base}/topology/physical_package_id": 0,
+                f"{base}/topology/die_id": 0,
+                f"{base}/topology/cluster_id": core // 2,
+                f"{base}/topology/core_id": core // 2,
+                f"{base}/topology/thread_siblings_list": f"{first}-{first + 1}" if first + 1 < cores else str(first),
+            })
+        return files
+
+    def read(self, path):
+        if path == FileHandler.PROC_STAT:
+            self.step()
+        return super().read(path)
+
+    def step(self):
+        """Advance one sample: each core's load drifts and its frequency follows the load and governor"""
+        lines = []
+        for core in range(self.cores):
+            load = min(max(self._load[core] + self.random.uniform(-0.2, 0.2), 0.0), 1.0)
+            self._load[core] = load
+            busy = int(load * 100)
+            self._jiffies[core][0] += busy
+            self._jiffies[core][1] += 100 - busy
+            lines.append(f"cpu{core} {self._jiffies[core][0]} 0 0 {self._jiffies[core][1]} 0 0 0 0")
+
+            cpufreq = f"{FileHandler.CPU_ROOT}/cpu{core}/cpufreq"
+            low, high = int(self.files[f"{cpufreq}/scaling_min_freq"]), int(self.files[f"{cpufreq}/scaling_max_freq"])
+            if self.files[f"{cpufreq}/scaling_governor"] == "performance":
+                frequency = high
+            else:
+                frequency = low + int((high - low) * load) // 1000 * 1000
+            self.files[f"{cpufreq}/scaling_cur_freq"] = str(frequency)
+        self.files[FileHandler.PROC_STAT] = "\n".join(lines) + "\n"
+
+class RecordingBackend:
+    """
+    Passes everything through to another backend and records what was
+    read, for RecordedBackend to replay.
+
+    The recording is JSON lines of {"time", "files", "dirs", "exists"}
+    holding only what changed since it was last recorded. Paths are in
+    their to_wire_path form, so a recording replays on any sysfs root.
+    """
+    def __init__(self, backend, path, clock=time.monotonic):
+        self.backend = backend
+        self.name = f"{backend.name} (recording)"
+        self.clock = clock
+        self.start = clock()
+        self.output = open(path, "w", buffering=1)
+        self._lock = threading.Lock()
+        self._seen = {"files": {}, "dirs": {}, "exists": {}}
+
+    def _record(self, section, values):
+        changed = {}
+        seen = self._seen[section]
+        for path, value in values.items():
+            try:
+                name = to_wire_path(path)
+            except ValueError:
+                continue
+            if section == "files":
+                value = encode_read(value)
+            elif section == "dirs" and not isinstance(value, list):
+                value = encode_read(value)
+            if name not in seen or seen[name] != value:
+                seen[name] = value
+                changed[name] = value
+        if changed:
+            with self._lock:
+                self.output.write(json.dumps({"time": round(self.clock() - self.start, 6), section: changed}) + "\n")
+
+    def read(self, path):
+        try:
+            value = self.backend.read(path)
+        except OSError as e:
+            self._record("files", {path: e})
+            raise
+        self._record("files", {path: value})
+        return value
+
+    def read_snapshot(self, paths):
+        values = self.backend.read_snapshot(paths)
+        self._record("files", values)
+        return values
+
+    def exists(self, path):
+        exists = self.backend.exists(path)
+        self._record("exists", {path: exists})
+        return exists
+
+    def listdir(self, path):
+        try:
+            entries = sorted(self.backend.listdir(path))
+        except OSError as e:
+            self._record("dirs", {path: e})
+            raise
+        self._record("dirs", {path: entries})
+        return entries
+
+    def apply_batch(self, writes):
+        # What the writes changed shows up in the reads that follow
+        return self.backend.apply_batch(writes)
+
+    def close(self):
+        self.output.close()
+        self.backend.close()
+
+class RecordedBackend(MemoryBackend):
+    """
+    Replays a RecordingBackend file in real time, scaled by speed.
+
+    Every path starts out with the first value recorded for it and changes
+    when the recording did. Writes are checked and applied to the replayed
+    state like on a MemoryBackend, until the recording changes that file
+    again.
+    """
+    name = "replay"
+
+    def __init__(self, path, speed=1.0, clock=time.monotonic):
+        if speed <= 0:
+            raise ValueError("Replay speed must be positive")
+        with open(path, "r") as f:
+            self.frames = [json.loads(line) for line in f if line.strip()]
+        if not self.frames:
+            raise ValueError(f"{path}: empty recording")
+        super().__init__()
+        self.errors = {}  # path -> OSError recorded for it
+        self.listings = {}  # path -> recorded directory entries or OSError
+        self.present = {}  # path -> recorded exists() result
+        self.speed = speed
+        self.clock = clock
+        for frame in self.frames:
+            self._apply(frame, first_only=True)
+        self.start = clock()
+        self.position = 0
+
+    def _apply(self, frame, first_only=False):
+        for name, value in frame.get("files", {}).items():
+            path = from_wire_path(name)
+            if first_only and (path in self.files or path in self.errors):
+                continue
+            value = decode_read(value)
+            if isinstance(value, str):
+                self.files[path] = value
+                self.errors.pop(path, None)
+            else:
+                self.files.pop(path, None)
+                self.errors[path] = value
+        for name, entries in frame.get("dirs", {}).items():
+            path = from_wire_path(name)
+            if not first_only or path not in self.listings:
+                self.listings[path] = entries if isinstance(entries, list) else decode_read(entries)
+        for name, exists in frame.get("exists", {}).items():
+            path = from_wire_path(name)
+            if not first_only or path not in self.present:
+                self.present[path] = exists
+        self._dirs = None
+
+    @property
+    def finished(self):
+        return self.position >= len(self.frames)
+
+    def advance(self):
+        """Apply every frame that is due at the replay clock"""
+        elapsed = (self.clock() - self.start) * self.speed
+        while self.position < len(self.frames) and self.frames[self.position]["time"] <= elapsed:
+            self._apply(self.frames[self.position])
+            self.position += 1
+
+    def read(self, path):
+        self.advance()
+        if path in self.errors:
+            raise self.errors[path]
+        return super().read(path)
+
+    def read_snapshot(self, paths):
+        self.advance()
+        values = super().read_snapshot(paths)
+        for path in values:
+            if path in self.errors:
+                values[path] = self.errors[path]
+        return values
+
+    def exists(self, path):
+        self.advance()
+        if path in self.present:
+            return self.present[path]
+        return path in self.listings or super().exists(path)
+
+    def listdir(self, path):
+        self.advance()
+        entries = self.listings.get(path)
+        if isinstance(entries, OSError):
+            raise entries
+        return list(entries) if entries is not None else super().listdir(path)
+
+class RemoteBackend:
+    """
+    Another node's sysfs, through its agent (--agent).
+
+    Per-tick values (frequency, governor/EPP, utilisation, throttling,
+    temperatures) come from the agent's snapshot stream, which CPUManager
+    attaches like a snapshot bus (latest() and sequence). Everything else
+    is read on demand with batched "fs" requests on a second connection.
+    Writes go out as one apply request. Both are authenticated with the
+    agent's token.
+    """
+    name = "agent"
+
+    def __init__(self, address, token=None, timeout=5.0):
+        # asyncio is only loaded for remote nodes
+        from .aggregator import FleetAggregator, parse_agent
+
+        self.host, self.port = parse_agent(address)
+        self.token = token
+        self.timeout = timeout
+        self.sequence = None
+        self.stream = FleetAggregator([(self.host, self.port)])
+        self.stream.start()
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._sock = None
+        self._nonce = None
+        self._counter = 0
+
+    def latest(self):
+        node = self.stream.nodes()[0]
+        self.sequence = node["sequence"]
+        return node["snapshot"] if node["connected"] else None
+
+    def _connect(self):
+        sock = socket.create_connection((self.host, self.port), self.timeout)
+        hello = recv_frame(sock)
+        if hello.get("type") != "hello":
+            sock.close()
+            raise ConnectionError(f"Agent {self.host}:{self.port} did not say hello")
+        self._sock, self._nonce, self._counter = sock, hello["nonce"], 0
+
+    def _disconnect(self):
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+    def request(self, message, retry=True):
+        """Send one request and wait for its reply; raises OSError"""
+        with self._lock:
+            for attempt in range(2 if retry else 1):
+                try:
+                    if self._sock is None:
+                        self._connect()
+                    message = {**message, "id": next(self._ids)}
+                    if message["type"] in ("apply", "fs"):
+                        self._counter += 1
+                        message["counter"] = self._counter
+                        message["mac"] = request_mac(self.token, self._nonce, self._counter, message["request"])
+                    self._sock.sendall(encode_frame(message))
+                    while True:
+                        # The agent may still push snapshot frames before it sees the request
+                        reply = recv_frame(self._sock)
+                        if reply.get("id") == message["id"]:
+                            return reply
+                except (OSError, ValueError) as e:
+                    self._disconnect()
+                    if attempt or not retry:
+                        raise OSError(f"Agent {self.host}:{self.port}: {e}") from e
+
+    def _fs(self, op, paths):
+        """{path: result} of a batched read/exists/listdir; paths outside sysfs map to their ValueError"""
+        names = {}
+        results = {}
+        for path in paths:
+            try:
+                names[to_wire_path(path)] = path
+            except ValueError as e:
+                results[path] = e
+        if names:
+            if self.token is None:
+                raise PermissionError(errno.EACCES, "Remote reads need the agent token")
+            reply = self.request({"type": "fs", "request": {"op": op, "paths": list(names)}})
+            if "results" not in reply:
+                raise OSError(f"Agent {self.host}:{self.port}: {reply.get('error', 'unexpected reply')}")
+            for name, result in reply["results"].items():
+                if name in names:
+                    results[names[name]] = result
+        return results
+
+    def read(self, path):
+        value = self.read_snapshot([path])[path]
+        if isinstance(value, Exception):
+            raise value
+        return value
+
+    def read_snapshot(self, paths):
+        return {
+            path: value if isinstance(value, Exception) else decode_read(value)
+            for path, value in self._fs("read", paths).items()
+        }
+
+    def exists(self, path):
+        result = self._fs("exists", [path])[path]
+        return result is True
+
+    def listdir(self, path):
+        result = self._fs("listdir", [path])[path]
+        if isinstance(result, list):
+            return result
+        raise result if isinstance(result, Exception) else decode_read(result)
+
+    def apply_batch(self, writes):
+        writes = [(path, str(value)) for path, value in writes]
+        if not writes:
+            return []
+        if self.token is None:
+            return [{"path": writes[0][0], "ok": False, "error": "Remote writes need the agent token"}]
+        try:
+            request = {"writes": [[to_wire_path(path), value] for path, value in writes]}
+            # Never resent: the first attempt may have been applied
+            reply = self.request({"type": "apply", "request": request}, retry=False)
+        except (OSError, ValueError) as e:
+            return [{"path": writes[0][0], "ok": False, "error": str(e)}]
+        if "results" not in reply:
+            return [{"path": writes[0][0], "ok": False, "error": reply.get("error") or "Remote apply failed"}]
+        return [
+            {"path": path, "ok": result["ok"], "error": result["error"]}
+            for (path, _), result in zip(writes, reply["results"])
+        ]
+
+    def close(self):
+        self.stream.stop()
+        with self._lock:
+            self._disconnect()
+
+def open_backend(spec, token=None):
+    """
+    A backend from a --backend spec: "sysfs", "fake[:CORES]" (simulated),
+    "replay:PATH[@SPEED]" or "agent:HOST[:PORT]". Raises ValueError.
+    """
+    kind, _, argument = spec.partition(":")
+    try:
+        if kind == "sysfs" and not argument:
+            return SysfsBackend()
+        if kind == "fake":
+            return SimulatedBackend(int(argument) if argument else 8)
+        if kind == "replay" and argument:
+            path, at, speed = argument.rpartition("@")
+            return RecordedBackend(path, float(speed)) if at else RecordedBackend(argument)
+        if kind == "agent" and argument:
+            return RemoteBackend(argument, token)
+    except OSError as e:
+        raise ValueError(f"Backend '{spec}': {e}")
+    raise ValueError(f"Unknown backend '{spec}' (sysfs, fake[:CORES], replay:PATH[@SPEED], agent:HOST[:PORT])")
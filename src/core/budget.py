@@ -0,0 +1,69 @@
+import os
+import time
+
+def parse_percent(value):
+    """Parse a budget such as '0.5%' or '0.5' into a percentage of one CPU"""
+    text = str(value).strip().rstrip("%")
+    percent = float(text)
+    if not 0 < percent <= 100:
+        raise ValueError(f"CPU budget must be between 0 and 100%, got {value}")
+    return percent
+
+class CPUBudget:
+    """
+    Keeps the monitor's own CPU usage under a percentage of one CPU.
+
+    The process CPU time (os.times, all threads) is compared with wall time
+    over each measurement window. When usage exceeds the budget, the
+    throttle factor grows so that every scheduled activity (sampling,
+    process scans, redraws) runs proportionally less often; it relaxes again
+    once usage is comfortably below the budget.
+    """
+    MAX_FACTOR = 64.0
+
+    def __init__(self, budget_percent, window=2.0, clock=time.monotonic, cpu_clock=None):
+        self.budget_percent = budget_percent
+        self.window = window
+        self.clock = clock
+        self.cpu_clock = cpu_clock or self._process_cpu_time
+        self.factor = 1.0
+        self.usage_percent = 0.0
+        self._window_start = self.clock()
+        self._cpu_start = self.cpu_clock()
+
+    @staticmethod
+    def _process_cpu_time():
+        times = os.times()
+        return times.user + times.system
+
+    @property
+    def throttled(self):
+        return self.factor > 1.0
+
+    def update(self):
+        """Re-measure usage once per window and return the current throttle factor"""
+        now = self.clock()
+        elapsed = now - self._window_start
+        if elapsed < self.window:
+            return self.factor
+
+        cpu_now = self.cpu_clock()
+        self.usage_percent = (cpu_now - self._cpu_start) / elapsed * 100
+        self._window_start = now
+        self._cpu_start = cpu_now
+
+        if self.usage_percent > self.budget_percent:
+            # Scale intervals by the overshoot so the next window lands under budget
+            self.factor = min(self.factor * self.usage_percent / self.budget_percent, self.MAX_FACTOR)
+        elif self.usage_percent < self.budget_percent * 0.5:
+            self.factor = max(self.factor * 0.8, 1.0)
+        return self.factor
+
+    def scale(self, interval):
+        return interval * self.factor
+
+    def status_text(self):
+        if not self.throttled:
+            return f"CPU {self.usage_percent:.2f}% (budget {self.budget_percent:g}%)"
+        return (f"Throttled x{self.factor:.1f}: CPU {self.usage_percent:.2f}% "
+                f"(budget {self.budget_percent:g}%)")
@@ -0,0 +1,116 @@
+import json
+import time
+
+class ChangeTracker:
+    """
+    Typed change events from consecutive samples of the online cores.
+
+    Each sample is kept as one tuple per watched field, aligned with the core
+    list, so a tick where nothing changed costs one tuple comparison per
+    field; only a column that differs is scanned for the cores that changed.
+
+    Every event has a "source": "ours" when it matches a value we wrote
+    ourselves (see expect) in the last EXPECT_WINDOW seconds, "external"
+    otherwise. Hotplug events are always external.
+    """
+    # Snapshot field -> event type
+    FIELDS = {"governor": "governor_changed", "epp": "epp_changed"}
+    # cpufreq attribute -> snapshot field, for our own writes
+    ATTRIBUTES = {"scaling_governor": "governor", "energy_performance_preference": "epp"}
+    EXPECT_WINDOW = 30.0
+    MAX_PENDING = 1000  # events kept for the next update() when nobody collects them
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.callbacks = []
+        self.pending = []
+        self._cores = None
+        self._columns = {}
+        self._expected = {}  # (core_id, field) -> (value, deadline)
+
+    def subscribe(self, callback):
+        """Call callback(event) for every event as soon as it is found"""
+        self.callbacks.append(callback)
+
+    def unsubscribe(self, callback):
+        self.callbacks.remove(callback)
+
+    def expect(self, core_id, attribute, value):
+        """Note a value we wrote (and read back), so the change it causes is ours"""
+        field = self.ATTRIBUTES.get(attribute)
+        if field:
+            self._expected[(core_id, field)] = (str(value), self.clock() + self.EXPECT_WINDOW)
+
+    def forget(self, core_id, attribute):
+        """Drop the expectation for a setting whose write failed or was rolled back"""
+        self._expected.pop((core_id, self.ATTRIBUTES.get(attribute)), None)
+
+    def source(self, core_id, field, value):
+        expected = self._expected.get((core_id, field))
+        if expected is None:
+            return "external"
+        del self._expected[(core_id, field)]
+        return "ours" if expected[0] == value and self.clock() <= expected[1] else "external"
+
+    def emit(self, events):
+        for event in events:
+            for callback in self.callbacks:
+                callback(event)
+        self.pending += events
+        del self.pending[:-self.MAX_PENDING]
+
+    def hotplug(self, added, removed, now):
+        self.emit(
+            [{"time": now, "core": core_id, "type": "core_online", "source": "external"} for core_id in added]
+            + [{"time": now, "core": core_id, "type": "core_offline", "source": "external"} for core_id in removed]
+        )
+
+    def update(self, records, now):
+        """
+        Diff {core_id: {"governor": ..., "epp": ...}} against the previous
+        sample and return every event since the last update(), hotplug
+        events included. The first sample only sets the baseline.
+        """
+        cores = tuple(records)
+        columns = {
+            field: tuple(record.get(field, "N/A") for record in records.values()) for field in self.FIELDS
+        }
+        # After hotplug the columns no longer line up, so every field is compared per core
+        changed = [field for field in self.FIELDS if field in self._columns and (
+            cores != self._cores or columns[field] != self._columns[field])]
+        if changed:
+            if cores == self._cores:
+                positions = [(core_id, index, index) for index, core_id in enumerate(cores)]
+            else:
+                # Only cores present in both samples can have changed
+                previous = {core_id: index for index, core_id in enumerate(self._cores)}
+                positions = [(core_id, previous[core_id], index) for index, core_id in enumerate(cores)
+                             if core_id in previous]
+            events = []
+            for field in changed:
+                old_column, new_column = self._columns[field], columns[field]
+                for core_id, old_index, new_index in positions:
+                    old, new = old_column[old_index], new_column[new_index]
+                    # N/A comes and goes with cores going offline or driver switches
+                    if old != new and "N/A" not in (old, new):
+                        events.append({
+                            "time": now, "core": core_id, "type": self.FIELDS[field],
+                            "old": old, "new": new, "source": self.source(core_id, field, new),
+                        })
+            self.emit(events)
+        self._cores = cores
+        self._columns = columns
+        events, self.pending = self.pending, []
+        return events
+
+class ChangeLog:
+    """Appends change events to a file, one JSON object per line"""
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "a", buffering=1)
+
+    def __call__(self, event):
+        self.file.write(json.dumps(event) + "\n")
+
+    def close(self):
+        self.file.close()
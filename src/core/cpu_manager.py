@@ -1,61 +1,727 @@
-import os
-from ..utils.file_handler import FileHandler
-from .privilege_handler import PrivilegeHandler
+import time
+import functools
+import threading
+from ..utils.file_handler import FileHandler, sysfs_value
+from .backends import SysfsBackend
+from .sampler import TieredSampler, SampleSchedule
+from .profiles import ProfileStore
+from .drivers import detect_driver
+from .cpuidle import IdleMonitor
+from .thermal import ThermalMonitor
+from .topology import Topology, CPUUtilization, read_core_sets
+from .changes import ChangeTracker
+
+# Key in transaction settings for system-wide writes, given as {absolute path: value}
+GLOBAL_SETTINGS = "global"
+
+def _locked(method):
+    """Run a CPUManager method under the manager's lock"""
+    @functools.wraps(method)
+    def locked(self, *args, **kwargs):
+        with self.lock:
+            return method(self, *args, **kwargs)
+    return locked
 
 class CPUManager:
-    def __init__(self):
-        self.cpu_cores = os.cpu_count()
-        self.amd_pstate_active = FileHandler.is_amd_pstate()
+    def __init__(self, backend=None):
+        # Frontends call in from several threads (the GUI's readers and its
+        # write queue); every public entry point holds this re-entrant lock
+        # so sampler, driver and change-tracking state are never torn
+        self.lock = threading.RLock()
+        # Every read (through FileHandler) and write goes to one backend: local
+        # sysfs unless given a simulator, a recording or a remote agent
+        self.backend = backend or SysfsBackend()
+        FileHandler.use_backend(self.backend)
+        # Online CPU ids can be sparse (e.g. 0,2-7 with cpu1 offlined), so
+        # everything iterates self.cores rather than range(cpu_cores)
+        self.cores, self.present_cores = self.read_core_sets()
+        self._hotplug_deadline = 0.0
         self.available_governors = FileHandler.get_available_governors()
+        # Static/slow/fast attribute tiers keep per-tick sysfs reads to a minimum
+        self.sampler = TieredSampler(self.cores)
+        self.driver = None
+        self.refresh_driver(detect_driver(core_id=self.first_core))
+        self._last_write = None
+        self.boost_paths = self._detect_boost_paths()
+        self._boost = None
+        self._boost_deadline = 0.0
+        self._driver_globals = {}
+        self._driver_globals_deadline = 0.0
+        self.idle = IdleMonitor(self.cores, self.sampler.slow_interval, self.sampler.clock)
+        self.thermal = ThermalMonitor(self.cores)
+        self.topology = Topology(self.cores)
+        self.utilization = CPUUtilization()
+        # Governor/EPP/hotplug change events, for on_change subscribers and snapshots
+        self.changes = ChangeTracker(self.sampler.clock)
+        # Optional SnapshotReader: a separate sampler process does the polling
+        self.bus = None
+        self._bus_sequence = None
+        self._bus_events = []
+        if hasattr(self.backend, "latest"):
+            # Remote backends stream the per-tick values like a snapshot bus
+            self.attach_bus(self.backend)
+
+    @_locked
+    def close(self):
+        self.backend.close()
+
+    @staticmethod
+    def read_core_sets():
+        """(online, present) CPU ids, see topology.read_core_sets"""
+        return read_core_sets()
+
+    @property
+    def cpu_cores(self):
+        """Number of online cores"""
+        return len(self.cores)
+
+    @property
+    def first_core(self):
+        """Lowest online core id, used for system-wide probes"""
+        return self.cores[0] if self.cores else 0
+
+    @_locked
+    def attach_bus(self, reader):
+        """
+        Read frequency, governor/EPP, utilisation, thermal state and
+        temperatures from a published snapshot bus instead of sysfs. Falls
+        back to sysfs whenever the bus has no fresh snapshot.
+        """
+        self.bus = reader
+        self._bus_sequence = None
+
+    def _from_bus(self):
+        """The latest published snapshot (folded into our caches once per sequence), or None"""
+        if self.bus is None:
+            return None
+        snapshot = self.bus.latest()
+        if snapshot is None or self.bus.sequence == self._bus_sequence:
+            return snapshot
+        self._bus_sequence = self.bus.sequence
+        for core_id, values in snapshot["cores"].items():
+            seeded = {"scaling_cur_freq": str(values["frequency"]), "scaling_governor": values["governor"]}
+            if "epp" in values:
+                seeded["energy_performance_preference"] = values["epp"]
+            self.sampler.seed(core_id, seeded)
+        self.utilization.percent = {
+            core_id: values["utilization"] for core_id, values in snapshot["cores"].items() if "utilization" in values
+        }
+        self.thermal.throttled = {
+            core_id: values["throttled"] for core_id, values in snapshot["cores"].items() if "throttled" in values
+        }
+        self._bus_events = [event for event in snapshot["events"] if event["type"].endswith("_throttle")]
+        return snapshot
+
+    @_locked
+    def check_hotplug(self, force=False):
+        """
+        Re-read the online CPU list (once per slow interval unless forced) and
+        move every per-core cache to the new set. Returns (added, removed)
+        core ids; both are empty when nothing changed.
+        """
+        now = self.sampler.clock()
+        if not force and now < self._hotplug_deadline:
+            return [], []
+        self._hotplug_deadline = now + self.sampler.slow_interval
+        snapshot = self._from_bus()
+        if snapshot is not None:
+            online = sorted(snapshot["cores"])
+        else:
+            online, self.present_cores = self.read_core_sets()
+        added = [core_id for core_id in online if core_id not in self.cores]
+        removed = [core_id for core_id in self.cores if core_id not in online]
+        if added or removed:
+            self.set_cores(online)
+            self.changes.hotplug(added, removed, time.time())
+        return added, removed
+
+    @_locked
+    def set_cores(self, cores):
+        """Track a new online core set; state for cores that went away is dropped"""
+        self.cores = sorted(cores)
+        # Cores that came back online bring their attributes back
+        FileHandler.reset_capabilities()
+        self.sampler.set_cores(self.cores)
+        self.idle.set_cores(self.cores)
+        self.thermal.set_cores(self.cores)
+        self.topology.set_cores(self.cores)
+
+    @_locked
+    def refresh_driver(self, driver=None):
+        """Adopt the given (or freshly detected) scaling driver and re-read driver attributes"""
+        if driver is None:
+            # A mode switch adds or removes attributes (EPP, driver extras)
+            FileHandler.reset_capabilities()
+        self.driver = driver or detect_driver(refresh=True, core_id=self.first_core)
+        self.sampler.configure(
+            self.driver.epp_supported, self.driver.core_attributes, self.driver.core_slow_attributes
+        )
+        self.sampler.scaling_driver = self.driver.scaling_driver
+        self._driver_globals_deadline = 0.0
+
+    @property
+    def epp_supported(self):
+        return self.driver.epp_supported
+
+    @property
+    def amd_pstate_active(self):
+        return self.driver.name == "amd-pstate" and self.driver.epp_supported
+
+    def _check_driver(self):
+        # The sampler notices driver switches (e.g. an intel_pstate status change) for us
+        scaling_driver = self.sampler.scaling_driver
+        if scaling_driver is not None and scaling_driver != self.driver.scaling_driver:
+            self.refresh_driver()
+
+    @property
+    def last_settings_change(self):
+        """Monotonic time of the last governor/EPP change we made or observed"""
+        changes = [t for t in (self._last_write, self.sampler.last_change) if t is not None]
+        return max(changes) if changes else None
+
+    @_locked
+    def current_frequencies(self):
+        return self.sampler.cached_frequencies()
+
+    def _written(self, core_id):
+        # Re-read governor/EPP straight after our own write
+        if core_id == GLOBAL_SETTINGS:
+            self._boost_deadline = 0.0
+            self._driver_globals_deadline = 0.0
+            self.idle.invalidate()
+        else:
+            self.sampler.invalidate(core_id)
+        self._last_write = time.monotonic()
+
+    @staticmethod
+    def _detect_boost_paths():
+        """
+        Boost controls exposed by this kernel, as (path, inverted) pairs.
 
+        The global cpufreq/boost switch (acpi-cpufreq, amd-pstate) is preferred,
+        then intel_pstate/no_turbo (inverted), then per-policy boost files.
+        """
+        root = FileHandler.CPU_ROOT
+        for path, inverted in ((f"{root}/cpufreq/boost", False), (f"{root}/intel_pstate/no_turbo", True)):
+            if FileHandler.exists(path):
+                return [(path, inverted)]
+        try:
+            policies = sorted(
+                entry for entry in FileHandler.listdir(f"{root}/cpufreq") if entry.startswith("policy")
+            )
+        except OSError:
+            return []
+        return [
+            (f"{root}/cpufreq/{policy}/boost", False)
+            for policy in policies
+            if FileHandler.exists(f"{root}/cpufreq/{policy}/boost")
+        ]
+
+    @property
+    def boost_supported(self):
+        return bool(self.boost_paths)
+
+    @_locked
+    def get_boost(self):
+        """True/False for boost on/off, None when unsupported; cached like the slow tier"""
+        if not self.boost_paths:
+            return None
+        now = self.sampler.clock()
+        if now >= self._boost_deadline:
+            states = []
+            for path, inverted in self.boost_paths:
+                value = FileHandler.read_file(path, suppress_warnings=True)
+                if value in ("0", "1"):
+                    states.append((value == "1") != inverted)
+            # Per-policy switches count as on if any policy can boost
+            self._boost = any(states) if states else None
+            self._boost_deadline = now + self.sampler.slow_interval
+        return self._boost
+
+    @_locked
+    def boost_settings(self, enabled):
+        """System-wide writes that switch boost on or off"""
+        return {
+            path: "1" if enabled != inverted else "0"
+            for path, inverted in self.boost_paths
+        }
+
+    @_locked
+    def set_boost(self, enabled):
+        if not self.boost_paths:
+            return False
+        return self.apply_transaction({GLOBAL_SETTINGS: self.boost_settings(enabled)})["success"]
+
+    @_locked
     def get_cpu_frequency(self, core_id):
-        return FileHandler.get_cpu_frequency(core_id)
+        snapshot = self._from_bus()
+        if snapshot is not None and core_id in snapshot["cores"]:
+            return self.sampler.values[core_id].get("scaling_cur_freq", "N/A")
+        return self.sampler.get(core_id, "scaling_cur_freq")
 
+    @_locked
     def get_cpu_governor(self, core_id):
-        return FileHandler.get_cpu_governor(core_id)
+        # A published snapshot seeds the sampler's slow tier, so this reads no sysfs while attached
+        self._from_bus()
+        return self.sampler.get(core_id, "scaling_governor")
+
+    @_locked
+    def get_driver_params(self, core_id):
+        """EPP and driver-specific per-core parameters"""
+        self._from_bus()
+        return self.sampler.get_driver_params(core_id)
 
+    @_locked
     def get_amd_pstate_params(self, core_id):
         if not self.amd_pstate_active:
             return {}
-        return FileHandler.get_amd_pstate_params(core_id)
+        return self.get_driver_params(core_id)
+
+    @_locked
+    def get_driver_globals(self):
+        """System-wide driver parameters (status, perf limits, ...), cached like the slow tier"""
+        now = self.sampler.clock()
+        if now >= self._driver_globals_deadline:
+            self._driver_globals = self.driver.get_globals()
+            self._driver_globals_deadline = now + self.sampler.slow_interval
+        return self._driver_globals
+
+    @_locked
+    def driver_global_settings(self, values):
+        """Validated GLOBAL_SETTINGS writes for {attribute: value}; raises ValueError"""
+        return self.driver.global_settings(values, self.driver.get_globals())
+
+    @_locked
+    def set_driver_globals(self, values):
+        return self.apply_transaction({GLOBAL_SETTINGS: self.driver_global_settings(values)})["success"]
+
+    @_locked
+    def set_driver_mode(self, mode):
+        """Switch the driver's operating mode (e.g. amd-pstate active/passive/guided)"""
+        if not self.driver.modes:
+            return False
+        return self.set_driver_globals({"status": mode})
+
+    @_locked
+    def get_prefcore_ranking(self, core_id):
+        """The core's preferred-core ranking (higher is faster), or None if not exposed"""
+        ranking = self.get_driver_params(core_id).get("amd_pstate_prefcore_ranking", "N/A")
+        return int(ranking) if ranking.isdigit() else None
+
+    @property
+    def ranking_supported(self):
+        return "amd_pstate_prefcore_ranking" in self.driver.core_slow_attributes \
+            and self.get_prefcore_ranking(self.first_core) is not None
+
+    @_locked
+    def cores_by_ranking(self, cores=None):
+        """
+        Cores grouped by preferred-core ranking, fastest first, as [(ranking, [core_ids])].
+
+        Cores without a ranking form a final group with ranking None.
+        """
+        groups = {}
+        for core_id in self.cores if cores is None else cores:
+            groups.setdefault(self.get_prefcore_ranking(core_id), []).append(core_id)
+        ranked = sorted((ranking for ranking in groups if ranking is not None), reverse=True)
+        if None in groups:
+            ranked.append(None)
+        return [(ranking, sorted(groups[ranking])) for ranking in ranked]
+
+    @_locked
+    def core_order(self, by_ranking=False):
+        """Display order for the core list"""
+        if not by_ranking:
+            return list(self.cores)
+        return [core_id for _, cores in self.cores_by_ranking() for core_id in cores]
+
+    @_locked
+    def get_freq_limits(self, core_id):
+        return self.sampler.get_freq_limits(core_id)
+
+    @_locked
+    def sample_thermal(self):
+        """Throttle events since the previous call, each with the frequency before and after"""
+        if self._from_bus() is not None:
+            # The publisher already sampled the counters; hand out its events once
+            events, self._bus_events = self._bus_events, []
+            return events
+        frequencies = {
+            core_id: values.get("scaling_cur_freq", "N/A") for core_id, values in self.sampler.values.items()
+        }
+        return self.thermal.sample(frequencies)
+
+    @property
+    def throttled_cores(self):
+        """Cores whose core or package throttle counter moved in the last thermal sample"""
+        return set(self.thermal.throttled)
 
+    @_locked
+    def get_temperatures(self):
+        snapshot = self._from_bus()
+        if snapshot is not None:
+            return snapshot["temperatures"]
+        return self.thermal.temperatures()
+
+    @_locked
+    def display_rows(self, by_ranking=False, group_level=None):
+        """
+        Core list layout: core ids in display order and, when grouping by a
+        topology level, a (label, [core_ids]) header before each group.
+        """
+        order = self.core_order(by_ranking)
+        if not group_level:
+            return order
+        position = {core_id: index for index, core_id in enumerate(order)}
+        rows = []
+        for label, cores in self.core_groups(group_level):
+            rows.append((label, cores))
+            rows.extend(sorted(cores, key=position.get))
+        return rows
+
+    @_locked
+    def sample_utilization(self):
+        """Per-core busy percent since the previous call (one /proc/stat read)"""
+        if self._from_bus() is not None:
+            return self.utilization.percent
+        return self.utilization.sample()
+
+    @_locked
+    def snapshot(self):
+        """
+        One record of the online cores: frequency, governor, EPP (when
+        supported), utilisation and throttle state per core, temperatures,
+        and the change (see check_changes) and thermal events since the
+        previous call.
+        """
+        now = time.time()
+        self.check_hotplug()
+        utilization = self.sample_utilization()
+        cores = {}
+        for core_id in self.cores:
+            cores[core_id] = {"frequency": sysfs_value(self.get_cpu_frequency(core_id)), **self._settings(core_id)}
+            if core_id in utilization:
+                cores[core_id]["utilization"] = round(utilization[core_id], 1)
+        events = self.changes.update(cores, now)
+        if self.thermal.supported:
+            events += self.sample_thermal()
+        for core_id, kinds in self.thermal.throttled.items():
+            cores[core_id]["throttled"] = kinds
+        return {
+            "time": now,
+            "cores": cores,
+            "temperatures": self.get_temperatures(),
+            "events": events,
+        }
+
+    def _settings(self, core_id):
+        settings = {"governor": self.get_cpu_governor(core_id)}
+        if self.epp_supported:
+            settings["epp"] = self.get_driver_params(core_id).get("energy_performance_preference", "N/A")
+        return settings
+
+    @_locked
+    def check_changes(self):
+        """
+        Change events since the previous call (or snapshot): cores going
+        offline or online and governor/EPP changes, each with a "source" of
+        "ours" (our own apply_transaction) or "external". Governor and EPP
+        are read through the sampler, so this adds no sysfs reads to a tick
+        that already displays them.
+        """
+        self.check_hotplug()
+        return self.changes.update({core_id: self._settings(core_id) for core_id in self.cores}, time.time())
+
+    @_locked
+    def on_change(self, callback):
+        """Call callback(event) for every change event as it is found (e.g. a ChangeLog)"""
+        self.changes.subscribe(callback)
+
+    def iter_snapshots(self, interval, count=None):
+        """
+        Yield snapshot() every interval seconds on a drift-free schedule.
+
+        Sampling only happens when the consumer asks for the next record; if
+        it took longer than an interval, the missed ticks are dropped (their
+        number is in the record's "dropped") instead of queued.
+        """
+        schedule = SampleSchedule(interval)
+        dropped = 0
+        samples = 0
+        while count is None or samples < count:
+            delay = schedule.delay()
+            if delay:
+                time.sleep(delay)
+            yield {**self.snapshot(), "dropped": dropped}
+            samples += 1
+            dropped = schedule.advance()
+
+    async def astream(self, interval, count=None, executor=None):
+        """
+        Async iter_snapshots: `async for snapshot in manager.astream(1.0)`.
+
+        The blocking sysfs reads run in executor (the loop's default when
+        None), so the event loop stays responsive. Use a single-thread
+        executor if the manager is also used from elsewhere.
+        """
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        schedule = SampleSchedule(interval, clock=loop.time)
+        dropped = 0
+        samples = 0
+        while count is None or samples < count:
+            delay = schedule.delay()
+            if delay:
+                await asyncio.sleep(delay)
+            snapshot = await loop.run_in_executor(executor, self.snapshot)
+            yield {**snapshot, "dropped": dropped}
+            samples += 1
+            dropped = schedule.advance()
+
+    @_locked
+    def core_groups(self, level):
+        """[(label, [core_ids])] for a topology level (package, die, cluster, core, type)"""
+        return self.topology.groups(level)
+
+    @_locked
+    def group_aggregates(self, level):
+        """
+        Per-group summaries from the latest samples, without touching sysfs:
+        [{"group", "cores", "frequency_avg", "frequency_max", "utilization"}].
+        Frequencies are in kHz; values are None when nothing was readable.
+        """
+        aggregates = []
+        for label, cores in self.core_groups(level):
+            frequencies = [
+                int(freq) for freq in (
+                    self.sampler.values.get(core_id, {}).get("scaling_cur_freq", "N/A") for core_id in cores
+                ) if freq.isdigit()
+            ]
+            busy = [self.utilization.percent[core_id] for core_id in cores if core_id in self.utilization.percent]
+            aggregates.append({
+                "group": label,
+                "cores": cores,
+                "frequency_avg": sum(frequencies) // len(frequencies) if frequencies else None,
+                "frequency_max": max(frequencies) if frequencies else None,
+                "utilization": sum(busy) / len(busy) if busy else None,
+            })
+        return aggregates
+
+    @_locked
+    def get_idle_states(self, core_id):
+        """cpuidle states with per-interval residency since the last call for this core"""
+        return self.idle.sample(core_id)
+
+    @_locked
+    def idle_latency_settings(self, selected_cores, max_latency):
+        """Transaction settings limiting C-states to exit latency <= max_latency us; raises ValueError"""
+        return {GLOBAL_SETTINGS: self.idle.latency_settings(selected_cores, max_latency)}
+
+    @_locked
+    def set_idle_latency_limit(self, selected_cores, max_latency):
+        return self.apply_transaction(self.idle_latency_settings(selected_cores, max_latency))["success"]
+
+    @_locked
     def update_governor(self, core_id, new_governor):
-        if new_governor == "userspace":
-            max_freq = FileHandler.get_max_freq(core_id)
-            if max_freq != "N/A":
-                return PrivilegeHandler.set_governor_and_freq(core_id, governor=new_governor, max_freq=max_freq)
-        else:
-            return PrivilegeHandler.set_governor_and_freq(core_id, governor=new_governor)
-        return False
+        return self.update_all_governors(new_governor, [core_id])
 
+    @_locked
     def update_epp(self, core_id, new_epp):
-        if not self.amd_pstate_active:
-            return False
-        return PrivilegeHandler.set_governor_and_freq(core_id, epp=new_epp)
+        return self.update_all_epp(new_epp, [core_id])
 
+    @_locked
     def get_cpu_info(self, core_id):
         info = {
-            'frequency': FileHandler.get_cpu_frequency(core_id),
-            'governor': FileHandler.get_cpu_governor(core_id),
+            'frequency': self.get_cpu_frequency(core_id),
+            'governor': self.get_cpu_governor(core_id),
         }
-        
-        if self.amd_pstate_active:
-            info.update(FileHandler.get_amd_pstate_params(core_id))
+        self._check_driver()
+        info.update(self.get_driver_params(core_id))
         
         return info
 
+    @_locked
+    def governor_settings(self, core_id, governor):
+        """Attributes to write for a governor switch"""
+        settings = {"scaling_governor": governor}
+        if governor == "userspace":
+            # Start the userspace governor at the current cap
+            max_freq = self.sampler.get(core_id, "scaling_max_freq")
+            if max_freq != "N/A":
+                settings["scaling_setspeed"] = max_freq
+        return settings
+
+    @_locked
     def update_all_governors(self, new_governor, selected_cores):
-        success = True
-        for core_id in selected_cores:
-            if not self.update_governor(core_id, new_governor):
-                success = False
-        return success
+        settings = {core_id: self.governor_settings(core_id, new_governor) for core_id in selected_cores}
+        return self.apply_transaction(settings)["success"]
+
+    @_locked
+    def freq_limit_settings(self, core_id, min_freq=None, max_freq=None):
+        """
+        Validate min/max caps (kHz) for a core and return the attributes to write.
+
+        Caps must lie within cpuinfo_min_freq..cpuinfo_max_freq, be one of
+        scaling_available_frequencies when the driver exposes a table, and
+        leave min <= max. Raises ValueError otherwise.
+        """
+        limits = self.get_freq_limits(core_id)
+        hw_min, hw_max = limits["cpuinfo_min_freq"], limits["cpuinfo_max_freq"]
+        available = limits["scaling_available_frequencies"]
+        available = available.split() if available != "N/A" else []
+
+        settings = {}
+        for attribute, value in (("scaling_min_freq", min_freq), ("scaling_max_freq", max_freq)):
+            if value is None or value == "":
+                continue
+            try:
+                value = int(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"Core {core_id}: frequency '{value}' is not a number")
+            if hw_min.isdigit() and value < int(hw_min) or hw_max.isdigit() and value > int(hw_max):
+                raise ValueError(f"Core {core_id}: {value} kHz is outside the hardware range {hw_min}-{hw_max} kHz")
+            if available and str(value) not in available:
+                raise ValueError(f"Core {core_id}: {value} kHz is not one of {', '.join(available)}")
+            settings[attribute] = str(value)
 
+        new_min = settings.get("scaling_min_freq", limits["scaling_min_freq"])
+        new_max = settings.get("scaling_max_freq", limits["scaling_max_freq"])
+        if new_min.isdigit() and new_max.isdigit() and int(new_min) > int(new_max):
+            raise ValueError(f"Core {core_id}: minimum {new_min} kHz is above maximum {new_max} kHz")
+        return settings
+
+    @_locked
+    def update_freq_limits(self, selected_cores, min_freq=None, max_freq=None):
+        """Cap frequencies on the selected cores in one batch; raises ValueError on invalid caps"""
+        settings = {core_id: self.freq_limit_settings(core_id, min_freq, max_freq) for core_id in selected_cores}
+        return self.apply_transaction(settings)["success"]
+
+    @_locked
     def update_all_epp(self, new_epp, selected_cores):
-        if not self.amd_pstate_active:
+        if not self.epp_supported:
             return False
-        success = True
-        for core_id in selected_cores:
-            if not self.update_epp(core_id, new_epp):
-                success = False
-        return success 
\ No newline at end of file
+        settings = {core_id: {"energy_performance_preference": new_epp} for core_id in selected_cores}
+        return self.apply_transaction(settings)["success"]
+
+    @staticmethod
+    def _write_order(core_id, core_settings):
+        """Governor first, then frequency limits in a kernel-acceptable order, then EPP"""
+        order = ["scaling_governor", "scaling_min_freq", "scaling_max_freq"]
+        new_min = core_settings.get("scaling_min_freq")
+        if new_min and "scaling_max_freq" in core_settings:
+            current_max = FileHandler.read_file(FileHandler.cpufreq_path(core_id, "scaling_max_freq"))
+            # Raising min above the current max is rejected unless max moves first
+            if current_max.isdigit() and int(new_min) > int(current_max):
+                order = ["scaling_governor", "scaling_max_freq", "scaling_min_freq"]
+        order.append("energy_performance_preference")
+        order += sorted(set(core_settings) - set(order))
+        return [attribute for attribute in order if attribute in core_settings]
+
+    def _targets(self, settings):
+        """(core_id, attribute, path, value) in write order; global writes use the path as attribute"""
+        targets = [(GLOBAL_SETTINGS, path, path, value) for path, value in settings.get(GLOBAL_SETTINGS, {}).items()]
+        for core_id in sorted(core for core in settings if core != GLOBAL_SETTINGS):
+            for attribute in self._write_order(core_id, settings[core_id]):
+                targets.append((core_id, attribute, FileHandler.cpufreq_path(core_id, attribute), settings[core_id][attribute]))
+        return targets
+
+    @_locked
+    def settings_diff(self, settings):
+        """
+        What apply_transaction would change, without writing anything:
+        {core_id or GLOBAL_SETTINGS: {attribute or path: (current, new)}}.
+        """
+        diff = {}
+        for core_id, attribute, path, value in self._targets(settings):
+            current = FileHandler.read_file(path)
+            if current != str(value):
+                diff.setdefault(core_id, {})[attribute] = (current, str(value))
+        return diff
+
+    @_locked
+    def apply_transaction(self, settings):
+        """
+        Apply {core_id: {attribute: value}} as one privileged batch.
+
+        System-wide writes go under GLOBAL_SETTINGS as {path: value} and are
+        applied first. Prior values are captured first and every write is
+        verified by reading it back; on any failure the prior state is
+        restored. Writes that match the current value are skipped.
+        """
+        writes = []
+        prior = []
+        changed = []
+        for core_id, attribute, path, value in self._targets(settings):
+            current = FileHandler.read_file(path)
+            value = str(value)
+            if current == value:
+                continue
+            prior.append((core_id, attribute, current))
+            writes.append((path, value))
+            changed.append((core_id, attribute, value))
+
+        results = self.backend.apply_batch(writes)
+        errors = [f"{result['path']}: {result['error']}" for result in results if not result['ok']]
+        if not errors:
+            for path, value in writes:
+                actual = FileHandler.read_file(path)
+                if actual != value:
+                    errors.append(f"{path}: read back '{actual}', expected '{value}'")
+
+        for core_id, attribute, value in changed:
+            if errors:
+                # Whatever these settings turn into next is not our doing
+                self.changes.forget(core_id, attribute)
+            else:
+                # The governor/EPP changes this batch made are ours, not external
+                self.changes.expect(core_id, attribute, value)
+
+        rolled_back = False
+        if errors:
+            # Undo every write that was attempted, in write order so that min <= max holds
+            # throughout; placeholders such as "<unsupported>" (scaling_setspeed outside the
+            # userspace governor) and unreadable values cannot be written back
+            restore = {}
+            for core_id, attribute, value in prior[:len(results)]:
+                if value != "N/A" and not value.startswith("<"):
+                    restore.setdefault(core_id, {})[attribute] = value
+            rollback_results = self.backend.apply_batch(
+                [(path, value) for _, _, path, value in self._targets(restore)]
+            )
+            rolled_back = all(result['ok'] for result in rollback_results)
+
+        for core_id in settings:
+            self._written(core_id)
+        if any(path == self.driver.global_path("status") for path, _ in writes):
+            # Switching operating mode changes the scaling driver and its attributes
+            self.refresh_driver()
+        return {
+            "success": not errors,
+            "writes": len(writes),
+            "errors": errors,
+            "rolled_back": rolled_back
+        }
+
+    @_locked
+    def resolve_profile(self, profile):
+        """Expand a profile into per-core settings, validating any frequency caps"""
+        settings = ProfileStore.resolve(profile, self.cores)
+        for core_id, core_settings in settings.items():
+            if "scaling_min_freq" in core_settings or "scaling_max_freq" in core_settings:
+                core_settings.update(self.freq_limit_settings(
+                    core_id,
+                    core_settings.get("scaling_min_freq"),
+                    core_settings.get("scaling_max_freq")
+                ))
+        boost = ProfileStore.boost(profile)
+        if boost is not None:
+            if not self.boost_paths:
+                raise ValueError("Profile sets boost, but this system exposes no boost control")
+            settings[GLOBAL_SETTINGS] = self.boost_settings(boost)
+        return settings
+
+    @_locked
+    def apply_profile(self, profile):
+        """Apply a profile (entries from ProfileStore) atomically across all cores"""
+        return self.apply_transaction(self.resolve_profile(profile))
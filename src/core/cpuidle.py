@@ -0,0 +1,125 @@
+import time
+from ..utils.file_handler import FileHandler
+
+class IdleMonitor:
+    """
+    Per-core cpuidle (C-state) readings.
+
+    State names and exit latencies are read once per core; usage and time
+    counters are read on every sample and turned into per-interval
+    residency (fraction of wall time spent in each state). The disable
+    flags are refreshed every slow_interval seconds or after our own writes.
+    """
+    STATIC_ATTRIBUTES = ("name", "latency")
+
+    def __init__(self, cores, slow_interval=3.0, clock=time.monotonic):
+        self.slow_interval = slow_interval
+        self.clock = clock
+        self.states = {}  # core_id -> [{"state", "name", "latency", "disable", ...}]
+        self._previous = {}  # core_id -> (clock time, {state: (usage, time)})
+        self._disable_deadline = {}
+        self.set_cores(cores)
+
+    def set_cores(self, cores):
+        cores = list(cores)
+        for core_id in list(self.states):
+            if core_id not in cores:
+                self.states.pop(core_id)
+                self._previous.pop(core_id, None)
+                self._disable_deadline.pop(core_id, None)
+        self._cores = cores
+
+    @staticmethod
+    def state_dir(core_id, state):
+        return f"{FileHandler.CPU_ROOT}/cpu{core_id}/cpuidle/{state}"
+
+    def _discover(self, core_id):
+        if core_id in self.states:
+            return self.states[core_id]
+        try:
+            names = FileHandler.listdir(f"{FileHandler.CPU_ROOT}/cpu{core_id}/cpuidle")
+        except OSError:
+            names = []
+        states = []
+        for state in sorted((name for name in names if name.startswith("state")), key=lambda s: int(s[5:])):
+            entry = {"state": state}
+            for attribute in self.STATIC_ATTRIBUTES:
+                entry[attribute] = FileHandler.read_file(f"{self.state_dir(core_id, state)}/{attribute}", True)
+            entry["disable"] = "N/A"
+            states.append(entry)
+        self.states[core_id] = states
+        return states
+
+    @property
+    def supported(self):
+        return bool(self._cores) and bool(self._discover(self._cores[0]))
+
+    def invalidate(self, core_id=None):
+        """Re-read disable flags on the next sample"""
+        for key in list(self._disable_deadline):
+            if core_id is None or key == core_id:
+                del self._disable_deadline[key]
+
+    def sample(self, core_id):
+        """
+        Read counters and return the core's states.
+
+        Each state carries usage/time (cumulative), usage_delta and residency
+        (0..1, None on the first sample) for the interval since the previous call.
+        """
+        states = self._discover(core_id)
+        now = self.clock()
+        refresh_disable = now >= self._disable_deadline.get(core_id, 0.0)
+        if refresh_disable:
+            self._disable_deadline[core_id] = now + self.slow_interval
+
+        counters = {}
+        for entry in states:
+            base = self.state_dir(core_id, entry["state"])
+            if refresh_disable:
+                entry["disable"] = FileHandler.read_file(f"{base}/disable", True)
+            usage = FileHandler.read_file(f"{base}/usage", True)
+            time_us = FileHandler.read_file(f"{base}/time", True)
+            entry["usage"], entry["time"] = usage, time_us
+            if usage.isdigit() and time_us.isdigit():
+                counters[entry["state"]] = (int(usage), int(time_us))
+
+        previous_time, previous = self._previous.get(core_id, (None, {}))
+        elapsed_us = (now - previous_time) * 1e6 if previous_time is not None else 0
+        for entry in states:
+            entry["usage_delta"] = entry["residency"] = None
+            if entry["state"] in counters and entry["state"] in previous and elapsed_us > 0:
+                usage, time_us = counters[entry["state"]]
+                entry["usage_delta"] = usage - previous[entry["state"]][0]
+                entry["residency"] = min(max((time_us - previous[entry["state"]][1]) / elapsed_us, 0.0), 1.0)
+        self._previous[core_id] = (now, counters)
+        return states
+
+    @staticmethod
+    def summary(states):
+        """Short text for the state with the highest residency, e.g. 'C6 72%'"""
+        measured = [entry for entry in states if entry.get("residency") is not None]
+        if not measured:
+            return "N/A"
+        busiest = max(measured, key=lambda entry: entry["residency"])
+        return f"{busiest['name']} {busiest['residency'] * 100:.0f}%"
+
+    def latency_settings(self, cores, max_latency):
+        """
+        {path: value} writes that disable every state whose exit latency (us)
+        is above max_latency and re-enable the rest, so the threshold alone
+        decides the allowed states. Raises ValueError if nothing can be set.
+        """
+        max_latency = int(max_latency)
+        if max_latency < 0:
+            raise ValueError("C-state latency limit must not be negative")
+        settings = {}
+        for core_id in cores:
+            for entry in self._discover(core_id):
+                if not entry["latency"].isdigit():
+                    continue
+                disable = "1" if int(entry["latency"]) > max_latency else "0"
+                settings[f"{self.state_dir(core_id, entry['state'])}/disable"] = disable
+        if not settings:
+            raise ValueError("No cpuidle states exposed for the selected cores")
+        return settings
@@ -0,0 +1,143 @@
+from ..utils.file_handler import FileHandler
+
+class CpufreqDriver:
+    """
+    What a cpufreq scaling driver exposes beyond governors and frequency caps.
+
+    Per-core extras are read through the sampler's static tier; system-wide
+    parameters live under CPU_ROOT/<global_dir> and are written as
+    GLOBAL_SETTINGS in a CPUManager transaction.
+    """
+    name = "cpufreq"
+    label = "cpufreq"
+    # Optional per-core cpufreq attributes, read once and reported when present
+    core_attributes = ()
+    # Optional per-core attributes the kernel may update at runtime (slow tier)
+    core_slow_attributes = ()
+    # System-wide attributes under CPU_ROOT/<global_dir>
+    global_dir = None
+    global_attributes = ()
+    # Writable system-wide attributes and their allowed values (None: checked by validate_globals)
+    writable_globals = {}
+
+    @property
+    def modes(self):
+        """Operating modes that can be written to the driver's status file"""
+        return list(self.writable_globals.get("status", ()))
+
+    def __init__(self, scaling_driver="N/A", core_id=0):
+        self.scaling_driver = scaling_driver
+        # EPP files only exist while the driver runs in an HWP/CPPC-autonomous mode
+        self.epp_supported = FileHandler.exists(FileHandler.cpufreq_path(core_id, "energy_performance_preference"))
+
+    @staticmethod
+    def matches(scaling_driver):
+        return True
+
+    def global_path(self, attribute):
+        return f"{FileHandler.CPU_ROOT}/{self.global_dir}/{attribute}"
+
+    def get_globals(self):
+        """Readable system-wide parameters as {attribute: value}"""
+        params = {}
+        for attribute in self.global_attributes:
+            value = FileHandler.read_file(self.global_path(attribute), suppress_warnings=True)
+            if value != "N/A":
+                params[attribute] = value
+        return params
+
+    def validate_globals(self, values, current):
+        """Cross-attribute checks; returns the writes in the order they must be applied"""
+        return values
+
+    def global_settings(self, values, current=None):
+        """
+        Validate {attribute: value} and return the {path: value} writes.
+
+        current holds the present values (from get_globals) for checks that
+        span several attributes. Raises ValueError on anything the driver
+        would reject.
+        """
+        settings = {}
+        for attribute, value in values.items():
+            if attribute not in self.writable_globals:
+                raise ValueError(f"{self.label}: '{attribute}' is not a writable driver parameter")
+            allowed = self.writable_globals[attribute]
+            value = str(value)
+            if allowed is not None and value not in allowed:
+                raise ValueError(f"{self.label}: {attribute} must be one of {', '.join(allowed)}")
+            settings[attribute] = value
+        settings = self.validate_globals(settings, current or {})
+        return {self.global_path(attribute): value for attribute, value in settings.items()}
+
+class AmdPstateDriver(CpufreqDriver):
+    name = "amd-pstate"
+    label = "AMD P-State"
+    core_attributes = ("amd_pstate_highest_perf", "amd_pstate_lowest_perf", "amd_pstate_hw_prefcore")
+    # Preferred-core ranking is re-evaluated by firmware, higher means faster
+    core_slow_attributes = ("amd_pstate_prefcore_ranking",)
+    global_dir = "amd_pstate"
+    global_attributes = ("status", "prefcore")
+    writable_globals = {
+        "status": ("active", "passive", "guided"),
+    }
+
+    @staticmethod
+    def matches(scaling_driver):
+        return scaling_driver.startswith("amd-pstate")
+
+class IntelPstateDriver(CpufreqDriver):
+    name = "intel_pstate"
+    label = "Intel P-State"
+    core_attributes = ("base_frequency",)
+    global_dir = "intel_pstate"
+    global_attributes = (
+        "status", "min_perf_pct", "max_perf_pct", "hwp_dynamic_boost",
+        "num_pstates", "turbo_pct",
+    )
+    writable_globals = {
+        "status": ("active", "passive", "off"),
+        "min_perf_pct": None,
+        "max_perf_pct": None,
+        "hwp_dynamic_boost": ("0", "1"),
+    }
+
+    @staticmethod
+    def matches(scaling_driver):
+        # intel_cpufreq is intel_pstate running in passive mode
+        return scaling_driver in ("intel_pstate", "intel_cpufreq")
+
+    def validate_globals(self, values, current):
+        for attribute in ("min_perf_pct", "max_perf_pct"):
+            if attribute in values:
+                value = values[attribute]
+                if not value.isdigit() or int(value) > 100:
+                    raise ValueError(f"{self.label}: {attribute} must be a percentage between 0 and 100")
+        new_min = values.get("min_perf_pct", current.get("min_perf_pct", "N/A"))
+        new_max = values.get("max_perf_pct", current.get("max_perf_pct", "N/A"))
+        if new_min.isdigit() and new_max.isdigit() and int(new_min) > int(new_max):
+            raise ValueError(f"{self.label}: min_perf_pct {new_min} is above max_perf_pct {new_max}")
+        # Raising min above the current max is rejected unless max moves first
+        current_max = current.get("max_perf_pct", "N/A")
+        if "min_perf_pct" in values and "max_perf_pct" in values and current_max.isdigit() \
+                and int(values["min_perf_pct"]) > int(current_max):
+            values = {"max_perf_pct": values["max_perf_pct"], **values}
+        return values
+
+DRIVERS = (AmdPstateDriver, IntelPstateDriver)
+
+_detected = {}  # (CPU_ROOT, backend) -> driver
+
+def detect_driver(refresh=False, core_id=0):
+    """
+    Return the driver for the given core's scaling_driver (an online core;
+    cpu0 can be offline on some platforms), cached until refresh=True.
+    """
+    key = (FileHandler.CPU_ROOT, FileHandler.backend)
+    if refresh or key not in _detected:
+        scaling_driver = FileHandler.read_file(
+            FileHandler.cpufreq_path(core_id, "scaling_driver"), suppress_warnings=True
+        )
+        driver_class = next((cls for cls in DRIVERS if cls.matches(scaling_driver)), CpufreqDriver)
+        _detected[key] = driver_class(scaling_driver, core_id)
+    return _detected[key]
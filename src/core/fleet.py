@@ -0,0 +1,84 @@
+import asyncio
+from .aggregator import parse_agent
+from .protocol import encode_frame, read_frame, request_mac
+
+async def apply_on_agent(host, port, token, profile, dry_run=False, timeout=10.0):
+    """
+    Send one authenticated apply request and wait for its result.
+
+    Returns the agent's result ({"ok", "error", "changes", "writes", ...});
+    connection problems and timeouts come back as {"ok": False, "error"}.
+    """
+    writer = None
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+        hello = await asyncio.wait_for(read_frame(reader), timeout)
+        if hello.get("type") != "hello":
+            raise ValueError("Not a cpu_monitor agent")
+        request = {"profile": profile, "dry_run": dry_run}
+        writer.write(encode_frame({
+            "type": "apply", "id": 1, "counter": 1, "request": request,
+            "mac": request_mac(token, hello["nonce"], 1, request),
+        }))
+        await writer.drain()
+
+        async def result():
+            while True:
+                message = await read_frame(reader)
+                # Snapshot frames sent before the agent saw our request are skipped
+                if message.get("type") == "result" and message.get("id") == 1:
+                    return message
+                if message.get("type") == "error":
+                    raise ValueError(message["error"])
+
+        response = await asyncio.wait_for(result(), timeout)
+        response.setdefault("node", hello.get("node"))
+        return response
+    except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError, KeyError) as e:
+        return {"ok": False, "error": str(e) or type(e).__name__, "changes": {}}
+    finally:
+        if writer is not None:
+            writer.close()
+
+async def fleet_apply_async(addresses, token, profile, dry_run=False, concurrency=16, timeout=10.0):
+    """Apply on every agent in parallel, at most concurrency at a time; results in address order"""
+    semaphore = asyncio.Semaphore(concurrency)
+    agents = [parse_agent(address) for address in addresses]
+
+    async def one(host, port):
+        async with semaphore:
+            result = await apply_on_agent(host, port, token, profile, dry_run, timeout)
+        result["address"] = f"{host}:{port}"
+        result.setdefault("node", result["address"])
+        return result
+
+    return await asyncio.gather(*(one(host, port) for host, port in agents))
+
+def fleet_apply(addresses, token, profile, dry_run=False, concurrency=16, timeout=10.0):
+    if concurrency < 1:
+        raise ValueError("Concurrency must be at least 1")
+    return asyncio.run(fleet_apply_async(addresses, token, profile, dry_run, concurrency, timeout))
+
+def _change_order(item):
+    # Global writes first (they are applied first), then cores by id
+    core_id = item[0]
+    return (1, int(core_id)) if core_id.isdigit() else (0, 0)
+
+def format_results(results):
+    """Human-readable per-node, per-core report lines"""
+    lines = []
+    for result in results:
+        name = f"{result['node']} ({result['address']})" if result["node"] != result["address"] else result["address"]
+        if result["ok"]:
+            verb = "would change" if result.get("dry_run") else "applied"
+            count = sum(len(attributes) for attributes in result["changes"].values())
+            lines.append(f"{name}: ok, {verb} {count} setting(s)")
+        else:
+            lines.append(f"{name}: FAILED: {result['error']}")
+            if result.get("rolled_back"):
+                lines.append("  previous settings restored")
+        for core_id, attributes in sorted(result["changes"].items(), key=_change_order):
+            label = f"core {core_id}" if core_id.isdigit() else core_id
+            for attribute, (current, new) in attributes.items():
+                lines.append(f"  {label}: {attribute} {current} -> {new}")
+    return lines
@@ -0,0 +1,162 @@
+import json
+from .profiles import ProfileStore, parse_core_spec
+
+class Policy:
+    """
+    Load-based tuning rules, read from YAML (when PyYAML is installed) or JSON:
+
+        groups: package          # "all", a topology level, or {label: "0-7", ...}
+        cooldown: 10             # seconds a group keeps its settings after a switch
+        rules:
+          - name: busy
+            above: 70            # group utilisation, percent
+            for: 5               # seconds the condition must hold
+            set: {governor: performance, epp: performance}
+          - name: idle
+            below: 10
+            for: 60
+            set: {governor: powersave, epp: power}
+
+    A rule's "set" takes the settings of a profile entry (governor, epp,
+    min_freq, max_freq, boost). When several rules hold, the first one wins.
+    """
+    DEFAULT_COOLDOWN = 10.0
+
+    def __init__(self, rules, groups="all", cooldown=DEFAULT_COOLDOWN):
+        self.rules = rules
+        self.groups = groups
+        self.cooldown = cooldown
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r') as f:
+            text = f.read()
+        try:
+            document = json.loads(text)
+        except ValueError:
+            try:
+                import yaml
+            except ImportError:
+                raise ValueError(f"{path}: not JSON, and reading YAML needs PyYAML (pip install pyyaml)")
+            try:
+                document = yaml.safe_load(text)
+            except yaml.YAMLError as e:
+                raise ValueError(f"{path}: {e}")
+        return cls.parse(document, path)
+
+    @classmethod
+    def parse(cls, document, source="policy"):
+        if not isinstance(document, dict) or not isinstance(document.get("rules"), list) or not document["rules"]:
+            raise ValueError(f"{source}: expected an object with a non-empty list of rules")
+        unknown = set(document) - {"groups", "cooldown", "rules"}
+        if unknown:
+            raise ValueError(f"{source}: unknown keys {', '.join(sorted(unknown))}")
+        groups = document.get("groups", "all")
+        if not isinstance(groups, (str, dict)):
+            raise ValueError(f"{source}: groups must be 'all', a topology level or {{label: cores}}")
+        cooldown = document.get("cooldown", cls.DEFAULT_COOLDOWN)
+        if not isinstance(cooldown, (int, float)) or cooldown < 0:
+            raise ValueError(f"{source}: cooldown must be a non-negative number of seconds")
+        return cls([cls.parse_rule(index, rule, source) for index, rule in enumerate(document["rules"])],
+                   groups, cooldown)
+
+    @staticmethod
+    def parse_rule(index, rule, source):
+        if not isinstance(rule, dict):
+            raise ValueError(f"{source}: rule {index + 1} must be an object")
+        name = str(rule.get("name", f"rule {index + 1}"))
+        unknown = set(rule) - {"name", "above", "below", "for", "set"}
+        if unknown:
+            raise ValueError(f"{source}: rule '{name}': unknown keys {', '.join(sorted(unknown))}")
+        conditions = [key for key in ("above", "below") if key in rule]
+        if len(conditions) != 1:
+            raise ValueError(f"{source}: rule '{name}' needs exactly one of above/below")
+        threshold = rule[conditions[0]]
+        duration = rule.get("for", 0)
+        if not isinstance(threshold, (int, float)) or not 0 <= threshold <= 100:
+            raise ValueError(f"{source}: rule '{name}': {conditions[0]} must be a percentage")
+        if not isinstance(duration, (int, float)) or duration < 0:
+            raise ValueError(f"{source}: rule '{name}': for must be a non-negative number of seconds")
+        settings = rule.get("set")
+        if not isinstance(settings, dict) or not settings or "cores" in settings:
+            raise ValueError(f"{source}: rule '{name}': set must be an object of settings (without cores)")
+        ProfileStore.validate(name, settings)
+        return {"name": name, "above": conditions[0] == "above", "threshold": float(threshold),
+                "for": float(duration), "set": settings}
+
+    def resolve_groups(self, manager):
+        """[(label, [core_ids])] of the online cores"""
+        if self.groups == "all":
+            return [("all", list(manager.cores))]
+        if isinstance(self.groups, dict):
+            groups = [(str(label), parse_core_spec(spec, manager.cores)) for label, spec in self.groups.items()]
+            return [(label, cores) for label, cores in groups if cores]
+        return manager.core_groups(self.groups)
+
+class PolicyEngine:
+    """
+    Evaluates a Policy per core group on each utilisation sample.
+
+    Hysteresis comes from three places: a rule only fires once its condition
+    has held for its whole "for" duration, a group that switched is left
+    alone for the policy's cooldown, and the rule a group is already in is
+    never re-applied while it still holds.
+    """
+    def __init__(self, policy, groups):
+        self.policy = policy
+        self.state = {}  # label -> {"since": {rule index: clock}, "active": index, "switched": clock}
+        self.set_groups(groups)
+
+    def set_groups(self, groups):
+        """Adopt a new grouping (e.g. after hotplug); groups that remain keep their state"""
+        self.groups = [(label, tuple(cores)) for label, cores in groups]
+        self.state = {
+            label: self.state.get(label, {"since": {}, "active": None, "switched": None})
+            for label, _ in self.groups
+        }
+
+    def group_of(self, core_id):
+        return next((label for label, cores in self.groups if core_id in cores), None)
+
+    def loads(self, utilization):
+        """{label: mean utilisation} for groups with at least one sampled core"""
+        loads = {}
+        for label, cores in self.groups:
+            values = [utilization[core_id] for core_id in cores if core_id in utilization]
+            if values:
+                loads[label] = sum(values) / len(values)
+        return loads
+
+    def evaluate(self, utilization, now):
+        """[(label, cores, rule index, load)] for groups that should switch now"""
+        rules = self.policy.rules
+        switches = []
+        loads = self.loads(utilization)
+        for label, cores in self.groups:
+            if label not in loads:
+                continue
+            load = loads[label]
+            state = self.state[label]
+            since = state["since"]
+            for index, rule in enumerate(rules):
+                if (load > rule["threshold"]) if rule["above"] else (load < rule["threshold"]):
+                    since.setdefault(index, now)
+                else:
+                    since.pop(index, None)
+            if state["switched"] is not None and now - state["switched"] < self.policy.cooldown:
+                continue
+            held = next((index for index, rule in enumerate(rules)
+                         if index in since and now - since[index] >= rule["for"]), None)
+            if held is not None and held != state["active"]:
+                switches.append((label, cores, held, load))
+        return switches
+
+    def switched(self, label, index, now):
+        state = self.state[label]
+        state["active"] = index
+        state["switched"] = now
+
+    def release(self, label):
+        """Forget the group's active rule (its settings were changed elsewhere)"""
+        if label in self.state:
+            self.state[label]["active"] = None
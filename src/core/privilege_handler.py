@@ -1,20 +1,32 @@
 import subprocess
 import sys
 import os
+import json
 from ..utils.file_handler import FileHandler
 
+# Lightweight entry point that only imports what apply_settings needs.
+# Re-executing cpu_monitor.py instead would pull in PyQt6 and psutil on every write.
+APPLY_SCRIPT = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "cpu_apply.py"
+)
+
 class PrivilegeHandler:
     @staticmethod
-    def set_governor_and_freq(core_id, governor=None, max_freq=None, epp=None):
-        script_path = os.path.abspath(sys.argv[0])
-        cmd = ['sudo', sys.executable, script_path]
+    def set_governor_and_freq(core_id, governor=None, max_freq=None, epp=None, min_freq=None, setspeed=None):
+        # -S skips site-packages initialisation; the helper only needs the stdlib
+        cmd = ['sudo', sys.executable, '-S', APPLY_SCRIPT]
         
         if core_id is not None:
             cmd.extend(['--core', str(core_id)])
         if governor is not None:
             cmd.extend(['--governor', governor])
+        if min_freq is not None:
+            cmd.extend(['--min-freq', str(min_freq)])
         if max_freq is not None:
             cmd.extend(['--max-freq', str(max_freq)])
+        if setspeed is not None:
+            cmd.extend(['--setspeed', str(setspeed)])
         if epp is not None:
             cmd.extend(['--epp', epp])
             
@@ -26,14 +38,76 @@ class PrivilegeHandler:
             return False
 
     @staticmethod
-    def apply_settings(core_id, max_freq=None, governor=None, epp=None):
-        governor_path = f"/sys/devices/system/cpu/cpu{core_id}/cpufreq/scaling_governor"
-        freq_path = f"/sys/devices/system/cpu/cpu{core_id}/cpufreq/cpufreq_set_freq"
-        epp_path = f"/sys/devices/system/cpu/cpu{core_id}/cpufreq/energy_performance_preference"
+    def apply_batch(writes):
+        """
+        Apply a list of (path, value) writes in order with a single privilege escalation.
+
+        Returns one result dict per attempted write ({"path", "ok", "error"});
+        writing stops at the first failure so callers can roll back.
+        """
+        writes = [(path, str(value)) for path, value in writes]
+        if not writes:
+            return []
+        if os.geteuid() == 0:
+            return PrivilegeHandler.write_batch(writes)
 
+        cmd = ['sudo', sys.executable, '-S', APPLY_SCRIPT, '--batch']
+        # The helper exits non-zero on a failed write but still reports per-write results
+        result = subprocess.run(cmd, input=json.dumps(writes), capture_output=True, text=True)
+        try:
+            return json.loads(result.stdout)
+        except ValueError:
+            error = result.stderr.strip() or f"exit status {result.returncode}"
+            print(f"Error executing privileged batch: {error}")
+            return [{"path": writes[0][0], "ok": False, "error": error}]
+
+    @staticmethod
+    def write_batch(writes):
+        """Perform batched writes in-process; only cpu sysfs attributes are accepted"""
+        allowed_root = os.path.realpath(FileHandler.CPU_ROOT) + os.sep
+        results = []
+        for path, value in writes:
+            if not os.path.realpath(path).startswith(allowed_root):
+                results.append({"path": path, "ok": False, "error": "path outside cpu sysfs"})
+                break
+            try:
+                with open(path, 'w') as f:
+                    f.write(str(value))
+                results.append({"path": path, "ok": True, "error": None})
+            except OSError as e:
+                results.append({"path": path, "ok": False, "error": str(e)})
+                break
+        return results
+
+    @staticmethod
+    def apply_settings(core_id, max_freq=None, governor=None, epp=None, min_freq=None, setspeed=None):
+        # Legacy callers pass the userspace target speed as max_freq
+        if governor == "userspace" and max_freq and setspeed is None:
+            setspeed, max_freq = max_freq, None
+
+        writes = []
         if governor:
-            FileHandler.write_file(governor_path, governor)
-        if governor == "userspace" and max_freq:
-            FileHandler.write_file(freq_path, max_freq)
+            writes.append(("scaling_governor", governor))
+        limits = []
+        if min_freq:
+            limits.append(("scaling_min_freq", min_freq))
+        if max_freq:
+            limits.append(("scaling_max_freq", max_freq))
+        if min_freq and max_freq:
+            current_max = FileHandler.read_file(
+                f"/sys/devices/system/cpu/cpu{core_id}/cpufreq/scaling_max_freq", suppress_warnings=True)
+            # Raising min above the current max is rejected unless max moves first
+            if current_max.isdigit() and int(min_freq) > int(current_max):
+                limits.reverse()
+        writes.extend(limits)
+        if setspeed:
+            # scaling_setspeed is only writable while the userspace governor is active
+            writes.append(("scaling_setspeed", setspeed))
         if epp:
-            FileHandler.write_file(epp_path, epp) 
\ No newline at end of file
+            writes.append(("energy_performance_preference", epp))
+
+        success = True
+        for attribute, value in writes:
+            path = f"/sys/devices/system/cpu/cpu{core_id}/cpufreq/{attribute}"
+            success &= FileHandler.write_file(path, value)
+        return success
@@ -0,0 +1,103 @@
+import os
+import json
+
+DEFAULT_PROFILES_PATH = os.path.expanduser("~/.config/cpu_monitor/profiles.json")
+
+# Profile keys and the cpufreq attribute each one writes
+PROFILE_ATTRIBUTES = {
+    "governor": "scaling_governor",
+    "epp": "energy_performance_preference",
+    "min_freq": "scaling_min_freq",
+    "max_freq": "scaling_max_freq",
+}
+
+def parse_core_spec(spec, available_cores):
+    """Parse 'all', '3', '0-7,16-23' or a list of ids into a sorted list of available cores"""
+    available = set(available_cores)
+    if spec in (None, "all"):
+        return sorted(available)
+    if isinstance(spec, int):
+        parts = [str(spec)]
+    elif isinstance(spec, (list, tuple)):
+        parts = [str(part) for part in spec]
+    else:
+        parts = str(spec).split(",")
+
+    cores = set()
+    for part in parts:
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            start, end = part.split("-", 1)
+            cores.update(range(int(start), int(end) + 1))
+        else:
+            cores.add(int(part))
+    return sorted(cores & available)
+
+class ProfileStore:
+    """
+    Named tuning profiles stored as JSON.
+
+    Each profile is a list of entries (or a single entry) of the form
+    {"cores": "0-7", "governor": "performance", "epp": "performance",
+     "min_freq": 1800000, "max_freq": 4000000}; later entries win for
+    cores that appear in several. The system-wide "boost": true/false can
+    appear in any entry.
+    """
+    def __init__(self, path=None):
+        self.path = path or DEFAULT_PROFILES_PATH
+        self.profiles = {}
+        # An explicitly requested file must exist; the default one is optional
+        if path is not None or os.path.exists(self.path):
+            self.load()
+
+    def load(self):
+        with open(self.path, 'r') as f:
+            profiles = json.load(f)
+        if not isinstance(profiles, dict):
+            raise ValueError(f"{self.path}: expected an object mapping profile names to settings")
+        for name, entries in profiles.items():
+            self.validate(name, entries)
+        self.profiles = profiles
+        return self.profiles
+
+    @staticmethod
+    def validate(name, entries):
+        for entry in entries if isinstance(entries, list) else [entries]:
+            if not isinstance(entry, dict):
+                raise ValueError(f"Profile '{name}': entries must be objects")
+            unknown = set(entry) - set(PROFILE_ATTRIBUTES) - {"cores", "boost"}
+            if unknown:
+                raise ValueError(f"Profile '{name}': unknown settings {', '.join(sorted(unknown))}")
+            if "boost" in entry and not isinstance(entry["boost"], bool):
+                raise ValueError(f"Profile '{name}': boost must be true or false")
+
+    def names(self):
+        return sorted(self.profiles)
+
+    def get(self, name):
+        if name not in self.profiles:
+            raise ValueError(f"Unknown profile '{name}' (known: {', '.join(self.names()) or 'none'})")
+        return self.profiles[name]
+
+    @staticmethod
+    def resolve(entries, available_cores):
+        """Expand a profile into {core_id: {attribute: value}}"""
+        settings = {}
+        for entry in entries if isinstance(entries, list) else [entries]:
+            for core_id in parse_core_spec(entry.get("cores", "all"), available_cores):
+                core_settings = settings.setdefault(core_id, {})
+                for key, attribute in PROFILE_ATTRIBUTES.items():
+                    if entry.get(key) is not None:
+                        core_settings[attribute] = str(entry[key])
+        return settings
+
+    @staticmethod
+    def boost(entries):
+        """The profile's system-wide boost setting, or None if it leaves boost alone"""
+        boost = None
+        for entry in entries if isinstance(entries, list) else [entries]:
+            if entry.get("boost") is not None:
+                boost = entry["boost"]
+        return boost
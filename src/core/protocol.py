@@ -0,0 +1,205 @@
+import os
+import hmac
+import errno
+import json
+import re
+import struct
+import hashlib
+from ..utils.file_handler import FileHandler
+
+# Agent wire format: every frame is a 4-byte big-endian length followed by
+# compact JSON. After a "hello" frame the agent sends one full snapshot and
+# then only what changed from the previous sample (see snapshot_delta).
+PROTOCOL_VERSION = 1
+FRAME_HEADER = struct.Struct(">I")
+MAX_FRAME = 16 << 20
+
+def load_token(path=None):
+    """Shared agent secret from a file, or from CPU_MONITOR_AGENT_TOKEN; raises ValueError if empty"""
+    if path:
+        with open(path, 'r') as f:
+            token = f.read().strip()
+    else:
+        token = os.environ.get("CPU_MONITOR_AGENT_TOKEN", "").strip()
+    if not token:
+        raise ValueError("No agent token: use --token-file or set CPU_MONITOR_AGENT_TOKEN")
+    return token
+
+def request_mac(token, nonce, counter, request):
+    """
+    HMAC-SHA256 over the connection nonce, a per-connection counter and the
+    request, so a captured request cannot be replayed on any connection.
+    """
+    payload = json.dumps([nonce, counter, request], sort_keys=True, separators=(",", ":")).encode()
+    return hmac.new(token.encode(), payload, hashlib.sha256).hexdigest()
+
+def encode_frame(message):
+    data = json.dumps(message, separators=(",", ":")).encode()
+    if len(data) > MAX_FRAME:
+        raise ValueError(f"Frame of {len(data)} bytes exceeds the {MAX_FRAME} byte limit")
+    return FRAME_HEADER.pack(len(data)) + data
+
+async def read_frame(reader):
+    """Next message from an asyncio StreamReader; raises IncompleteReadError at EOF"""
+    header = await reader.readexactly(FRAME_HEADER.size)
+    (length,) = FRAME_HEADER.unpack(header)
+    if length > MAX_FRAME:
+        raise ValueError(f"Frame of {length} bytes exceeds the {MAX_FRAME} byte limit")
+    return json.loads(await reader.readexactly(length))
+
+def recv_frame(sock):
+    """Next message from a blocking socket; raises ConnectionError at EOF"""
+    header = _recv_exactly(sock, FRAME_HEADER.size)
+    (length,) = FRAME_HEADER.unpack(header)
+    if length > MAX_FRAME:
+        raise ValueError(f"Frame of {length} bytes exceeds the {MAX_FRAME} byte limit")
+    return json.loads(_recv_exactly(sock, length))
+
+def _recv_exactly(sock, size):
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("Connection closed by agent")
+        data += chunk
+    return bytes(data)
+
+def _wire_roots():
+    return (("cpu", FileHandler.CPU_ROOT), ("class", FileHandler.CLASS_ROOT), ("devices", FileHandler.DEVICES_ROOT))
+
+# The only files outside sysfs a remote backend may read
+_WIRE_FILES = {"proc:stat": lambda: FileHandler.PROC_STAT, "proc:cpuinfo": lambda: "/proc/cpuinfo"}
+
+def to_wire_path(path):
+    """
+    A local sysfs path relative to its FileHandler root, e.g.
+    "cpu:/cpu0/cpufreq/scaling_governor", so that nodes (and recordings)
+    with a different CPU_MONITOR_SYSFS_ROOT agree on names. Raises
+    ValueError for anything else.
+    """
+    for name, local in _WIRE_FILES.items():
+        if path == local():
+            return name
+    for name, root in _wire_roots():
+        if path == root or path.startswith(root + "/"):
+            return f"{name}:{path[len(root):]}"
+    raise ValueError(f"'{path}' is not under a sysfs root")
+
+def from_wire_path(name):
+    """The local path for a to_wire_path name; raises ValueError for anything outside the roots"""
+    if name in _WIRE_FILES:
+        return _WIRE_FILES[name]()
+    prefix, sep, relative = str(name).partition(":")
+    roots = dict(_wire_roots())
+    if not sep or prefix not in roots or (relative and not relative.startswith("/")) or "/.." in relative:
+        raise ValueError(f"Invalid path '{name}'")
+    return roots[prefix] + relative
+
+# What a RemoteBackend reads (cpufreq, cpuidle, topology, thermal, hwmon and
+# the online/present lists), as patterns over wire paths. Nothing else under
+# the sysfs roots is served, however harmless the root looks.
+_READABLE = [re.compile(pattern) for pattern in (
+    r"cpu:",
+    r"cpu:/(online|present|possible)",
+    r"cpu:/cpufreq(/boost|/policy\d+(/\w+)?)?",
+    r"cpu:/(intel_pstate|amd_pstate)(/\w+)?",
+    r"cpu:/cpu\d+(/cpu_capacity|/(cpufreq|topology|thermal_throttle)(/\w+)?|/cpuidle(/state\d+(/\w+)?)?)?",
+    r"class:/thermal(/thermal_zone\d+(/(type|temp))?)?",
+    r"class:/hwmon(/hwmon\d+(/(name|temp\d+_(input|label)))?)?",
+    r"devices:/(cpu_core|cpu_atom)/cpus",
+    r"proc:(stat|cpuinfo)",
+)]
+
+def readable_wire_path(name):
+    """from_wire_path for remote reads, limited to the files a RemoteBackend needs"""
+    if not any(pattern.fullmatch(str(name)) for pattern in _READABLE):
+        raise ValueError(f"Path '{name}' is not served")
+    return from_wire_path(name)
+
+# What a RemoteBackend's batches may write: per-core cpufreq settings, boost,
+# the amd_pstate/intel_pstate globals CPUManager sets and C-state disables
+_WRITABLE = [re.compile(pattern) for pattern in (
+    r"cpu:/cpu\d+/cpufreq/(scaling_(governor|min_freq|max_freq|setspeed)|energy_performance_preference)",
+    r"cpu:/cpufreq/boost",
+    r"cpu:/intel_pstate/(no_turbo|status|min_perf_pct|max_perf_pct|hwp_dynamic_boost)",
+    r"cpu:/amd_pstate/status",
+    r"cpu:/cpu\d+/cpuidle/state\d+/disable",
+)]
+
+def writable_wire_path(name):
+    """from_wire_path for remote writes, limited to the settings CPUManager changes"""
+    if not any(pattern.fullmatch(str(name)) for pattern in _WRITABLE):
+        raise ValueError(f"Path '{name}' is not writable")
+    return from_wire_path(name)
+
+def encode_read(value):
+    """A read result for the wire: the contents, or {"errno", "error"} for the exception raised"""
+    if isinstance(value, str):
+        return value
+    return {"errno": getattr(value, "errno", None) or errno.EIO, "error": getattr(value, "strerror", None) or str(value)}
+
+def decode_read(value):
+    """Contents, or the OSError (FileNotFoundError, PermissionError, ...) encode_read described"""
+    if isinstance(value, str):
+        return value
+    return OSError(value.get("errno") or errno.EIO, value.get("error") or "Remote read failed")
+
+def _changed(previous, current):
+    """Keys whose value changed or appeared; keys that disappeared map to None"""
+    changes = {key: value for key, value in current.items() if previous.get(key) != value}
+    changes.update({key: None for key in previous if key not in current})
+    return changes
+
+def snapshot_delta(previous, current):
+    """
+    Encode a headless snapshot relative to the previous one.
+
+    Only changed per-core fields and temperatures are sent; removed cores
+    are listed, removed fields are sent as None. Events are per-interval
+    and always sent as they are. Without a previous snapshot the whole
+    snapshot is sent with full=True.
+    """
+    current = {**current, "cores": {str(core_id): values for core_id, values in current["cores"].items()}}
+    if previous is None:
+        return {**current, "full": True}
+    previous_cores = {str(core_id): values for core_id, values in previous["cores"].items()}
+    cores = {}
+    for core_id, values in current["cores"].items():
+        changes = _changed(previous_cores.get(core_id, {}), values)
+        if changes:
+            cores[core_id] = changes
+    return {
+        "full": False,
+        "time": current["time"],
+        "cores": cores,
+        "removed": [core_id for core_id in previous_cores if core_id not in current["cores"]],
+        "temperatures": _changed(previous["temperatures"], current["temperatures"]),
+        "events": current["events"],
+    }
+
+def apply_delta(previous, delta):
+    """Rebuild the snapshot a delta was encoded from; core ids come back as ints"""
+    if delta.get("full"):
+        snapshot = {key: value for key, value in delta.items() if key != "full"}
+        snapshot["cores"] = {int(core_id): dict(values) for core_id, values in delta["cores"].items()}
+        return snapshot
+    if previous is None:
+        raise ValueError("Delta frame received before a full snapshot")
+    cores = dict(previous["cores"])
+    for core_id in delta.get("removed", []):
+        cores.pop(int(core_id), None)
+    for core_id, changes in delta["cores"].items():
+        values = dict(cores.get(int(core_id), {}))
+        for key, value in changes.items():
+            if value is None:
+                values.pop(key, None)
+            else:
+                values[key] = value
+        cores[int(core_id)] = values
+    temperatures = dict(previous["temperatures"])
+    for sensor, value in delta["temperatures"].items():
+        if value is None:
+            temperatures.pop(sensor, None)
+        else:
+            temperatures[sensor] = value
+    return {**previous, "time": delta["time"], "cores": cores, "temperatures": temperatures, "events": delta["events"]}
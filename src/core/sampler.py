@@ -0,0 +1,287 @@
+import time
+from ..utils.file_handler import FileHandler
+
+class TieredSampler:
+    """
+    Schedules cpufreq attribute reads by how often the values actually change.
+
+    static: read once, refreshed when the cpufreq driver changes or cores are hot-plugged
+    slow:   governor, EPP, frequency caps and driver-reported rankings, refreshed
+            every slow_interval seconds or right after our own writes
+    fast:   current frequency, read on every request
+
+    Static and slow attributes are read in named groups, and a group is only
+    read once something asks for one of its attributes.
+    """
+    FAST_ATTRIBUTES = ("scaling_cur_freq",)
+    SLOW_ATTRIBUTES = ("scaling_governor",)
+    EPP_SLOW_ATTRIBUTES = ("energy_performance_preference",)
+    EPP_STATIC_ATTRIBUTES = (
+        "energy_performance_available_preferences",
+        "scaling_driver",
+    )
+    LIMIT_SLOW_ATTRIBUTES = ("scaling_min_freq", "scaling_max_freq")
+    LIMIT_STATIC_ATTRIBUTES = ("cpuinfo_min_freq", "cpuinfo_max_freq")
+    # Optional parameters, only reported when readable (as are all driver attributes)
+    OPTIONAL_STATIC_ATTRIBUTES = ("scaling_available_frequencies",)
+
+    def __init__(self, cores, epp_supported=False, slow_interval=3.0, clock=time.monotonic,
+                 driver_attributes=(), driver_slow_attributes=()):
+        self.slow_interval = slow_interval
+        self.clock = clock
+        self.values = {}
+        self._static_loaded = set()  # (core_id, group)
+        self._slow_deadline = {}  # (core_id, group) -> clock time
+        self.scaling_driver = None  # as last read from the first tracked core
+        self.cores = []
+        self._driver_deadline = 0.0
+        # Clock time of the last observed governor/EPP/limit change (ours or external)
+        self.last_change = None
+        self.configure(epp_supported, driver_attributes, driver_slow_attributes)
+        self.set_cores(cores)
+
+    def configure(self, epp_supported, driver_attributes=(), driver_slow_attributes=()):
+        """Set which attributes the active driver exposes (on start-up or after a driver switch)"""
+        self.epp_supported = epp_supported
+        self.driver_attributes = tuple(driver_attributes)
+        self.driver_slow_attributes = tuple(driver_slow_attributes)
+        self.slow_groups = {
+            "settings": self.SLOW_ATTRIBUTES + (self.EPP_SLOW_ATTRIBUTES if epp_supported else ()),
+            "limits": self.LIMIT_SLOW_ATTRIBUTES,
+            # Driver-reported values (e.g. preferred-core ranking), not user settings
+            "driver": self.driver_slow_attributes,
+        }
+        self.static_groups = {
+            "limits": self.LIMIT_STATIC_ATTRIBUTES + ("scaling_available_frequencies",),
+            # Driver-specific extras, all optional
+            "driver": self.driver_attributes,
+        }
+        if epp_supported:
+            self.static_groups["epp"] = self.EPP_STATIC_ATTRIBUTES
+        self._tiers = {}
+        for tier, groups in (("slow", self.slow_groups), ("static", self.static_groups)):
+            for group, attributes in groups.items():
+                for attribute in attributes:
+                    self._tiers[attribute] = (tier, group)
+        self.invalidate(static=True)
+
+    def set_cores(self, cores):
+        """Track a new core set; state for cores that went away is dropped"""
+        cores = sorted(cores)
+        for core_id in list(self.values):
+            if core_id not in cores:
+                self.values.pop(core_id)
+                self.invalidate(core_id, static=True)
+        for core_id in cores:
+            self.values.setdefault(core_id, {})
+        self.cores = cores
+
+    def invalidate(self, core_id=None, static=False):
+        """Force the slow (and optionally static) tier to be re-read on next access"""
+        for key in list(self._slow_deadline):
+            if core_id is None or key[0] == core_id:
+                del self._slow_deadline[key]
+        if static:
+            self._static_loaded = {
+                key for key in self._static_loaded if core_id is not None and key[0] != core_id
+            }
+
+    def _read(self, core_id, attribute, suppress_warnings=False):
+        value = FileHandler.read_file(FileHandler.cpufreq_path(core_id, attribute), suppress_warnings)
+        self.values[core_id][attribute] = value
+        return value
+
+    def _check_driver(self, now):
+        # A single global read per slow interval is enough to notice a driver switch
+        if now < self._driver_deadline:
+            return
+        self._driver_deadline = now + self.slow_interval
+        # cpu0 is not guaranteed to be online, so ask the first core we track
+        core_id = self.cores[0] if self.cores else 0
+        driver = FileHandler.read_file(FileHandler.cpufreq_path(core_id, "scaling_driver"), suppress_warnings=True)
+        if self.scaling_driver is not None and driver != self.scaling_driver:
+            self.invalidate(static=True)
+        self.scaling_driver = driver
+
+    def _refresh_static(self, core_id, group):
+        if (core_id, group) in self._static_loaded:
+            return
+        for attribute in self.static_groups[group]:
+            optional = group == "driver" or attribute in self.OPTIONAL_STATIC_ATTRIBUTES
+            self._read(core_id, attribute, suppress_warnings=optional)
+        self._static_loaded.add((core_id, group))
+
+    def _refresh_slow(self, core_id, group, now):
+        if now < self._slow_deadline.get((core_id, group), 0.0):
+            return
+        values = self.values[core_id]
+        optional = group == "driver"
+        for attribute in self.slow_groups[group]:
+            previous = values.get(attribute)
+            if self._read(core_id, attribute, optional) != previous and previous is not None \
+                    and not optional:
+                self.last_change = now
+        self._slow_deadline[(core_id, group)] = now + self.slow_interval
+
+    def seed(self, core_id, values):
+        """
+        Take attribute values read elsewhere (e.g. a published snapshot). Slow
+        groups that are fully covered are not read from sysfs again until
+        their next slow interval.
+        """
+        self._ensure_core(core_id)
+        now = self.clock()
+        cached = self.values[core_id]
+        for group, attributes in self.slow_groups.items():
+            if not attributes or not all(attribute in values for attribute in attributes):
+                continue
+            if group != "driver" and any(
+                cached.get(attribute) not in (None, values[attribute]) for attribute in attributes
+            ):
+                self.last_change = now
+            self._slow_deadline[(core_id, group)] = now + self.slow_interval
+        cached.update(values)
+
+    def _ensure_core(self, core_id):
+        if core_id not in self.values:
+            self.set_cores(list(self.values) + [core_id])
+
+    def get(self, core_id, attribute):
+        """Return an attribute, reading sysfs only when its tier is due"""
+        self._ensure_core(core_id)
+        if attribute in self.FAST_ATTRIBUTES or attribute not in self._tiers:
+            return self._read(core_id, attribute)
+        now = self.clock()
+        self._check_driver(now)
+        tier, group = self._tiers[attribute]
+        if tier == "slow":
+            self._refresh_slow(core_id, group, now)
+        else:
+            self._refresh_static(core_id, group)
+        return self.values[core_id].get(attribute, "N/A")
+
+    def get_group(self, core_id, slow_group=None, static_group=None):
+        """Refresh the given groups if due and return the core's cached values"""
+        self._ensure_core(core_id)
+        now = self.clock()
+        self._check_driver(now)
+        if static_group in self.static_groups:
+            self._refresh_static(core_id, static_group)
+        if slow_group in self.slow_groups:
+            self._refresh_slow(core_id, slow_group, now)
+        return self.values[core_id]
+
+    def get_epp_params(self, core_id):
+        """EPP preference, available preferences and scaling driver"""
+        if not self.epp_supported:
+            return {}
+        values = self.get_group(core_id, "settings", "epp")
+        return {
+            attribute: values.get(attribute, "N/A")
+            for attribute in self.EPP_SLOW_ATTRIBUTES + self.EPP_STATIC_ATTRIBUTES
+        }
+
+    def get_driver_params(self, core_id):
+        """EPP parameters plus whichever driver-specific attributes the core exposes"""
+        params = self.get_epp_params(core_id)
+        values = self.get_group(core_id, "driver", "driver")
+        for attribute in self.driver_attributes + self.driver_slow_attributes:
+            if values.get(attribute, "N/A") != "N/A":
+                params[attribute] = values[attribute]
+        return params
+
+    def get_freq_limits(self, core_id):
+        """Hardware bounds, current caps and (if exposed) the discrete frequency table"""
+        values = self.get_group(core_id, "limits", "limits")
+        return {
+            attribute: values.get(attribute, "N/A")
+            for attribute in self.LIMIT_STATIC_ATTRIBUTES + self.LIMIT_SLOW_ATTRIBUTES
+            + ("scaling_available_frequencies",)
+        }
+
+    def cached_frequencies(self):
+        """Last frequency read per core, without touching sysfs"""
+        return [values.get("scaling_cur_freq", "N/A") for values in self.values.values()]
+
+class AdaptiveInterval:
+    """
+    Picks the next refresh interval from how much core frequencies moved.
+
+    Sampling backs off geometrically while frequencies are stable and drops
+    straight to min_interval when any core moves by more than threshold, or
+    for boost_window seconds after a governor/EPP change.
+    """
+    def __init__(self, min_interval=0.1, max_interval=5.0, threshold=0.05,
+                 backoff=1.5, boost_window=5.0, clock=time.monotonic):
+        if min_interval <= 0 or max_interval < min_interval:
+            raise ValueError("Adaptive interval bounds must satisfy 0 < min <= max")
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.threshold = threshold
+        self.backoff = backoff
+        self.boost_window = boost_window
+        self.clock = clock
+        self.interval = min_interval
+        self._previous = None
+
+    def set_bounds(self, min_interval, max_interval):
+        if min_interval <= 0 or max_interval < min_interval:
+            raise ValueError("Adaptive interval bounds must satisfy 0 < min <= max")
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min(max(self.interval, min_interval), max_interval)
+
+    @staticmethod
+    def volatility(previous, current):
+        """Largest relative frequency change across cores"""
+        largest = 0.0
+        for before, after in zip(previous, current):
+            if before and after is not None:
+                largest = max(largest, abs(after - before) / before)
+        return largest
+
+    def update(self, frequencies, last_change=None):
+        """Feed the latest frequency readings and return the next interval in seconds"""
+        current = [int(freq) if str(freq).isdigit() else None for freq in frequencies]
+        previous, self._previous = self._previous, current
+
+        if last_change is not None and self.clock() - last_change < self.boost_window:
+            self.interval = self.min_interval
+        elif previous is not None and len(previous) == len(current) \
+                and self.volatility(previous, current) > self.threshold:
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.interval * self.backoff, self.max_interval)
+        return self.interval
+
+class SampleSchedule:
+    """
+    Fixed-rate ticks at start + k * interval, so sampling does not drift.
+
+    When the consumer falls behind, the ticks it missed are skipped (and
+    counted) rather than sampled back-to-back to catch up, so a slow
+    consumer always gets the latest state and nothing queues up.
+    """
+    def __init__(self, interval, clock=time.monotonic):
+        if interval <= 0:
+            raise ValueError("Interval must be positive")
+        self.interval = interval
+        self.clock = clock
+        self.start = clock()
+        self.tick = 0
+
+    def delay(self):
+        """Seconds until the current tick is due (0 when it already is)"""
+        return max(self.start + self.tick * self.interval - self.clock(), 0.0)
+
+    def advance(self):
+        """
+        Move on to the next tick, or, when the consumer fell behind, to the
+        latest tick that is already due, which is then sampled right away
+        instead of waiting for the next one. Returns how many ticks were
+        skipped.
+        """
+        latest = int((self.clock() - self.start) // self.interval)
+        skipped = max(latest - self.tick - 1, 0)
+        self.tick = max(self.tick + 1, latest)
+        return skipped
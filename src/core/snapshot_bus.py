@@ -0,0 +1,183 @@
+import os
+import json
+import mmap
+import stat
+import time
+import struct
+
+SHM_ROOT = "/dev/shm"
+DEFAULT_BUS = "cpu_monitor"
+
+# magic, sequence (odd while a write is in progress), payload length, publish time
+HEADER = struct.Struct("<8sQQd")
+SEQUENCE = struct.Struct("<Q")
+SEQUENCE_OFFSET = 8
+PAYLOAD_INFO = struct.Struct("<Qd")
+PAYLOAD_INFO_OFFSET = 16
+MAGIC = b"CPUMBUS1"
+
+def bus_path(name):
+    if not name or "/" in name or name.startswith("."):
+        raise ValueError(f"Invalid snapshot bus name '{name}'")
+    return os.path.join(SHM_ROOT, name)
+
+def _check_owner(fd, path, owners):
+    info = os.fstat(fd)
+    if not stat.S_ISREG(info.st_mode) or info.st_uid not in owners:
+        raise PermissionError(f"{path} is not a regular file owned by uid {' or '.join(map(str, sorted(owners)))}")
+    return info
+
+class SnapshotWriter:
+    """
+    Publishes snapshots into a seqlock-protected shared memory region.
+
+    Only one writer per bus. The sequence number is made odd before the
+    payload is touched and even again once it is complete, so readers can
+    detect (and retry) a copy that raced with a write.
+
+    /dev/shm is world-writable, so the region is always created afresh
+    (O_EXCL, never following a symlink); whatever was at the path before,
+    a previous publisher's region or something planted, is unlinked first.
+    """
+    # Readable by everyone: unprivileged frontends attach to a root publisher,
+    # and the O_EXCL create plus the readers' owner check keep it authentic
+    MODE = 0o644
+
+    def __init__(self, name=DEFAULT_BUS, capacity=1 << 20, clock=time.time):
+        self.path = bus_path(name)
+        self.capacity = capacity
+        self.clock = clock
+        fd = self._create()
+        try:
+            _check_owner(fd, self.path, {os.geteuid()})
+            os.fchmod(fd, self.MODE)
+            os.ftruncate(fd, HEADER.size + capacity)
+            self._map = mmap.mmap(fd, HEADER.size + capacity)
+        finally:
+            os.close(fd)
+        self._sequence = 0
+        HEADER.pack_into(self._map, 0, MAGIC, self._sequence, 0, 0.0)
+
+    def _create(self):
+        flags = os.O_RDWR | os.O_CREAT | os.O_EXCL | os.O_NOFOLLOW
+        try:
+            return os.open(self.path, flags, self.MODE)
+        except FileExistsError:
+            os.unlink(self.path)
+        # Raises FileExistsError if someone raced us to the path again
+        return os.open(self.path, flags, self.MODE)
+
+    def publish(self, snapshot):
+        data = json.dumps(snapshot, separators=(",", ":")).encode()
+        if len(data) > self.capacity:
+            raise ValueError(f"Snapshot of {len(data)} bytes does not fit the {self.capacity} byte bus")
+        SEQUENCE.pack_into(self._map, SEQUENCE_OFFSET, self._sequence + 1)
+        self._map[HEADER.size:HEADER.size + len(data)] = data
+        PAYLOAD_INFO.pack_into(self._map, PAYLOAD_INFO_OFFSET, len(data), self.clock())
+        # Even again only once payload and length are complete
+        self._sequence += 2
+        SEQUENCE.pack_into(self._map, SEQUENCE_OFFSET, self._sequence)
+
+    def close(self, unlink=True):
+        self._map.close()
+        if unlink:
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+
+class SnapshotReader:
+    """
+    Attaches to a snapshot bus read-only.
+
+    latest() costs one header read while nothing new was published and
+    returns the already-decoded snapshot; a new sequence number is copied
+    out once and decoded. Returns None if there is no publisher yet or the
+    last snapshot is older than stale_after seconds, so callers can fall
+    back to reading sysfs themselves.
+
+    Only regions owned by one of `owners` (default: root or ourselves) are
+    read, so another local user cannot feed us snapshots. A restarted
+    publisher creates a new region, which is picked up once the old one
+    goes quiet.
+    """
+    RETRIES = 100
+
+    def __init__(self, name=DEFAULT_BUS, stale_after=5.0, clock=time.time, owners=None):
+        self.path = bus_path(name)
+        self.stale_after = stale_after
+        self.clock = clock
+        self.owners = set(owners) if owners is not None else {0, os.geteuid()}
+        self.sequence = None
+        self.published = None
+        self.snapshot = None
+        self._map = None
+        self._inode = None
+
+    def _attach(self):
+        try:
+            fd = os.open(self.path, os.O_RDONLY | os.O_NOFOLLOW)
+        except OSError:
+            return False
+        try:
+            info = _check_owner(fd, self.path, self.owners)
+            if info.st_size < HEADER.size:
+                return False
+            self._map = mmap.mmap(fd, info.st_size, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return False
+        finally:
+            os.close(fd)
+        if HEADER.unpack_from(self._map, 0)[0] != MAGIC:
+            self.close()
+            return False
+        self._inode = (info.st_dev, info.st_ino)
+        self.sequence = None
+        return True
+
+    def _replaced(self):
+        try:
+            info = os.lstat(self.path)
+        except OSError:
+            return False
+        return (info.st_dev, info.st_ino) != self._inode
+
+    @staticmethod
+    def decode(data):
+        snapshot = json.loads(data)
+        # JSON object keys are strings; frontends index cores by int
+        snapshot["cores"] = {int(core_id): values for core_id, values in snapshot.get("cores", {}).items()}
+        return snapshot
+
+    def latest(self):
+        if self._map is None and not self._attach():
+            return None
+        for _ in range(self.RETRIES):
+            _, sequence, length, published = HEADER.unpack_from(self._map, 0)
+            if sequence == self.sequence or sequence == 0:
+                # Unchanged, or nothing published yet
+                break
+            if sequence % 2:
+                # A write is in progress
+                time.sleep(0)
+                continue
+            data = self._map[HEADER.size:HEADER.size + length]
+            if SEQUENCE.unpack_from(self._map, SEQUENCE_OFFSET)[0] != sequence:
+                continue
+            try:
+                self.snapshot = self.decode(data)
+            except ValueError:
+                continue
+            self.sequence, self.published = sequence, published
+            break
+        if self.snapshot is None or self.clock() - self.published > self.stale_after:
+            if self._replaced():
+                # A new publisher: attach to its region on the next call
+                self.close()
+            return None
+        return self.snapshot
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
@@ -0,0 +1,137 @@
+import time
+from ..utils.file_handler import FileHandler
+
+class ThermalMonitor:
+    """
+    Thermal throttle counters and temperature sensors.
+
+    core_throttle_count is read for every core on each sample. The package
+    counter is shared by all cores of a package, so it is read once per
+    package and reported as one event for the package (each of its cores is
+    still flagged in throttled). Thermal zones and hwmon temperature inputs
+    are discovered once and read on demand.
+    """
+    def __init__(self, cores, clock=time.time):
+        self.clock = clock
+        self.throttled = {}  # core_id -> ["core", "package"] for the last interval
+        self._counts = {}  # ("core", core_id) / ("package", package_id) -> count
+        self._frequencies = {}  # core_id -> frequency at the previous sample
+        self._sensors = None
+        self.set_cores(cores)
+
+    def set_cores(self, cores):
+        self.cores = list(cores)
+        self.packages = {}  # package_id -> first core, where the shared counter is read
+        self.core_package = {}
+        for core_id in self.cores:
+            package = FileHandler.read_file(
+                f"{FileHandler.CPU_ROOT}/cpu{core_id}/topology/physical_package_id", suppress_warnings=True
+            )
+            self.core_package[core_id] = package
+            self.packages.setdefault(package, core_id)
+        self.throttled = {core_id: kinds for core_id, kinds in self.throttled.items() if core_id in self.cores}
+        self.supported = bool(self.cores) and FileHandler.exists(
+            self.throttle_path(self.cores[0], "core_throttle_count")
+        )
+
+    @staticmethod
+    def throttle_path(core_id, attribute):
+        return f"{FileHandler.CPU_ROOT}/cpu{core_id}/thermal_throttle/{attribute}"
+
+    def _delta(self, key, path):
+        value = FileHandler.read_file(path, suppress_warnings=True)
+        if not value.isdigit():
+            return 0
+        previous = self._counts.get(key)
+        self._counts[key] = int(value)
+        return int(value) - previous if previous is not None else 0
+
+    def sample(self, frequencies=None):
+        """
+        Read throttle counters and return the events for this interval.
+
+        frequencies maps core ids to their current scaling_cur_freq; each
+        event records it next to the frequency at the previous sample, so a
+        drop can be told apart from a governor decision. Core events carry
+        the core's frequencies, package events ({"package", "cores"}) map
+        each core of the package to its frequencies.
+        """
+        frequencies = frequencies or {}
+        now = self.clock()
+        events = []
+        self.throttled = {}
+        for core_id in self.cores:
+            delta = self._delta(("core", core_id), self.throttle_path(core_id, "core_throttle_count"))
+            if delta > 0:
+                self.throttled[core_id] = ["core"]
+                events.append({
+                    "time": now,
+                    "core": core_id,
+                    "type": "core_throttle",
+                    "count_delta": delta,
+                    "package": self.core_package[core_id],
+                    "frequency": frequencies.get(core_id, "N/A"),
+                    "previous_frequency": self._frequencies.get(core_id, "N/A"),
+                })
+        for package, first_core in self.packages.items():
+            delta = self._delta(("package", package), self.throttle_path(first_core, "package_throttle_count"))
+            if delta <= 0:
+                continue
+            cores = [core_id for core_id in self.cores if self.core_package[core_id] == package]
+            for core_id in cores:
+                self.throttled.setdefault(core_id, []).append("package")
+            events.append({
+                "time": now,
+                "package": package,
+                "cores": cores,
+                "type": "package_throttle",
+                "count_delta": delta,
+                "frequency": {core_id: frequencies.get(core_id, "N/A") for core_id in cores},
+                "previous_frequency": {core_id: self._frequencies.get(core_id, "N/A") for core_id in cores},
+            })
+        self._frequencies = dict(frequencies)
+        return events
+
+    def _discover_sensors(self):
+        sensors = []
+        thermal_root = f"{FileHandler.CLASS_ROOT}/thermal"
+        for zone in sorted(self._listdir(thermal_root)):
+            if zone.startswith("thermal_zone"):
+                zone_type = FileHandler.read_file(f"{thermal_root}/{zone}/type", suppress_warnings=True)
+                sensors.append((f"{zone}/{zone_type}", f"{thermal_root}/{zone}/temp"))
+
+        hwmon_root = f"{FileHandler.CLASS_ROOT}/hwmon"
+        hwmon_sensors = []
+        for hwmon in sorted(self._listdir(hwmon_root)):
+            base = f"{hwmon_root}/{hwmon}"
+            name = FileHandler.read_file(f"{base}/name", suppress_warnings=True)
+            for entry in sorted(self._listdir(base)):
+                if entry.startswith("temp") and entry.endswith("_input"):
+                    sensor = entry[:-len("_input")]
+                    label = FileHandler.read_file(f"{base}/{sensor}_label", suppress_warnings=True)
+                    hwmon_sensors.append((hwmon, f"{name}/{label if label != 'N/A' else sensor}", f"{base}/{entry}"))
+        # Several devices of one driver (coretemp per socket, one nvme per drive) report the
+        # same name and label; those keys are qualified with their hwmon directory
+        keys = [key for _, key, _ in hwmon_sensors]
+        sensors += [
+            (f"{hwmon}/{key}" if keys.count(key) > 1 else key, path) for hwmon, key, path in hwmon_sensors
+        ]
+        return sensors
+
+    @staticmethod
+    def _listdir(path):
+        try:
+            return FileHandler.listdir(path)
+        except OSError:
+            return []
+
+    def temperatures(self):
+        """Current readings as {sensor: degrees C}; sensors are discovered on first use"""
+        if self._sensors is None:
+            self._sensors = self._discover_sensors()
+        readings = {}
+        for sensor, path in self._sensors:
+            value = FileHandler.read_file(path, suppress_warnings=True)
+            if value.lstrip("-").isdigit():
+                readings[sensor] = int(value) / 1000
+        return readings
@@ -0,0 +1,163 @@
+import os
+from ..utils.file_handler import FileHandler
+
+def parse_cpu_list(text):
+    """Parse a kernel CPU list such as '0-3,8,10-11' into a sorted list of ids"""
+    cores = set()
+    if text in (None, "", "N/A"):
+        return []
+    for part in text.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            start, end = part.split("-", 1)
+            cores.update(range(int(start), int(end) + 1))
+        else:
+            cores.add(int(part))
+    return sorted(cores)
+
+def read_core_sets():
+    """
+    (online, present) CPU ids from the kernel's CPU lists.
+
+    Falls back to 0..os.cpu_count()-1 where the lists are not exposed.
+    """
+    root = FileHandler.CPU_ROOT
+    online = parse_cpu_list(FileHandler.read_file(f"{root}/online", suppress_warnings=True))
+    if not online:
+        online = list(range(os.cpu_count() or 1))
+    present = parse_cpu_list(FileHandler.read_file(f"{root}/present", suppress_warnings=True))
+    return online, sorted(set(present) | set(online))
+
+class Topology:
+    """
+    Where each core sits: package, die, cluster, physical core (SMT siblings)
+    and, on hybrid CPUs, its core type.
+
+    Everything here is static, so it is read once per core. Core type comes
+    from the PMU device lists on Intel hybrid parts (cpu_core/cpu_atom) and
+    falls back to cpu_capacity (Arm big.LITTLE and friends).
+    """
+    LEVELS = ("package", "die", "cluster", "core", "type")
+    ATTRIBUTES = ("physical_package_id", "die_id", "cluster_id", "core_id", "thread_siblings_list")
+    HYBRID_TYPES = (("cpu_core", "P-core"), ("cpu_atom", "E-core"))
+
+    def __init__(self, cores):
+        self.cores = {}
+        self._hybrid = None
+        self.set_cores(cores)
+
+    def set_cores(self, cores):
+        cores = list(cores)
+        self.cores = {core_id: info for core_id, info in self.cores.items() if core_id in cores}
+        for core_id in cores:
+            if core_id not in self.cores:
+                self.cores[core_id] = self._read(core_id)
+
+    def _hybrid_types(self):
+        if self._hybrid is None:
+            self._hybrid = {}
+            for device, core_type in self.HYBRID_TYPES:
+                cpus = FileHandler.read_file(f"{FileHandler.DEVICES_ROOT}/{device}/cpus", suppress_warnings=True)
+                for core_id in parse_cpu_list(cpus):
+                    self._hybrid[core_id] = core_type
+        return self._hybrid
+
+    @staticmethod
+    def paths(core_id):
+        """{attribute: sysfs path} of the static per-core topology attributes"""
+        base = f"{FileHandler.CPU_ROOT}/cpu{core_id}"
+        paths = {attribute: f"{base}/topology/{attribute}" for attribute in Topology.ATTRIBUTES}
+        paths["cpu_capacity"] = f"{base}/cpu_capacity"
+        return paths
+
+    def _read(self, core_id):
+        paths = self.paths(core_id)
+        values = FileHandler.read_files(paths.values())
+        return self.describe(core_id, {attribute: values[path] for attribute, path in paths.items()})
+
+    def describe(self, core_id, info):
+        """Complete raw attributes read from paths() with the core type"""
+        core_type = self._hybrid_types().get(core_id)
+        if core_type is None and info["cpu_capacity"] != "N/A":
+            core_type = f"capacity {info['cpu_capacity']}"
+        info["core_type"] = core_type or "N/A"
+        return info
+
+    def group_key(self, core_id, level):
+        """Sortable key and label of the core's group at the given level"""
+        info = self.cores[core_id]
+        package = info["physical_package_id"]
+        if level == "package":
+            parts = (("package", package),)
+        elif level == "die":
+            parts = (("package", package), ("die", info["die_id"]))
+        elif level == "cluster":
+            parts = (("package", package), ("cluster", info["cluster_id"]))
+        elif level == "core":
+            parts = (("package", package), ("core", info["core_id"]))
+        elif level == "type":
+            # P-cores before E-cores, then higher capacity first
+            core_type = info["core_type"]
+            hybrid = [name for _, name in self.HYBRID_TYPES]
+            if core_type in hybrid:
+                return (0, hybrid.index(core_type)), core_type
+            if info["cpu_capacity"].isdigit():
+                return (1, -int(info["cpu_capacity"])), core_type
+            return (2, 0), core_type
+        else:
+            raise ValueError(f"Unknown topology level '{level}' (known: {', '.join(self.LEVELS)})")
+        # Numeric ids sort numerically, anything unreadable sorts last
+        key = tuple((0, int(value)) if value.lstrip("-").isdigit() else (1, value) for _, value in parts)
+        return key, " ".join(f"{name} {value}" for name, value in parts)
+
+    def groups(self, level, cores=None):
+        """[(label, [core_ids])] at the given level, in topology order"""
+        groups = {}
+        for core_id in self.cores if cores is None else cores:
+            key, label = self.group_key(core_id, level)
+            groups.setdefault((key, label), []).append(core_id)
+        return [(label, sorted(members)) for (key, label), members in sorted(groups.items())]
+
+    def siblings(self, core_id):
+        """SMT siblings of the core (including itself)"""
+        return parse_cpu_list(self.cores[core_id]["thread_siblings_list"]) or [core_id]
+
+class CPUUtilization:
+    """
+    Per-core utilisation from /proc/stat deltas.
+
+    /proc/stat is read once per sample for all cores; busy time is every
+    jiffy counter except idle and iowait.
+    """
+    def __init__(self):
+        self._previous = {}
+        self.percent = {}  # core_id -> busy percent over the last interval
+
+    @staticmethod
+    def read_counters():
+        counters = {}
+        try:
+            for line in FileHandler.backend.read(FileHandler.PROC_STAT).splitlines():
+                if not line.startswith("cpu") or line.startswith("cpu "):
+                    continue
+                fields = line.split()
+                values = [int(value) for value in fields[1:9]]
+                idle = values[3] + values[4]
+                counters[int(fields[0][3:])] = (sum(values) - idle, sum(values))
+        except (OSError, ValueError):
+            pass
+        return counters
+
+    def sample(self):
+        counters = self.read_counters()
+        percent = {}
+        for core_id, (busy, total) in counters.items():
+            if core_id in self._previous:
+                previous_busy, previous_total = self._previous[core_id]
+                elapsed = total - previous_total
+                percent[core_id] = (busy - previous_busy) / elapsed * 100 if elapsed > 0 else 0.0
+        self._previous = counters
+        self.percent = percent
+        return percent
@@ -0,0 +1,29 @@
+class WriteCoalescer:
+    """
+    Pending sysfs writes keyed by (core, attribute).
+
+    Only the latest value submitted for a key survives until the queue is
+    drained, so rapid successive changes collapse into a single write.
+    """
+    def __init__(self):
+        self.pending = {}
+
+    def __len__(self):
+        return len(self.pending)
+
+    def submit(self, core_id, attribute, value):
+        self.pending[(core_id, attribute)] = str(value)
+
+    def submit_settings(self, settings):
+        """Queue {core_id: {attribute: value}} in one go (e.g. a resolved profile)"""
+        for core_id, core_settings in settings.items():
+            for attribute, value in core_settings.items():
+                self.submit(core_id, attribute, value)
+
+    def take(self):
+        """Return pending writes as {core_id: {attribute: value}} and clear the queue"""
+        settings = {}
+        for (core_id, attribute), value in self.pending.items():
+            settings.setdefault(core_id, {})[attribute] = value
+        self.pending = {}
+        return settings
@@ -0,0 +1,236 @@
+import sys
+import hmac
+import errno
+import socket
+import asyncio
+import secrets
+from concurrent.futures import ThreadPoolExecutor
+from .monitor import HeadlessMonitor
+from .exporter import parse_address
+from ..core.profiles import ProfileStore
+from ..core.protocol import (
+    PROTOCOL_VERSION, encode_frame, read_frame, snapshot_delta, request_mac, readable_wire_path,
+    writable_wire_path, encode_read
+)
+from ..utils.file_handler import FileHandler
+
+class Agent(HeadlessMonitor):
+    """
+    Streams headless snapshots to aggregators over TCP.
+
+    Each sample is delta-encoded once against the previous one and the same
+    frame goes to every client. A client that connects gets the latest full
+    snapshot first; one that cannot keep up is disconnected and picks up a
+    full snapshot again when it reconnects.
+
+    With a token, clients may also send "apply" requests: a profile (list of
+    entries such as {"cores": "0-7", "governor": "performance"}) applied as
+    one transaction, or diffed against the current state with dry_run, or
+    raw batched writes from a RemoteBackend; and "fs" requests, batched
+    read/exists/listdir of the cpufreq, cpuidle, topology and sensor files a
+    RemoteBackend needs (see readable_wire_path). Both are authenticated
+    with request_mac over the connection's nonce.
+    """
+    MAX_BUFFERED = 1 << 20  # bytes queued for one client before it is dropped
+
+    def __init__(self, address=":9102", interval=1.0, count=None, cpu_budget=None, cpu_manager=None, node=None,
+                 token=None):
+        super().__init__(interval, count, cpu_budget=cpu_budget, cpu_manager=cpu_manager)
+        self.token = token
+        # Sampling and applies share one worker, so CPUManager is only ever used from one thread
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self.host, self.port = parse_address(address)
+        self.node = node or socket.gethostname()
+        self.address = None
+        self.clients = set()
+        self.latest = None
+        self.sequence = 0
+
+    def hello(self, nonce):
+        return {
+            "type": "hello", "node": self.node, "version": PROTOCOL_VERSION, "interval": self.interval,
+            "nonce": nonce, "apply": self.token is not None,
+        }
+
+    def publish(self, record):
+        self.sequence += 1
+        frame = encode_frame({"type": "snapshot", "sequence": self.sequence, **snapshot_delta(self.latest, record)})
+        self.latest = record
+        for writer in list(self.clients):
+            if writer.transport.get_write_buffer_size() > self.MAX_BUFFERED:
+                self.clients.discard(writer)
+                writer.close()
+            else:
+                writer.write(frame)
+
+    async def handle_client(self, reader, writer):
+        connection = {"nonce": secrets.token_hex(16), "counter": 0}
+        writer.write(encode_frame(self.hello(connection["nonce"])))
+        if self.latest is not None:
+            writer.write(encode_frame({"type": "snapshot", "sequence": self.sequence, **snapshot_delta(None, self.latest)}))
+        self.clients.add(writer)
+        try:
+            while True:
+                await self.handle_message(await read_frame(reader), writer, connection)
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            self.clients.discard(writer)
+            writer.close()
+
+    async def handle_message(self, message, writer, connection):
+        kind = message.get("type")
+        if kind not in ("apply", "fs"):
+            writer.write(encode_frame({"type": "error", "id": message.get("id"), "error": f"Unsupported request '{kind}'"}))
+            return
+        # A control connection does not need the snapshot stream
+        self.clients.discard(writer)
+        if kind == "fs":
+            response = {"type": "fs", "id": message.get("id")}
+            try:
+                request = self.authenticate(message, connection)
+                paths = request.get("paths")
+                if not isinstance(paths, list):
+                    raise ValueError("fs request needs a list of paths")
+                loop = asyncio.get_running_loop()
+                response["results"] = await loop.run_in_executor(
+                    self._executor, self.filesystem, request.get("op"), paths
+                )
+            except ValueError as e:
+                response["error"] = str(e)
+        else:
+            response = {"type": "result", "id": message.get("id"), "node": self.node}
+            try:
+                request = self.authenticate(message, connection)
+                response.update(await self.apply(request))
+            except ValueError as e:
+                response.update({"ok": False, "error": str(e)})
+        writer.write(encode_frame(response))
+        await writer.drain()
+
+    @staticmethod
+    def filesystem(op, names):
+        """Batched read/exists/listdir of wire paths for a RemoteBackend, as {name: result}"""
+        if op not in ("read", "exists", "listdir"):
+            raise ValueError(f"Unsupported fs operation '{op}'")
+        backend = FileHandler.backend
+        paths = {}
+        results = {}
+        for name in names:
+            try:
+                paths[name] = readable_wire_path(name)
+            except ValueError as e:
+                results[name] = False if op == "exists" else {"errno": errno.EACCES, "error": str(e)}
+        if op == "read":
+            contents = backend.read_snapshot(paths.values())
+            results.update({name: encode_read(contents[path]) for name, path in paths.items()})
+        elif op == "exists":
+            results.update({name: backend.exists(path) for name, path in paths.items()})
+        else:
+            for name, path in paths.items():
+                try:
+                    results[name] = sorted(backend.listdir(path))
+                except OSError as e:
+                    results[name] = encode_read(e)
+        return results
+
+    def authenticate(self, message, connection):
+        """The verified request of an apply or fs message; raises ValueError"""
+        if self.token is None:
+            raise ValueError(f"Remote {message.get('type')} is disabled on this agent (no token configured)")
+        counter = message.get("counter")
+        if not isinstance(counter, int) or counter <= connection["counter"]:
+            raise ValueError("Stale or missing request counter")
+        expected = request_mac(self.token, connection["nonce"], counter, message.get("request"))
+        if not hmac.compare_digest(expected, str(message.get("mac", ""))):
+            raise ValueError("Authentication failed")
+        connection["counter"] = counter
+        request = message["request"]
+        if not isinstance(request, dict):
+            raise ValueError("Request must be an object")
+        return request
+
+    async def apply(self, request):
+        """Validate, diff and (unless dry_run) apply a profile as one transaction"""
+        if "profile" not in request and "writes" not in request:
+            raise ValueError("Apply request needs a profile or writes")
+        if "writes" in request:
+            return await self.apply_writes(request["writes"])
+        ProfileStore.validate("request", request["profile"])
+        manager = self.cpu_manager
+        loop = asyncio.get_running_loop()
+
+        def work():
+            settings = manager.resolve_profile(request["profile"])
+            changes = manager.settings_diff(settings)
+            result = {"writes": 0, "errors": [], "rolled_back": False, "success": True}
+            if not request.get("dry_run") and changes:
+                result = manager.apply_transaction(settings)
+            return changes, result
+
+        changes, result = await loop.run_in_executor(self._executor, work)
+        return {
+            "ok": result["success"],
+            "error": None if result["success"] else "; ".join(result["errors"]),
+            "dry_run": bool(request.get("dry_run")),
+            "changes": {
+                str(core_id): {attribute: list(values) for attribute, values in attributes.items()}
+                for core_id, attributes in changes.items()
+            },
+            "writes": result["writes"],
+            "errors": result["errors"],
+            "rolled_back": result["rolled_back"],
+        }
+
+    async def apply_writes(self, writes):
+        """
+        A RemoteBackend's batch, written as is once every path is on the
+        writable list: read-back checks and rollback are done by the
+        CPUManager on the other end.
+        """
+        try:
+            writes = [(writable_wire_path(name), str(value)) for name, value in writes]
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Invalid writes: {e}")
+        manager = self.cpu_manager
+        loop = asyncio.get_running_loop()
+
+        def work():
+            results = manager.backend.apply_batch(writes)
+            # Our own stream should show the new values on the next sample
+            manager.sampler.invalidate()
+            return results
+
+        results = await loop.run_in_executor(self._executor, work)
+        errors = [f"{path}: {result['error']}" for (path, _), result in zip(writes, results) if not result["ok"]]
+        return {
+            "ok": not errors,
+            "error": "; ".join(errors) or None,
+            "results": [{"ok": result["ok"], "error": result["error"]} for result in results],
+        }
+
+    async def sample_loop(self):
+        loop = asyncio.get_running_loop()
+        samples = 0
+        deadline = loop.time()
+        while self.running and (self.count is None or samples < self.count):
+            # sysfs reads block, so keep them off the event loop
+            self.publish(await loop.run_in_executor(self._executor, self.snapshot))
+            samples += 1
+            if self.budget:
+                self.budget.update()
+            interval = self.budget.scale(self.interval) if self.budget else self.interval
+            deadline = max(deadline + interval, loop.time())
+            await asyncio.sleep(deadline - loop.time())
+
+    async def serve(self):
+        server = await asyncio.start_server(self.handle_client, self.host or None, self.port)
+        self.address = server.sockets[0].getsockname()[:2]
+        # Printed so scripts (and tests) can find an ephemeral port
+        print(f"Agent {self.node} listening on {self.address[0]}:{self.address[1]}", file=sys.stderr, flush=True)
+        async with server:
+            await self.sample_loop()
+        return 0
+
+    def run(self):
+        return asyncio.run(self.serve())
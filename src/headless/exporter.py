@@ -0,0 +1,182 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from .monitor import HeadlessMonitor
+
+OPENMETRICS_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+PLAIN_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+def parse_address(address):
+    """'host:port' or ':port' (all interfaces) into a (host, port) pair"""
+    host, sep, port = str(address).rpartition(":")
+    if not sep:
+        host, port = "", address
+    try:
+        port = int(port)
+    except ValueError:
+        raise ValueError(f"Invalid exporter address '{address}', expected [host]:port")
+    if not 0 <= port <= 65535:
+        raise ValueError(f"Invalid exporter port {port}")
+    return host.strip("[]"), port
+
+def escape_label(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{escape_label(value)}"' for name, value in labels.items()) + "}"
+
+class MetricsExporter(HeadlessMonitor):
+    """
+    Serves the headless snapshot as OpenMetrics (or Prometheus text) over HTTP.
+
+    Sampling keeps to its own interval; every sample is rendered once into
+    a text payload and scrapes only copy that payload out, so any number of
+    scrapers adds no sysfs reads.
+    """
+    PREFIX = "cpu_monitor"
+
+    def __init__(self, address=":9101", interval=1.0, cpu_budget=None, cpu_manager=None):
+        super().__init__(interval, cpu_budget=cpu_budget, cpu_manager=cpu_manager)
+        self._lock = threading.Lock()
+        self._payloads = {True: b"# EOF\n", False: b""}
+        self._stop = threading.Event()
+        self.throttle_totals = {}  # ("core", core_id) / ("package", package_id) -> throttle events since start
+        self.server = ThreadingHTTPServer(parse_address(address), self._handler())
+        self.server.daemon_threads = True
+        self._threads = []
+
+    @property
+    def address(self):
+        """(host, port) actually bound, useful with port 0"""
+        return self.server.server_address[:2]
+
+    def _handler(self):
+        exporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?", 1)[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                openmetrics = "application/openmetrics-text" in self.headers.get("Accept", "")
+                body = exporter.payload(openmetrics)
+                self.send_response(200)
+                self.send_header("Content-Type", OPENMETRICS_TYPE if openmetrics else PLAIN_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                # One line per scrape would drown out real diagnostics
+                pass
+
+        return Handler
+
+    def payload(self, openmetrics=True):
+        with self._lock:
+            return self._payloads[openmetrics]
+
+    def emit(self, record):
+        for event in record["events"]:
+            if event["type"].endswith("_throttle"):
+                kind = event["type"][:-len("_throttle")]
+                key = (kind, event[kind])
+                self.throttle_totals[key] = self.throttle_totals.get(key, 0) + event["count_delta"]
+        payloads = {True: self.render(record, True).encode(), False: self.render(record, False).encode()}
+        with self._lock:
+            self._payloads = payloads
+
+    def render(self, record, openmetrics=True):
+        """Metric families for one snapshot, in OpenMetrics or Prometheus text format"""
+        lines = []
+
+        def family(name, kind, help_text, samples, unit=None):
+            if not samples:
+                return
+            if kind == "info" and not openmetrics:
+                # The Prometheus text format has no info type; it is a gauge named *_info
+                name, kind = f"{name}_info", "gauge"
+            lines.append(f"# TYPE {self.PREFIX}_{name} {kind}")
+            if unit and openmetrics:
+                lines.append(f"# UNIT {self.PREFIX}_{name} {unit}")
+            lines.append(f"# HELP {self.PREFIX}_{name} {help_text}")
+            suffix = {"counter": "_total", "info": "_info"}.get(kind, "")
+            for labels, value in samples:
+                lines.append(f"{self.PREFIX}_{name}{suffix}{format_labels(labels)} {value}")
+
+        cores = record["cores"]
+        family("frequency_hertz", "gauge", "Current core frequency.", [
+            ({"core": core_id}, values["frequency"] * 1000)
+            for core_id, values in cores.items() if isinstance(values["frequency"], int)
+        ], unit="hertz")
+        family("utilization_ratio", "gauge", "Share of the last interval the core was busy.", [
+            ({"core": core_id}, round(values["utilization"] / 100, 4))
+            for core_id, values in cores.items() if "utilization" in values
+        ], unit="ratio")
+        core_info = []
+        for core_id, values in cores.items():
+            labels = {"core": core_id, "governor": values["governor"]}
+            if "epp" in values:
+                labels["epp"] = values["epp"]
+            core_info.append((labels, 1))
+        family("core", "info", "Governor and energy performance preference of each core.", core_info)
+        family("thermal_throttled", "gauge", "1 if the core throttled during the last interval.", [
+            ({"core": core_id}, 1 if values.get("throttled") else 0)
+            for core_id, values in cores.items()
+        ] if self.cpu_manager.thermal.supported else [])
+        family("thermal_throttle_events", "counter", "Core thermal throttle events seen since the exporter started.", [
+            ({"core": core_id, "type": "core"}, total)
+            for (kind, core_id), total in sorted(self.throttle_totals.items()) if kind == "core"
+        ])
+        family("thermal_package_throttle_events", "counter",
+               "Package thermal throttle events seen since the exporter started.", [
+            ({"package": package}, total)
+            for (kind, package), total in sorted(self.throttle_totals.items()) if kind == "package"
+        ])
+        family("temperature_celsius", "gauge", "Thermal zone and hwmon temperatures.", [
+            ({"sensor": sensor}, value) for sensor, value in sorted(record["temperatures"].items())
+        ], unit="celsius")
+        family("cores_online", "gauge", "Number of online cores.", [({}, len(cores))])
+        family("sample_timestamp_seconds", "gauge", "When the cached sample was taken.", [
+            ({}, round(record["time"], 3))
+        ], unit="seconds")
+        if openmetrics:
+            lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def sleep(self, seconds):
+        self._stop.wait(seconds)
+
+    def _sample_loop(self):
+        # The first sample was taken by start(); utilisation needs a full interval
+        self.sleep(self.interval)
+        if self.running:
+            self.run()
+
+    def start(self):
+        """Take a first sample, then serve and keep sampling on background threads"""
+        self.emit(self.snapshot())
+        self._threads = [
+            threading.Thread(target=self.server.serve_forever, daemon=True),
+            threading.Thread(target=self._sample_loop, daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        self.running = False
+        self._stop.set()
+        self.server.shutdown()
+        self.server.server_close()
+        for thread in self._threads:
+            thread.join()
+
+    def serve_forever(self):
+        self.start()
+        try:
+            while not self._stop.wait(1.0):
+                pass
+        finally:
+            self.stop()
+        return 0
@@ -0,0 +1,49 @@
+import sys
+import json
+import time
+from ..core.cpu_manager import CPUManager
+from ..core.budget import CPUBudget
+
+class HeadlessMonitor:
+    """
+    Samples on a fixed interval and writes one JSON object per line.
+
+    Each record holds per-core frequency, governor, EPP and utilisation for
+    the online cores, temperatures and the events seen since the previous record
+    (thermal throttling, with the frequency before and after, cores going
+    on- or offline, and governor/EPP changes, ours or external).
+    """
+    def __init__(self, interval=1.0, count=None, output=None, cpu_budget=None, cpu_manager=None, backend=None):
+        if interval <= 0:
+            raise ValueError("Interval must be positive")
+        self.interval = interval
+        self.count = count
+        self.output = output or sys.stdout
+        self.budget = CPUBudget(cpu_budget) if cpu_budget else None
+        self.cpu_manager = cpu_manager or CPUManager(backend)
+        self.running = True
+
+    def snapshot(self):
+        return self.cpu_manager.snapshot()
+
+    def emit(self, record):
+        self.output.write(json.dumps(record) + "\n")
+        self.output.flush()
+
+    def run(self):
+        samples = 0
+        deadline = time.monotonic()
+        while self.running and (self.count is None or samples < self.count):
+            self.emit(self.snapshot())
+            samples += 1
+            if self.budget:
+                self.budget.update()
+            interval = self.budget.scale(self.interval) if self.budget else self.interval
+            # Schedule from the previous deadline so sampling does not drift
+            deadline = max(deadline + interval, time.monotonic())
+            if self.count is None or samples < self.count:
+                self.sleep(max(deadline - time.monotonic(), 0.0))
+        return 0
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
@@ -0,0 +1,85 @@
+import csv
+import time
+import json
+from ..utils.file_handler import FileHandler, sysfs_value
+from ..core.drivers import DRIVERS, CpufreqDriver
+from ..core.topology import Topology, CPUUtilization, read_core_sets
+
+# Per-core cpufreq attributes in a one-shot snapshot, as {field: attribute}
+CPUFREQ_FIELDS = {
+    "frequency": "scaling_cur_freq",
+    "governor": "scaling_governor",
+    "epp": "energy_performance_preference",
+    "driver": "scaling_driver",
+    "min_freq": "scaling_min_freq",
+    "max_freq": "scaling_max_freq",
+    "cpuinfo_min_freq": "cpuinfo_min_freq",
+    "cpuinfo_max_freq": "cpuinfo_max_freq",
+}
+TOPOLOGY_FIELDS = {
+    "package": "physical_package_id",
+    "die": "die_id",
+    "cluster": "cluster_id",
+    "core": "core_id",
+    "siblings": "thread_siblings_list",
+    "core_type": "core_type",
+}
+
+def one_shot(window=None):
+    """
+    One snapshot of every online core: cpufreq state and limits, driver and
+    topology, plus utilisation over `window` seconds when given.
+
+    Deliberately avoids CPUManager (and its per-core probing): all per-core
+    files are read in a single FileHandler.read_files pass, which overlaps
+    the utilisation window instead of adding to it.
+    """
+    started = time.monotonic()
+    utilization = CPUUtilization()
+    if window:
+        utilization.sample()
+    cores, _ = read_core_sets()
+
+    core_paths = {
+        core_id: ({field: FileHandler.cpufreq_path(core_id, attribute) for field, attribute in CPUFREQ_FIELDS.items()},
+                  Topology.paths(core_id))
+        for core_id in cores
+    }
+    values = FileHandler.read_files(
+        path for cpufreq, topology in core_paths.values() for path in (*cpufreq.values(), *topology.values())
+    )
+
+    topology = Topology([])
+    snapshot = {"time": time.time(), "driver": None, "window": window or None, "cores": {}}
+    for core_id, (cpufreq, attributes) in core_paths.items():
+        record = {field: sysfs_value(values[path]) for field, path in cpufreq.items()}
+        info = topology.describe(core_id, {attribute: values[path] for attribute, path in attributes.items()})
+        record.update({field: sysfs_value(info[attribute]) for field, attribute in TOPOLOGY_FIELDS.items()})
+        # CPU lists such as "0,8" stay strings, even for a single sibling
+        record["siblings"] = info["thread_siblings_list"]
+        snapshot["cores"][core_id] = record
+
+    if cores:
+        scaling_driver = snapshot["cores"][cores[0]]["driver"]
+        driver = next((cls for cls in DRIVERS if cls.matches(scaling_driver)), CpufreqDriver)(scaling_driver, cores[0])
+        snapshot["driver"] = {"name": driver.name, "scaling_driver": scaling_driver, "globals": driver.get_globals()}
+
+    if window:
+        time.sleep(max(window - (time.monotonic() - started), 0))
+        percent = utilization.sample()
+        for core_id, record in snapshot["cores"].items():
+            record["utilization"] = round(percent[core_id], 1) if core_id in percent else "N/A"
+    return snapshot
+
+def write_json(snapshot, output):
+    output.write(json.dumps(snapshot) + "\n")
+
+def write_csv(snapshot, output):
+    """One row per core; driver globals are left to the JSON output"""
+    fields = list(CPUFREQ_FIELDS) + list(TOPOLOGY_FIELDS)
+    if snapshot["window"]:
+        fields.append("utilization")
+    writer = csv.writer(output)
+    writer.writerow(["cpu"] + fields)
+    for core_id, record in snapshot["cores"].items():
+        writer.writerow([core_id] + [record[field] for field in fields])
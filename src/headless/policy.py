@@ -0,0 +1,94 @@
+import time
+from .monitor import HeadlessMonitor
+from ..core.policy import PolicyEngine
+from ..core.sampler import SampleSchedule
+
+class PolicyDaemon(HeadlessMonitor):
+    """
+    Switches governor/EPP (or any profile setting) per core group by load,
+    following a Policy.
+
+    Each tick costs one /proc/stat read plus the change events CPUManager
+    already tracks (governor/EPP come from the sampler's slow tier). All
+    groups that switch in a tick go out as one apply_transaction, i.e. one
+    privileged batch. One JSON line is written per batch, and per group
+    whose settings were changed by something else (the policy then applies
+    again once a rule holds and the cooldown has passed).
+    """
+    def __init__(self, policy, interval=1.0, count=None, output=None, cpu_manager=None, backend=None,
+                 dry_run=False, clock=time.monotonic):
+        super().__init__(interval, count, output, cpu_manager=cpu_manager, backend=backend)
+        self.policy = policy
+        self.dry_run = dry_run
+        self.clock = clock
+        self.engine = PolicyEngine(policy, policy.resolve_groups(self.cpu_manager))
+        if not self.engine.groups:
+            raise ValueError("Policy groups match no online cores")
+
+    def step(self):
+        """One evaluation; returns the records to emit"""
+        manager = self.cpu_manager
+        now = self.clock()
+        records = []
+        events = manager.check_changes()
+        if any(event["type"] in ("core_online", "core_offline") for event in events):
+            self.engine.set_groups(self.policy.resolve_groups(manager))
+        for event in events:
+            label = self.engine.group_of(event["core"])
+            if event["source"] == "external" and "old" in event and label is not None \
+                    and self.engine.state[label]["active"] is not None:
+                self.engine.release(label)
+                records.append({**event, "group": label})
+        switches = self.engine.evaluate(manager.sample_utilization(), now)
+        if switches:
+            records.append(self.apply(switches, now))
+        return records
+
+    def apply(self, switches, now):
+        manager = self.cpu_manager
+        rules = self.policy.rules
+        profile = [{"cores": list(cores), **rules[index]["set"]} for _, cores, index, _ in switches]
+        record = {
+            "time": time.time(), "type": "policy_apply", "dry_run": self.dry_run,
+            "switches": [
+                {"group": label, "cores": list(cores), "rule": rules[index]["name"], "utilization": round(load, 1)}
+                for label, cores, index, load in switches
+            ],
+        }
+        try:
+            settings = manager.resolve_profile(profile)
+            if self.dry_run:
+                record["changes"] = {
+                    str(core_id): {attribute: list(values) for attribute, values in attributes.items()}
+                    for core_id, attributes in manager.settings_diff(settings).items()
+                }
+                result = {"success": True, "writes": 0, "errors": [], "rolled_back": False}
+            else:
+                result = manager.apply_transaction(settings)
+        except ValueError as e:
+            result = {"success": False, "writes": 0, "errors": [str(e)], "rolled_back": False}
+        for label, _, index, _ in switches:
+            # A failed switch is retried after the cooldown
+            self.engine.switched(label, index if result["success"] else None, now)
+        record.update({
+            "ok": result["success"], "writes": result["writes"], "errors": result["errors"],
+            "rolled_back": result["rolled_back"],
+        })
+        return record
+
+    def run(self):
+        # Utilisation is measured between ticks, so the first tick is one interval out
+        self.cpu_manager.sample_utilization()
+        self.cpu_manager.check_changes()
+        schedule = SampleSchedule(self.interval, self.clock)
+        schedule.advance()
+        samples = 0
+        while self.running and (self.count is None or samples < self.count):
+            delay = schedule.delay()
+            if delay:
+                self.sleep(delay)
+            for record in self.step():
+                self.emit(record)
+            samples += 1
+            schedule.advance()
+        return 0
@@ -0,0 +1,22 @@
+from .monitor import HeadlessMonitor
+from ..core.snapshot_bus import SnapshotWriter, DEFAULT_BUS
+
+class SnapshotPublisher(HeadlessMonitor):
+    """
+    The one sampler behind any number of frontends: each headless snapshot
+    is published to a shared memory bus that the GUI, TUI, exporter and
+    headless modes attach to with --attach.
+    """
+    def __init__(self, name=DEFAULT_BUS, interval=1.0, count=None, cpu_budget=None, cpu_manager=None):
+        super().__init__(interval, count, cpu_budget=cpu_budget, cpu_manager=cpu_manager)
+        self.writer = SnapshotWriter(name)
+
+    def emit(self, record):
+        self.writer.publish(record)
+
+    def run(self):
+        try:
+            return super().run()
+        finally:
+            # The region stays in place so attached readers pick up a restarted publisher
+            self.writer.close(unlink=False)
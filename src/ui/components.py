@@ -1,30 +1,64 @@
 from PyQt6.QtWidgets import (
     QWidget, QLabel, QLineEdit, QGridLayout, QComboBox,
-    QPushButton, QDialog, QVBoxLayout, QTextEdit, QCheckBox
+    QPushButton, QDialog, QVBoxLayout, QHBoxLayout, QTextEdit, QCheckBox
 )
 from PyQt6.QtCore import Qt
-from ..utils.file_handler import FileHandler
 
-class AMDParamsDialog(QDialog):
-    def __init__(self, params, parent=None):
+class DriverParamsDialog(QDialog):
+    def __init__(self, label, params, global_params=None, parent=None):
         super().__init__(parent)
-        self.setWindowTitle("AMD P-State Parameters")
+        self.setWindowTitle(f"{label} Parameters")
         self.setMinimumSize(400, 300)
         
         layout = QVBoxLayout()
         text_display = QTextEdit()
         text_display.setReadOnly(True)
         
-        formatted_text = "AMD P-State Driver Parameters:\n\n"
+        formatted_text = f"{label} Driver Parameters:\n\n"
         for param, value in params.items():
             formatted_text += f"{param}: {value}\n"
+        if global_params:
+            formatted_text += "\nSystem-wide:\n\n"
+            for param, value in global_params.items():
+                formatted_text += f"{param}: {value}\n"
         
         text_display.setText(formatted_text)
         layout.addWidget(text_display)
         self.setLayout(layout)
 
+class GroupHeader:
+    """Header row for a topology group: label, aggregates and a select toggle"""
+    def __init__(self, label, cores, layout, row):
+        self.label = label
+        self.cores = cores
+        self.widget = QWidget()
+        header_layout = QHBoxLayout(self.widget)
+        header_layout.setContentsMargins(0, 6, 0, 0)
+        self.title = QLabel(f"{label} ({len(cores)} cores)")
+        self.title.setStyleSheet("font-weight: bold;")
+        self.summary = QLabel("")
+        self.select_button = QPushButton("Select")
+        header_layout.addWidget(self.title)
+        header_layout.addWidget(self.summary)
+        header_layout.addWidget(self.select_button)
+        header_layout.addStretch()
+        layout.addWidget(self.widget, row, 0, 1, -1)
+
+    def update_aggregate(self, aggregate):
+        parts = []
+        if aggregate["frequency_avg"] is not None:
+            parts.append(f"avg {aggregate['frequency_avg'] // 1000} MHz, max {aggregate['frequency_max'] // 1000} MHz")
+        if aggregate["utilization"] is not None:
+            parts.append(f"util {aggregate['utilization']:.0f}%")
+        self.summary.setText(" | ".join(parts))
+
+    def remove(self, layout):
+        layout.removeWidget(self.widget)
+        self.widget.deleteLater()
+
 class CoreControls:
-    def __init__(self, core_id, layout, row, available_governors, available_preferences=None):
+    def __init__(self, core_id, layout, row, available_governors, available_preferences=None,
+                 show_ranking=False, show_idle=False):
         self.core_id = core_id
         self.checkbox = QCheckBox(f"Core {core_id}")
         layout.addWidget(self.checkbox, row, 0, alignment=Qt.AlignmentFlag.AlignLeft)
@@ -50,6 +84,41 @@ class CoreControls:
             self.epp_label = None
             self.epp_combo = None
 
+        self.limits_label = QLabel("Limits: N/A")
+        layout.addWidget(self.limits_label, row, 6, alignment=Qt.AlignmentFlag.AlignLeft)
+
+        if show_ranking:
+            self.rank_label = QLabel("Rank: N/A")
+            layout.addWidget(self.rank_label, row, 7, alignment=Qt.AlignmentFlag.AlignLeft)
+        else:
+            self.rank_label = None
+
+        if show_idle:
+            self.idle_label = QLabel("Idle: N/A")
+            layout.addWidget(self.idle_label, row, 8, alignment=Qt.AlignmentFlag.AlignLeft)
+        else:
+            self.idle_label = None
+
+    def widgets(self):
+        """The row's widgets with their grid columns"""
+        columns = [
+            (self.checkbox, 0), (self.freq_label, 1), (self.gov_label, 2), (self.gov_combo, 3),
+            (self.epp_label, 4), (self.epp_combo, 5), (self.limits_label, 6), (self.rank_label, 7),
+            (self.idle_label, 8),
+        ]
+        return [(widget, column) for widget, column in columns if widget is not None]
+
+    def move_to_row(self, layout, row):
+        for widget, column in self.widgets():
+            layout.removeWidget(widget)
+            layout.addWidget(widget, row, column, alignment=Qt.AlignmentFlag.AlignLeft)
+
+    def remove(self, layout):
+        """Take the row out of the grid (the core went offline)"""
+        for widget, _ in self.widgets():
+            layout.removeWidget(widget)
+            widget.deleteLater()
+
     def update_frequency(self, freq):
         try:
             self.freq_label.setText(f"Frequency: {int(freq) // 1000 if freq.isdigit() else 'N/A'} MHz")
@@ -59,13 +128,47 @@ class CoreControls:
     def update_governor(self, governor):
         self.gov_label.setText(f"Governor: {governor}")
         if governor in [self.gov_combo.itemText(i) for i in range(self.gov_combo.count())]:
+            # Refreshes must never look like user intent to anything listening on the combo
+            self.gov_combo.blockSignals(True)
             self.gov_combo.setCurrentText(governor)
+            self.gov_combo.blockSignals(False)
 
-    def update_amd_params(self, params):
+    def update_freq_limits(self, limits):
+        low, high = limits.get('scaling_min_freq', 'N/A'), limits.get('scaling_max_freq', 'N/A')
+        if low.isdigit() and high.isdigit():
+            self.limits_label.setText(f"Limits: {int(low) // 1000}-{int(high) // 1000} MHz")
+        else:
+            self.limits_label.setText("Limits: N/A")
+
+    def set_throttled(self, kinds):
+        """Highlight the core while its core or package throttle counter is moving"""
+        if kinds:
+            self.checkbox.setStyleSheet("color: white; background-color: #c0392b; font-weight: bold;")
+            self.checkbox.setToolTip(f"Thermal throttling ({', '.join(kinds)}) in the last interval")
+        else:
+            self.checkbox.setStyleSheet("")
+            self.checkbox.setToolTip("")
+
+    def update_idle_states(self, states, summary):
+        if not self.idle_label:
+            return
+        self.idle_label.setText(f"Idle: {summary}")
+        # Per-state breakdown on hover
+        lines = []
+        for state in states:
+            residency = f"{state['residency'] * 100:.1f}%" if state.get("residency") is not None else "N/A"
+            disabled = " (disabled)" if state.get("disable") == "1" else ""
+            lines.append(f"{state['name']}: {state['latency']} us exit latency, {residency}{disabled}")
+        self.idle_label.setToolTip("\n".join(lines))
+
+    def update_driver_params(self, params):
+        if self.rank_label:
+            self.rank_label.setText(f"Rank: {params.get('amd_pstate_prefcore_ranking', 'N/A')}")
         if self.epp_combo and 'energy_performance_preference' in params:
             epp = params.get('energy_performance_preference', 'N/A')
             self.epp_label.setText(f"EPP: {epp}")
             available_preferences = params.get('energy_performance_available_preferences', '').split()
+            self.epp_combo.blockSignals(True)
             if available_preferences:
                 current_items = [self.epp_combo.itemText(i) for i in range(self.epp_combo.count())]
                 if available_preferences != current_items:
@@ -73,21 +176,28 @@ class CoreControls:
                     self.epp_combo.addItems(available_preferences)
             if epp in [self.epp_combo.itemText(i) for i in range(self.epp_combo.count())]:
                 self.epp_combo.setCurrentText(epp)
+            self.epp_combo.blockSignals(False)
 
 class GlobalControls:
-    def __init__(self, layout, available_governors, available_preferences=None):
+    def __init__(self, layout, available_governors, available_preferences=None,
+                 min_interval=0.1, max_interval=5.0, profile_names=None, boost_supported=False,
+                 driver_label=None, driver_modes=None, show_ranking=False, show_idle=False,
+                 group_levels=None):
         self.refresh_label = QLabel("Refresh Speed (seconds):")
         layout.addWidget(self.refresh_label, 0, 0, alignment=Qt.AlignmentFlag.AlignRight)
 
         self.refresh_entry = QLineEdit("1.0")
         layout.addWidget(self.refresh_entry, 0, 1, alignment=Qt.AlignmentFlag.AlignLeft)
 
-        if FileHandler.is_amd_pstate():
-            self.amd_label = QLabel("AMD P-State Driver Active")
-            layout.addWidget(self.amd_label, 0, 2, alignment=Qt.AlignmentFlag.AlignLeft)
+        if driver_label:
+            self.driver_label = QLabel(f"{driver_label} Driver Active")
+            layout.addWidget(self.driver_label, 0, 2, alignment=Qt.AlignmentFlag.AlignLeft)
 
-            self.amd_params_button = QPushButton("Show AMD P-State Parameters")
-            layout.addWidget(self.amd_params_button, 0, 3, alignment=Qt.AlignmentFlag.AlignLeft)
+            self.driver_params_button = QPushButton(f"Show {driver_label} Parameters")
+            layout.addWidget(self.driver_params_button, 0, 3, alignment=Qt.AlignmentFlag.AlignLeft)
+        else:
+            self.driver_label = None
+            self.driver_params_button = None
 
         self.process_button = QPushButton("Show Processes")
         layout.addWidget(self.process_button, 0, 4, alignment=Qt.AlignmentFlag.AlignLeft)
@@ -95,6 +205,103 @@ class GlobalControls:
         self.all_cores_checkbox = QCheckBox("All Cores")
         layout.addWidget(self.all_cores_checkbox, 1, 0, alignment=Qt.AlignmentFlag.AlignLeft)
 
+        # Adaptive refresh: sample between min and max seconds depending on frequency volatility
+        adaptive_widget = QWidget()
+        adaptive_layout = QHBoxLayout(adaptive_widget)
+        adaptive_layout.setContentsMargins(0, 0, 0, 0)
+        self.adaptive_checkbox = QCheckBox("Adaptive")
+        self.adaptive_min_entry = QLineEdit(f"{min_interval}")
+        self.adaptive_min_entry.setMaximumWidth(50)
+        self.adaptive_max_entry = QLineEdit(f"{max_interval}")
+        self.adaptive_max_entry.setMaximumWidth(50)
+        self.adaptive_status = QLabel("")
+        adaptive_layout.addWidget(self.adaptive_checkbox)
+        adaptive_layout.addWidget(QLabel("min"))
+        adaptive_layout.addWidget(self.adaptive_min_entry)
+        adaptive_layout.addWidget(QLabel("max"))
+        adaptive_layout.addWidget(self.adaptive_max_entry)
+        adaptive_layout.addWidget(self.adaptive_status)
+        layout.addWidget(adaptive_widget, 1, 1, alignment=Qt.AlignmentFlag.AlignLeft)
+
+        # Min/max frequency caps for the selected cores, in MHz (blank leaves a cap unchanged)
+        limits_widget = QWidget()
+        limits_layout = QHBoxLayout(limits_widget)
+        limits_layout.setContentsMargins(0, 0, 0, 0)
+        self.min_freq_entry = QLineEdit()
+        self.min_freq_entry.setPlaceholderText("min")
+        self.min_freq_entry.setMaximumWidth(60)
+        self.max_freq_entry = QLineEdit()
+        self.max_freq_entry.setPlaceholderText("max")
+        self.max_freq_entry.setMaximumWidth(60)
+        self.limits_button = QPushButton("Apply Limits")
+        limits_layout.addWidget(QLabel("Limits (MHz)"))
+        limits_layout.addWidget(self.min_freq_entry)
+        limits_layout.addWidget(self.max_freq_entry)
+        limits_layout.addWidget(self.limits_button)
+        layout.addWidget(limits_widget, 1, 5, 1, 2, alignment=Qt.AlignmentFlag.AlignLeft)
+
+        # Hottest temperature sensor; per-sensor readings on hover
+        self.thermal_label = QLabel("")
+        layout.addWidget(self.thermal_label, 0, 8, alignment=Qt.AlignmentFlag.AlignLeft)
+
+        # Shows self-overhead and whether the monitor is throttling itself (--cpu-budget)
+        self.budget_label = QLabel("")
+        layout.addWidget(self.budget_label, 1, 4, alignment=Qt.AlignmentFlag.AlignLeft)
+
+        if profile_names:
+            self.profile_combo = QComboBox()
+            self.profile_combo.addItem("Apply profile...")
+            self.profile_combo.addItems(profile_names)
+            layout.addWidget(self.profile_combo, 0, 5, alignment=Qt.AlignmentFlag.AlignLeft)
+        else:
+            self.profile_combo = None
+
+        self.boost_checkbox = QCheckBox("Boost")
+        self.boost_checkbox.setEnabled(boost_supported)
+        if not boost_supported:
+            self.boost_checkbox.setToolTip("No boost control exposed by this system")
+        layout.addWidget(self.boost_checkbox, 0, 6, alignment=Qt.AlignmentFlag.AlignLeft)
+
+        # Driver operating mode (amd-pstate active/passive/guided, intel_pstate active/passive/off)
+        if driver_modes:
+            self.mode_combo = QComboBox()
+            self.mode_combo.addItems(driver_modes)
+            self.mode_combo.setToolTip("Driver operating mode")
+            layout.addWidget(self.mode_combo, 0, 7, alignment=Qt.AlignmentFlag.AlignLeft)
+        else:
+            self.mode_combo = None
+
+        # Group the core list by topology level, with per-group aggregates
+        self.group_combo = QComboBox()
+        self.group_combo.addItem("No grouping", None)
+        for level in group_levels or ():
+            self.group_combo.addItem(f"Group by {level}", level)
+        layout.addWidget(self.group_combo, 0, 9, alignment=Qt.AlignmentFlag.AlignLeft)
+
+        if show_ranking:
+            self.ranking_checkbox = QCheckBox("Sort by ranking")
+            self.ranking_checkbox.setToolTip("Order cores by preferred-core ranking, fastest first")
+            layout.addWidget(self.ranking_checkbox, 1, 7, alignment=Qt.AlignmentFlag.AlignLeft)
+        else:
+            self.ranking_checkbox = None
+
+        # Disable C-states whose exit latency is above the limit on the selected cores
+        if show_idle:
+            idle_widget = QWidget()
+            idle_layout = QHBoxLayout(idle_widget)
+            idle_layout.setContentsMargins(0, 0, 0, 0)
+            self.idle_latency_entry = QLineEdit()
+            self.idle_latency_entry.setPlaceholderText("us")
+            self.idle_latency_entry.setMaximumWidth(60)
+            self.idle_latency_button = QPushButton("Limit C-states")
+            idle_layout.addWidget(QLabel("Max exit latency"))
+            idle_layout.addWidget(self.idle_latency_entry)
+            idle_layout.addWidget(self.idle_latency_button)
+            layout.addWidget(idle_widget, 1, 8, alignment=Qt.AlignmentFlag.AlignLeft)
+        else:
+            self.idle_latency_entry = None
+            self.idle_latency_button = None
+
         self.all_gov_combo = QComboBox()
         self.all_gov_combo.addItems(available_governors)
         layout.addWidget(self.all_gov_combo, 1, 2, alignment=Qt.AlignmentFlag.AlignLeft)
@@ -106,9 +313,33 @@ class GlobalControls:
         else:
             self.all_epp_combo = None
 
+    def update_driver_mode(self, mode):
+        if self.mode_combo and mode in [self.mode_combo.itemText(i) for i in range(self.mode_combo.count())]:
+            self.mode_combo.blockSignals(True)
+            self.mode_combo.setCurrentText(mode)
+            self.mode_combo.blockSignals(False)
+
+    def update_boost(self, enabled):
+        if enabled is not None:
+            self.boost_checkbox.setChecked(enabled)
+
+    def update_temperatures(self, temperatures):
+        if not temperatures:
+            return
+        self.thermal_label.setText(f"Max temp: {max(temperatures.values()):.0f} °C")
+        self.thermal_label.setToolTip(
+            "\n".join(f"{sensor}: {value:.1f} °C" for sensor, value in sorted(temperatures.items()))
+        )
+
+    def update_budget_status(self, budget):
+        self.budget_label.setText(budget.status_text())
+        self.budget_label.setStyleSheet("color: orange; font-weight: bold;" if budget.throttled else "")
+
     def update_epp_preferences(self, available_preferences):
         if self.all_epp_combo and available_preferences:
             current_items = [self.all_epp_combo.itemText(i) for i in range(self.all_epp_combo.count())]
             if available_preferences != current_items:
+                self.all_epp_combo.blockSignals(True)
                 self.all_epp_combo.clear()
                 self.all_epp_combo.addItems(available_preferences)
+                self.all_epp_combo.blockSignals(False)
@@ -0,0 +1,138 @@
+import curses
+import time
+from .tui import Colors
+
+def format_khz(value):
+    return f"{value / 1e6:5.2f} GHz" if isinstance(value, int) else "    N/A"
+
+def format_percent(value):
+    return f"{value:5.1f}%" if value is not None else "   N/A"
+
+class FleetTUI:
+    """
+    Terminal view over a FleetAggregator: one summary row per node, Enter
+    drills down to that node's cores, Esc/Backspace goes back.
+    """
+    def __init__(self, aggregator, refresh_rate=1.0):
+        self.aggregator = aggregator
+        self.refresh_rate = refresh_rate
+        self.nodes = []
+        self.current_row = 0
+        self.scroll_position = 0
+        self.drill_node = None  # address of the node shown core by core
+        self.running = True
+
+    def start(self):
+        self.aggregator.start()
+        try:
+            curses.wrapper(self.main)
+        finally:
+            self.aggregator.stop()
+
+    def main(self, stdscr):
+        curses.start_color()
+        curses.init_pair(Colors.NORMAL, curses.COLOR_WHITE, curses.COLOR_BLACK)
+        curses.init_pair(Colors.HEADER, curses.COLOR_YELLOW, curses.COLOR_BLACK)
+        curses.init_pair(Colors.SELECTED, curses.COLOR_GREEN, curses.COLOR_BLACK)
+        curses.init_pair(Colors.THROTTLED, curses.COLOR_WHITE, curses.COLOR_RED)
+        stdscr.bkgd(' ', curses.color_pair(Colors.NORMAL))
+        curses.curs_set(0)
+        stdscr.keypad(True)
+        stdscr.nodelay(1)
+        last_update = 0
+        while self.running:
+            needs_redraw = False
+            if time.time() - last_update >= self.refresh_rate:
+                self.nodes = self.aggregator.summaries()
+                last_update = time.time()
+                needs_redraw = True
+            if self.handle_input(stdscr.getch()):
+                needs_redraw = True
+            if needs_redraw:
+                try:
+                    self.draw(stdscr)
+                except curses.error:
+                    pass
+            time.sleep(0.02)
+
+    def rows(self):
+        """Rows of the current view: nodes, or the cores of the drilled-down node"""
+        if self.drill_node is None:
+            return self.nodes
+        node = next((node for node in self.nodes if node["address"] == self.drill_node), None)
+        if node is None or not node["snapshot"]:
+            return []
+        return sorted(node["snapshot"]["cores"].items())
+
+    def handle_input(self, key):
+        if key == -1:
+            return False
+        rows = self.rows()
+        if key == ord('q'):
+            self.running = False
+        elif key == curses.KEY_UP:
+            self.current_row = max(self.current_row - 1, 0)
+        elif key == curses.KEY_DOWN:
+            self.current_row = min(self.current_row + 1, max(len(rows) - 1, 0))
+        elif key in (curses.KEY_ENTER, 10, 13, curses.KEY_RIGHT) and self.drill_node is None and rows:
+            self.drill_node = rows[self.current_row]["address"]
+            self.current_row = self.scroll_position = 0
+        elif key in (27, curses.KEY_BACKSPACE, 127, curses.KEY_LEFT) and self.drill_node is not None:
+            # Back to the fleet, with the cursor on the node we came from
+            addresses = [node["address"] for node in self.nodes]
+            self.current_row = addresses.index(self.drill_node) if self.drill_node in addresses else 0
+            self.drill_node = None
+            self.scroll_position = 0
+        return True
+
+    def draw(self, stdscr):
+        stdscr.erase()
+        height, width = stdscr.getmaxyx()
+        rows = self.rows()
+        if self.drill_node is None:
+            connected = sum(1 for node in self.nodes if node["connected"])
+            title = f"Fleet: {len(self.nodes)} nodes, {connected} connected"
+            header = f"{'Node':<24} {'Status':<12} {'Cores':>5} {'Avg freq':>9} {'Max freq':>9} {'Util':>6} {'Thr':>4} {'Temp':>6}  Governors"
+        else:
+            title = f"Node {self.drill_node} (Esc: back)"
+            header = f"{'Core':>4}  {'Frequency':>9}  {'Governor':<14} {'EPP':<22} {'Util':>6}  Throttled"
+        stdscr.addstr(0, 0, title[:width - 1], curses.color_pair(Colors.HEADER) | curses.A_BOLD)
+        stdscr.addstr(1, 0, header[:width - 1], curses.color_pair(Colors.HEADER))
+
+        visible_lines = height - 3
+        if self.current_row < self.scroll_position:
+            self.scroll_position = self.current_row
+        elif self.current_row >= self.scroll_position + visible_lines:
+            self.scroll_position = self.current_row - visible_lines + 1
+        for index, row in enumerate(rows[self.scroll_position:self.scroll_position + visible_lines]):
+            position = self.scroll_position + index
+            if self.drill_node is None:
+                line, throttled = self.node_line(row)
+            else:
+                line, throttled = self.core_line(*row)
+            attribute = curses.color_pair(Colors.THROTTLED if throttled else Colors.NORMAL)
+            if position == self.current_row:
+                attribute |= curses.A_REVERSE
+            stdscr.addstr(2 + index, 0, line[:width - 1], attribute)
+        footer = "Up/Down: move  Enter: cores  q: quit" if self.drill_node is None else "Up/Down: move  Esc: nodes  q: quit"
+        stdscr.addstr(height - 1, 0, footer[:width - 1], curses.color_pair(Colors.SELECTED))
+        stdscr.refresh()
+
+    @staticmethod
+    def node_line(node):
+        summary = node["summary"]
+        status = "connected" if node["connected"] else "down"
+        if summary is None:
+            return f"{node['node'][:24]:<24} {status:<12} {node['error'] or 'waiting'}", False
+        temperature = f"{summary['temperature_max']:5.1f}C" if summary["temperature_max"] is not None else "   N/A"
+        line = (f"{node['node'][:24]:<24} {status:<12} {summary['cores']:>5} {format_khz(summary['frequency_avg']):>9} "
+                f"{format_khz(summary['frequency_max']):>9} {format_percent(summary['utilization']):>6} "
+                f"{summary['throttled']:>4} {temperature:>6}  {','.join(summary['governors'])}")
+        return line, summary["throttled"] > 0
+
+    @staticmethod
+    def core_line(core_id, values):
+        throttled = values.get("throttled", [])
+        line = (f"{core_id:>4}  {format_khz(values.get('frequency')):>9}  {values.get('governor', 'N/A'):<14} "
+                f"{values.get('epp', ''):<22} {format_percent(values.get('utilization')):>6}  {','.join(throttled)}")
+        return line, bool(throttled)
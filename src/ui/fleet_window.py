@@ -0,0 +1,82 @@
+from PyQt6.QtWidgets import QMainWindow, QTreeWidget, QTreeWidgetItem
+from PyQt6.QtCore import QTimer
+from .fleet_tui import format_khz, format_percent
+
+class FleetWindow(QMainWindow):
+    """
+    GUI view over a FleetAggregator: one row per node with its summary;
+    expanding a node drills down to its cores. Core rows are only kept up
+    to date while their node is expanded.
+    """
+    COLUMNS = ["Node / Core", "Status", "Cores", "Frequency", "Max frequency", "Utilization",
+               "Governor", "EPP", "Throttled", "Max temp"]
+
+    def __init__(self, aggregator, refresh_rate=1.0):
+        super().__init__()
+        self.setWindowTitle("CPU Monitor - Fleet")
+        self.aggregator = aggregator
+        self.tree = QTreeWidget()
+        self.tree.setHeaderLabels(self.COLUMNS)
+        self.tree.itemExpanded.connect(self.on_expanded)
+        self.setCentralWidget(self.tree)
+        self.setMinimumSize(900, 400)
+        self.node_items = {}  # address -> top-level item
+        self.node_state = {}  # address -> latest aggregator entry
+
+        self.aggregator.start()
+        self.timer = QTimer()
+        self.timer.timeout.connect(self.update_nodes)
+        self.timer.start(int(refresh_rate * 1000))
+        self.update_nodes()
+
+    def cleanup(self):
+        self.timer.stop()
+        self.aggregator.stop()
+
+    def update_nodes(self):
+        for node in self.aggregator.summaries():
+            item = self.node_items.get(node["address"])
+            if item is None:
+                item = QTreeWidgetItem(self.tree)
+                # Expandable before any core rows exist; they are filled in on expansion
+                item.setChildIndicatorPolicy(QTreeWidgetItem.ChildIndicatorPolicy.ShowIndicator)
+                self.node_items[node["address"]] = item
+            self.node_state[node["address"]] = node
+            summary = node["summary"]
+            status = "connected" if node["connected"] else f"down: {node['error'] or 'waiting'}"
+            values = [node["node"], status]
+            if summary:
+                temperature = f"{summary['temperature_max']:.1f} °C" if summary["temperature_max"] is not None else "N/A"
+                values += [
+                    str(summary["cores"]), format_khz(summary["frequency_avg"]).strip(),
+                    format_khz(summary["frequency_max"]).strip(), format_percent(summary["utilization"]).strip(),
+                    ", ".join(summary["governors"]), "", str(summary["throttled"]), temperature,
+                ]
+            for column, text in enumerate(values):
+                item.setText(column, text)
+            if item.isExpanded():
+                self.update_cores(node["address"])
+
+    def on_expanded(self, item):
+        for address, node_item in self.node_items.items():
+            if node_item is item:
+                self.update_cores(address)
+
+    def update_cores(self, address):
+        item = self.node_items[address]
+        snapshot = self.node_state[address]["snapshot"]
+        cores = sorted(snapshot["cores"].items()) if snapshot else []
+        # Keep child rows in step with the node's (possibly hot-plugged) core set
+        while item.childCount() > len(cores):
+            item.removeChild(item.child(item.childCount() - 1))
+        while item.childCount() < len(cores):
+            QTreeWidgetItem(item)
+        for index, (core_id, values) in enumerate(cores):
+            child = item.child(index)
+            texts = [
+                f"Core {core_id}", "", "", format_khz(values.get("frequency")).strip(), "",
+                format_percent(values.get("utilization")).strip(), values.get("governor", "N/A"),
+                values.get("epp", ""), ", ".join(values.get("throttled", [])), "",
+            ]
+            for column, text in enumerate(texts):
+                child.setText(column, text)
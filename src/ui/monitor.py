@@ -1,17 +1,63 @@
-from PyQt6.QtWidgets import QMainWindow, QWidget, QGridLayout, QScrollArea, QSizePolicy
+import functools
+from PyQt6.QtWidgets import QMainWindow, QWidget, QGridLayout, QScrollArea, QSizePolicy, QMessageBox
 from PyQt6.QtCore import QTimer, Qt
 
-from ..core.cpu_manager import CPUManager
-from .components import CoreControls, GlobalControls, AMDParamsDialog
-from ..utils.workers import FrequencyWorker, GovernorWorker, AMDPstateWorker
+from ..core.cpu_manager import CPUManager, GLOBAL_SETTINGS
+from ..core.sampler import AdaptiveInterval
+from ..core.budget import CPUBudget
+from ..core.profiles import ProfileStore
+from ..core.cpuidle import IdleMonitor
+from ..core.topology import Topology
+from ..core.snapshot_bus import SnapshotReader
+from .components import CoreControls, GlobalControls, GroupHeader, DriverParamsDialog
+from ..utils.workers import FrequencyWorker, GovernorWorker, DriverParamsWorker, WriteQueueWorker
+
+def unless_writing(retry_ms=None):
+    """
+    Run a GUI-thread method holding the manager's lock, or skip it while the
+    write queue holds the lock (possibly behind a password prompt) rather
+    than freeze the window. With retry_ms, a skipped call is retried later.
+    """
+    def decorate(method):
+        @functools.wraps(method)
+        def wrapper(self, *args):
+            lock = self.cpu_manager.lock
+            if not lock.acquire(blocking=False):
+                if retry_ms is not None:
+                    QTimer.singleShot(retry_ms, lambda: wrapper(self, *args))
+                return None
+            try:
+                return method(self, *args)
+            finally:
+                lock.release()
+        return wrapper
+    return decorate
 
 class CPUMonitor(QMainWindow):
-    def __init__(self):
+    CHANGE_MESSAGE_MS = 10000  # How long an external change stays on the status bar
+
+    def __init__(self, adaptive=False, min_interval=0.1, max_interval=5.0, cpu_budget=None,
+                 profiles_path=None, bus_name=None, backend=None, change_log=None):
         super().__init__()
         self.setWindowTitle("CPU Monitor")
         
         # Initialize manager and components first
-        self.cpu_manager = CPUManager()
+        self.cpu_manager = CPUManager(backend)
+        if bus_name:
+            # Another process samples; we only read its published snapshots
+            self.cpu_manager.attach_bus(SnapshotReader(bus_name))
+        if change_log:
+            # Governor/EPP/hotplug change events, e.g. to a ChangeLog file
+            self.cpu_manager.on_change(change_log)
+        self.adaptive = adaptive
+        self.adaptive_interval = AdaptiveInterval(min_interval, max_interval)
+        # Optional self-overhead budget, in percent of one CPU
+        self.budget = CPUBudget(cpu_budget) if cpu_budget else None
+        try:
+            self.profile_store = ProfileStore(profiles_path)
+        except (OSError, ValueError) as e:
+            print(f"Error loading tuning profiles: {e}")
+            self.profile_store = None
         
         # Create a scroll area
         self.scroll = QScrollArea()
@@ -32,6 +78,7 @@ class CPUMonitor(QMainWindow):
         # Setup the actual UI components
         self.setup_ui()
         self.setup_workers()
+        self.setup_write_queue()
         self.setup_timer()
         
         # Calculate initial width after UI setup
@@ -45,6 +92,9 @@ class CPUMonitor(QMainWindow):
         print("Stopping CPU monitor...")
         if hasattr(self, 'timer'):
             self.timer.stop()
+
+        if hasattr(self, 'write_queue'):
+            self.write_queue.stop()
         
         # Stop all workers and wait for them to finish
         if hasattr(self, 'workers'):
@@ -53,16 +103,20 @@ class CPUMonitor(QMainWindow):
                     worker.quit()
                     worker.wait()
 
+        self.cpu_manager.close()
+
     def setup_workers(self):
         self.workers = {
             'frequency': [],
             'governor': [],
-            'amd_pstate': []
+            'driver_params': []
         }
-        
-        for i in range(self.cpu_manager.cpu_cores):
+        self.add_workers(self.cpu_manager.cores)
+
+    def add_workers(self, cores):
+        for i in cores:
             # Frequency worker
-            freq_worker = FrequencyWorker(i)
+            freq_worker = FrequencyWorker(self.cpu_manager, i)
             freq_worker.finished.connect(
                 lambda freq, core_id=i: self.core_controls[core_id].update_frequency(freq)
             )
@@ -72,7 +126,7 @@ class CPUMonitor(QMainWindow):
             self.workers['frequency'].append(freq_worker)
             
             # Governor worker
-            gov_worker = GovernorWorker(i)
+            gov_worker = GovernorWorker(self.cpu_manager, i)
             gov_worker.finished.connect(
                 lambda gov, core_id=i: self.core_controls[core_id].update_governor(gov)
             )
@@ -81,62 +135,130 @@ class CPUMonitor(QMainWindow):
             )
             self.workers['governor'].append(gov_worker)
             
-            # AMD P-state worker if needed
-            if self.cpu_manager.amd_pstate_active:
-                pstate_worker = AMDPstateWorker(i)
+            # EPP and driver parameter worker if the driver has any
+            if self.cpu_manager.epp_supported or self.cpu_manager.driver.core_attributes:
+                pstate_worker = DriverParamsWorker(self.cpu_manager, i)
                 pstate_worker.finished.connect(
-                    lambda params, core_id=i: self.core_controls[core_id].update_amd_params(params)
+                    lambda params, core_id=i: self.core_controls[core_id].update_driver_params(params)
                 )
                 pstate_worker.error.connect(
-                    lambda err, core_id=i: print(f"Error reading AMD P-state for core {core_id}: {err}")
+                    lambda err, core_id=i: print(f"Error reading driver parameters for core {core_id}: {err}")
                 )
-                self.workers['amd_pstate'].append(pstate_worker)
+                self.workers['driver_params'].append(pstate_worker)
+
+    def remove_workers(self, cores):
+        for worker_type, workers in self.workers.items():
+            for worker in workers:
+                if worker.core_id in cores:
+                    worker.quit()
+                    worker.wait()
+            self.workers[worker_type] = [worker for worker in workers if worker.core_id not in cores]
+
+    def setup_write_queue(self):
+        # Privileged writes run off the GUI thread and report back through signals
+        self.write_queue = WriteQueueWorker(self.cpu_manager)
+        self.write_queue.applied.connect(self.on_writes_applied)
+        self.write_queue.failed.connect(self.on_write_failed)
+        self.write_queue.start()
 
     def setup_ui(self):
         available_preferences = None
-        if self.cpu_manager.amd_pstate_active:
-            available_preferences = self.cpu_manager.get_cpu_info(0).get(
+        if self.cpu_manager.epp_supported:
+            available_preferences = self.cpu_manager.get_cpu_info(self.cpu_manager.first_core).get(
                 "energy_performance_available_preferences", "").split()
 
         self.global_controls = GlobalControls(
             self.layout,
             self.cpu_manager.available_governors,
-            available_preferences
+            available_preferences,
+            self.adaptive_interval.min_interval,
+            self.adaptive_interval.max_interval,
+            self.profile_store.names() if self.profile_store else None,
+            self.cpu_manager.boost_supported,
+            self.driver_label(),
+            self.cpu_manager.driver.modes,
+            self.cpu_manager.ranking_supported,
+            self.cpu_manager.idle.supported,
+            Topology.LEVELS
         )
 
         # Connect refresh rate text box to update timer
         self.global_controls.refresh_entry.textChanged.connect(self.update_timer_interval)
+        self.global_controls.adaptive_checkbox.setChecked(self.adaptive)
+        self.global_controls.adaptive_checkbox.stateChanged.connect(self.toggle_adaptive)
+        self.global_controls.adaptive_min_entry.editingFinished.connect(self.update_adaptive_bounds)
+        self.global_controls.adaptive_max_entry.editingFinished.connect(self.update_adaptive_bounds)
 
-        if self.cpu_manager.amd_pstate_active:
-            self.global_controls.amd_params_button.clicked.connect(self.show_amd_params)
+        if self.global_controls.driver_params_button:
+            self.global_controls.driver_params_button.clicked.connect(self.show_driver_params)
+        if self.global_controls.mode_combo:
+            self.global_controls.mode_combo.activated.connect(
+                lambda: self.update_driver_mode(self.global_controls.mode_combo.currentText())
+            )
+        if self.global_controls.ranking_checkbox:
+            self.global_controls.ranking_checkbox.clicked.connect(lambda: self.reorder_cores())
+        self.global_controls.group_combo.activated.connect(lambda: self.reorder_cores())
+        if self.global_controls.idle_latency_button:
+            self.global_controls.idle_latency_button.clicked.connect(self.update_idle_latency)
 
         self.global_controls.process_button.clicked.connect(self.show_process_window)
 
+        if self.global_controls.profile_combo:
+            self.global_controls.profile_combo.activated.connect(self.apply_profile)
+
         self.global_controls.all_cores_checkbox.stateChanged.connect(self.toggle_all_cores)
-        self.global_controls.all_gov_combo.currentIndexChanged.connect(
+        self.global_controls.limits_button.clicked.connect(self.update_freq_limits)
+        # clicked, unlike toggled, is only emitted for user interaction
+        self.global_controls.boost_checkbox.clicked.connect(self.update_boost)
+        # activated (unlike currentIndexChanged) only fires on user interaction,
+        # so programmatic refreshes can never trigger privileged writes
+        self.global_controls.all_gov_combo.activated.connect(
             lambda: self.update_all_governors(self.global_controls.all_gov_combo.currentText())
         )
 
         if available_preferences:
-            self.global_controls.all_epp_combo.currentIndexChanged.connect(
+            self.global_controls.all_epp_combo.activated.connect(
                 lambda: self.update_all_epp(self.global_controls.all_epp_combo.currentText())
             )
 
-        self.core_controls = []
-        for i in range(self.cpu_manager.cpu_cores):
+        self.available_preferences = available_preferences
+        self.core_controls = {}  # core_id -> CoreControls, online cores only
+        # What each grid row shows: a core id, or (label, core ids) for a group header
+        self.row_order = list(self.cpu_manager.cores)
+        self.group_headers = []
+        self.add_core_rows(self.cpu_manager.cores)
+
+    def add_core_rows(self, cores):
+        for i in cores:
             controls = CoreControls(
-                i, self.layout, i + 2,
+                i, self.layout, len(self.core_controls) + 2,
                 self.cpu_manager.available_governors,
-                available_preferences
+                self.available_preferences,
+                self.global_controls.ranking_checkbox is not None,
+                self.global_controls.idle_latency_button is not None
             )
-            controls.gov_combo.currentIndexChanged.connect(
+            controls.gov_combo.activated.connect(
                 lambda _, core_id=i: self.update_governor(core_id)
             )
-            if available_preferences:
-                controls.epp_combo.currentIndexChanged.connect(
+            if self.available_preferences:
+                controls.epp_combo.activated.connect(
                     lambda _, core_id=i: self.update_epp(core_id)
                 )
-            self.core_controls.append(controls)
+            self.core_controls[i] = controls
+
+    def check_hotplug(self):
+        """Add or drop rows and workers for cores that came online or went offline"""
+        added, removed = self.cpu_manager.check_hotplug()
+        if not (added or removed):
+            return
+        self.remove_workers(removed)
+        for core_id in removed:
+            self.core_controls.pop(core_id).remove(self.layout)
+        self.add_core_rows(added)
+        self.add_workers(added)
+        # Force reorder_cores to lay every row out again
+        self.row_order = None
+        self.reorder_cores()
 
     def setup_timer(self):
         self.timer = QTimer()
@@ -145,87 +267,282 @@ class CPUMonitor(QMainWindow):
         self.timer.start()
 
     def update_timer_interval(self):
-        try:
-            value = float(self.global_controls.refresh_entry.text())
-            if value <= 0:
-                raise ValueError("Refresh rate must be positive")
-            self.timer.setInterval(int(value * 1000))
-        except ValueError:
-            self.global_controls.refresh_entry.setText("1.0")
-            self.timer.setInterval(1000)
+        if self.adaptive:
+            interval = self.adaptive_interval.interval
+        else:
+            try:
+                interval = float(self.global_controls.refresh_entry.text())
+                if interval <= 0:
+                    raise ValueError("Refresh rate must be positive")
+            except ValueError:
+                self.global_controls.refresh_entry.setText("1.0")
+                interval = 1.0
+        if self.budget:
+            interval = self.budget.scale(interval)
+        self.timer.setInterval(int(interval * 1000))
 
+    def show_external_changes(self, events):
+        """Put the latest governor/EPP change made outside this window on the status bar"""
+        external = [event for event in events if event["source"] == "external" and "old" in event]
+        if not external:
+            return
+        event = external[-1]
+        message = (f"External {event['type'][:-len('_changed')]} change on core {event['core']}: "
+                   f"{event['old']} -> {event['new']}")
+        if len(external) > 1:
+            message += f" (and {len(external) - 1} more)"
+        self.statusBar().showMessage(message, self.CHANGE_MESSAGE_MS)
+
+    @unless_writing()
     def update_cpu_info(self):
-        # Start all workers if they're not already running
+        if self.budget:
+            self.budget.update()
+            self.global_controls.update_budget_status(self.budget)
+        self.check_hotplug()
+        self.show_external_changes(self.cpu_manager.check_changes())
+
+        # Readers run one after another on this thread: the tick holds the
+        # manager's lock, which a worker thread would only wait for
         for worker_type in self.workers.values():
             for worker in worker_type:
                 if not worker.isRunning():
-                    worker.start()
-                    worker.wait()  # Wait for worker to finish before starting next one
+                    worker.run()
+
+        self.global_controls.update_boost(self.cpu_manager.get_boost())
+        self.global_controls.update_driver_mode(self.cpu_manager.get_driver_globals().get("status"))
+        self.global_controls.update_temperatures(self.cpu_manager.get_temperatures())
+        if self.cpu_manager.thermal.supported:
+            for event in self.cpu_manager.sample_thermal():
+                if event["type"] == "package_throttle":
+                    print(f"Thermal throttling on package {event['package']} "
+                          f"(cores {', '.join(map(str, event['cores']))})")
+                else:
+                    print(f"Thermal throttling on core {event['core']} ({event['type']}): "
+                          f"{event['previous_frequency']} -> {event['frequency']} kHz")
+            for core_id, controls in self.core_controls.items():
+                controls.set_throttled(self.cpu_manager.thermal.throttled.get(core_id))
+        self.cpu_manager.sample_utilization()
+        # Rankings can change at runtime; rows only move when the order actually does
+        self.reorder_cores()
+        self.update_group_aggregates()
+
+        # Caps live in the sampler's slow tier, so this only touches sysfs every few seconds
+        for core_id, controls in self.core_controls.items():
+            controls.update_freq_limits(self.cpu_manager.get_freq_limits(core_id))
+            if controls.idle_label:
+                states = self.cpu_manager.get_idle_states(core_id)
+                controls.update_idle_states(states, IdleMonitor.summary(states))
+
+        if self.adaptive:
+            interval = self.adaptive_interval.update(
+                self.cpu_manager.current_frequencies(),
+                self.cpu_manager.last_settings_change
+            )
+            self.global_controls.adaptive_status.setText(f"now {interval:.2f}s")
+        if self.adaptive or self.budget:
+            self.update_timer_interval()
+
+    def toggle_adaptive(self, state):
+        self.adaptive = bool(state)
+        if not self.adaptive:
+            self.global_controls.adaptive_status.setText("")
+        self.update_timer_interval()
+
+    def update_adaptive_bounds(self):
+        controls = self.global_controls
+        try:
+            self.adaptive_interval.set_bounds(
+                float(controls.adaptive_min_entry.text()),
+                float(controls.adaptive_max_entry.text())
+            )
+        except ValueError:
+            controls.adaptive_min_entry.setText(f"{self.adaptive_interval.min_interval}")
+            controls.adaptive_max_entry.setText(f"{self.adaptive_interval.max_interval}")
 
-    def show_amd_params(self):
-        if self.cpu_manager.amd_pstate_active and self.workers['amd_pstate']:
-            worker = self.workers['amd_pstate'][0]  # Use core 0's worker
-            worker.finished.connect(self._show_amd_params_dialog)
+    def driver_label(self):
+        """Label for the driver controls, or None for drivers with nothing extra to show"""
+        driver = self.cpu_manager.driver
+        if driver.epp_supported or driver.global_dir:
+            return driver.label
+        return None
+
+    def show_driver_params(self):
+        if self.workers['driver_params']:
+            worker = self.workers['driver_params'][0]  # Use the first online core's worker
+            worker.finished.connect(self._show_driver_params_dialog)
             worker.start()
+        else:
+            DriverParamsDialog(self.cpu_manager.driver.label, {}, self.cpu_manager.get_driver_globals(), self).exec()
     
-    def _show_amd_params_dialog(self, params):
-        dialog = AMDParamsDialog(params, self)
+    def _show_driver_params_dialog(self, params):
+        dialog = DriverParamsDialog(
+            self.cpu_manager.driver.label, params, self.cpu_manager.get_driver_globals(), self
+        )
         # Disconnect the signal to avoid memory leaks
-        self.workers['amd_pstate'][0].finished.disconnect(self._show_amd_params_dialog)
+        self.workers['driver_params'][0].finished.disconnect(self._show_driver_params_dialog)
         dialog.exec()
 
     def show_process_window(self):
-        from cpu_monitor import ProcessWindow
-        self.process_window = ProcessWindow()
+        # psutil is only needed for the process list, so load it on demand
+        from .process_window import ProcessWindow
+        self.process_window = ProcessWindow(budget=self.budget)
         self.process_window.show()
 
+    def apply_profile(self, index):
+        combo = self.global_controls.profile_combo
+        if index <= 0:
+            return
+        name = combo.itemText(index)
+        combo.setCurrentIndex(0)
+        try:
+            settings = self.cpu_manager.resolve_profile(self.profile_store.get(name))
+        except ValueError as e:
+            QMessageBox.warning(self, "Invalid Profile", str(e))
+            return
+        # Queued as one drain, so the whole profile is still a single transaction
+        self.write_queue.submit_settings(settings)
+
     def toggle_all_cores(self, state):
-        for controls in self.core_controls:
+        for controls in self.core_controls.values():
             controls.checkbox.setChecked(state)
 
     def update_governor(self, core_id):
         controls = self.core_controls[core_id]
         new_governor = controls.gov_combo.currentText()
-        if self.cpu_manager.update_governor(core_id, new_governor):
-            # Force an immediate update of the UI after governor change
-            governor = self.cpu_manager.get_cpu_governor(core_id)
-            controls.update_governor(governor)
-            
-            # Update AMD P-state params if needed
-            if core_id == 0 and self.cpu_manager.amd_pstate_active:
-                params = self.cpu_manager.get_amd_pstate_params(core_id)
-                self.global_controls.update_epp_preferences(
-                    params.get('energy_performance_available_preferences', '').split()
-                )
-                # Update width after preferences change
-                self.update_window_width()
+        self.write_queue.submit_settings({core_id: self.cpu_manager.governor_settings(core_id, new_governor)})
 
     def update_epp(self, core_id):
         controls = self.core_controls[core_id]
         if controls.epp_combo:
-            new_epp = controls.epp_combo.currentText()
-            if self.cpu_manager.update_epp(core_id, new_epp):
-                # Force an immediate update of AMD P-state params
-                params = self.cpu_manager.get_amd_pstate_params(core_id)
-                controls.update_amd_params(params)
-                # Update width after params change
-                self.update_window_width()
+            self.write_queue.submit(core_id, "energy_performance_preference", controls.epp_combo.currentText())
 
-    def update_all_governors(self, new_governor):
-        selected_cores = [
-            i for i, controls in enumerate(self.core_controls)
+    def selected_cores(self):
+        return [
+            i for i, controls in sorted(self.core_controls.items())
             if controls.checkbox.isChecked()
         ]
-        if self.cpu_manager.update_all_governors(new_governor, selected_cores):
-            # Force an immediate update of the UI after governor change
-            self.update_cpu_info()
+
+    def update_all_governors(self, new_governor):
+        self.write_queue.submit_settings({
+            core_id: self.cpu_manager.governor_settings(core_id, new_governor)
+            for core_id in self.selected_cores()
+        })
+
+    def update_boost(self, enabled):
+        self.write_queue.submit_settings({GLOBAL_SETTINGS: self.cpu_manager.boost_settings(enabled)})
+
+    def update_driver_mode(self, mode):
+        try:
+            settings = self.cpu_manager.driver_global_settings({"status": mode})
+        except ValueError as e:
+            QMessageBox.warning(self, "Invalid Driver Mode", str(e))
+            return
+        self.write_queue.submit_settings({GLOBAL_SETTINGS: settings})
+
+    def update_idle_latency(self):
+        """Queue C-state disable flags for the selected cores from the latency limit (us)"""
+        text = self.global_controls.idle_latency_entry.text().strip()
+        try:
+            if not text.isdigit():
+                raise ValueError("Enter the maximum exit latency in microseconds")
+            settings = self.cpu_manager.idle_latency_settings(self.selected_cores(), int(text))
+        except ValueError as e:
+            QMessageBox.warning(self, "Invalid C-state Latency Limit", str(e))
+            return
+        self.write_queue.submit_settings(settings)
+
+    def reorder_cores(self):
+        """Lay core rows out by id or preferred-core ranking, under group headers when grouping"""
+        checkbox = self.global_controls.ranking_checkbox
+        row_order = self.cpu_manager.display_rows(
+            bool(checkbox and checkbox.isChecked()),
+            self.global_controls.group_combo.currentData()
+        )
+        if row_order == self.row_order:
+            return
+        self.row_order = row_order
+        for header in self.group_headers:
+            header.remove(self.layout)
+        self.group_headers = []
+        for row, entry in enumerate(row_order):
+            if isinstance(entry, tuple):
+                header = GroupHeader(entry[0], entry[1], self.layout, row + 2)
+                header.select_button.clicked.connect(lambda _, cores=entry[1]: self.toggle_cores(cores))
+                self.group_headers.append(header)
+            else:
+                self.core_controls[entry].move_to_row(self.layout, row + 2)
+        self.update_group_aggregates()
+        self.update_window_width()
+
+    def update_group_aggregates(self):
+        if not self.group_headers:
+            return
+        aggregates = {
+            aggregate["group"]: aggregate
+            for aggregate in self.cpu_manager.group_aggregates(self.global_controls.group_combo.currentData())
+        }
+        for header in self.group_headers:
+            if header.label in aggregates:
+                header.update_aggregate(aggregates[header.label])
+
+    def toggle_cores(self, cores):
+        """Select a whole group for bulk actions, or clear it if it is already selected"""
+        checked = not all(self.core_controls[core_id].checkbox.isChecked() for core_id in cores)
+        for core_id in cores:
+            self.core_controls[core_id].checkbox.setChecked(checked)
+
+    def update_freq_limits(self):
+        """Queue min/max caps (entered in MHz) for the selected cores"""
+        controls = self.global_controls
+        min_text = controls.min_freq_entry.text().strip()
+        max_text = controls.max_freq_entry.text().strip()
+        try:
+            min_freq = int(float(min_text) * 1000) if min_text else None
+            max_freq = int(float(max_text) * 1000) if max_text else None
+            settings = {
+                core_id: self.cpu_manager.freq_limit_settings(core_id, min_freq, max_freq)
+                for core_id in self.selected_cores()
+            }
+        except ValueError as e:
+            QMessageBox.warning(self, "Invalid Frequency Limits", str(e))
+            return
+        self.write_queue.submit_settings(settings)
 
     def update_all_epp(self, new_epp):
-        selected_cores = [
-            i for i, controls in enumerate(self.core_controls)
-            if controls.checkbox.isChecked()
-        ]
-        self.cpu_manager.update_all_epp(new_epp, selected_cores) 
+        if not self.cpu_manager.epp_supported:
+            return
+        for core_id in self.selected_cores():
+            self.write_queue.submit(core_id, "energy_performance_preference", new_epp)
+
+    @unless_writing(retry_ms=100)
+    def on_writes_applied(self, core_ids):
+        # Force an immediate update of the affected rows
+        for core_id in core_ids:
+            if core_id not in self.core_controls:
+                continue
+            controls = self.core_controls[core_id]
+            controls.update_governor(self.cpu_manager.get_cpu_governor(core_id))
+            controls.update_freq_limits(self.cpu_manager.get_freq_limits(core_id))
+            if self.cpu_manager.epp_supported:
+                params = self.cpu_manager.get_driver_params(core_id)
+                controls.update_driver_params(params)
+                if core_id == self.cpu_manager.first_core:
+                    self.global_controls.update_epp_preferences(
+                        params.get('energy_performance_available_preferences', '').split()
+                    )
+        self.global_controls.update_boost(self.cpu_manager.get_boost())
+        self.global_controls.update_driver_mode(self.cpu_manager.get_driver_globals().get("status"))
+        # A mode switch can take EPP away (e.g. amd-pstate passive) or bring it back
+        for controls in self.core_controls.values():
+            if controls.epp_combo:
+                controls.epp_combo.setEnabled(self.cpu_manager.epp_supported)
+        # Update width after preferences change
+        self.update_window_width()
+
+    def on_write_failed(self, message):
+        print(f"Error applying CPU settings: {message}")
+        # Show the real state again rather than what the user picked
+        self.update_cpu_info()
 
     def update_window_width(self):
         """Recalculate and update the window width based on components"""
@@ -0,0 +1,199 @@
+from PyQt6.QtWidgets import QMainWindow, QWidget, QGridLayout, QTableWidget, QTableWidgetItem, QHBoxLayout, QLabel, QSpinBox, QPushButton
+from PyQt6.QtCore import Qt, QTimer
+import psutil
+
+class ProcessWindow(QMainWindow):
+    def __init__(self, budget=None):
+        super().__init__()
+        self.budget = budget  # Shared CPUBudget; scans slow down while it is throttling
+        self.setWindowTitle("Running Processes")
+        self.setGeometry(100, 100, 1000, 600)
+        self.refresh_period = 5000  # Default refresh period in milliseconds
+        self.is_paused = False
+        self.all_processes = []  # Store all processes
+        self.visible_range = (0, 0)  # Track visible range
+        self.row_height = 30  # Approximate height of each row
+
+        central_widget = QWidget()
+        self.setCentralWidget(central_widget)
+        layout = QGridLayout(central_widget)
+
+        # Create control panel
+        control_panel = QWidget()
+        control_layout = QHBoxLayout(control_panel)
+        
+        self.refresh_label = QLabel("Refresh Period (ms):")
+        self.refresh_input = QSpinBox()
+        self.refresh_input.setRange(1000, 10000)  # Increased minimum to 1 second
+        self.refresh_input.setValue(self.refresh_period)
+        self.refresh_input.valueChanged.connect(self.update_refresh_period)
+        
+        self.pause_button = QPushButton("Pause")
+        self.pause_button.setCheckable(True)
+        self.pause_button.clicked.connect(self.toggle_pause)
+        
+        control_layout.addWidget(self.refresh_label)
+        control_layout.addWidget(self.refresh_input)
+        control_layout.addWidget(self.pause_button)
+        control_layout.addStretch()
+        
+        layout.addWidget(control_panel, 0, 0)
+
+        # Create table
+        self.table = QTableWidget()
+        self.table.setColumnCount(5)
+        self.table.setHorizontalHeaderLabels(["PID", "Process Name", "Core", "CPU %", "Memory %"])
+        self.table.verticalScrollBar().valueChanged.connect(self.handle_scroll)
+        self.table.verticalHeader().setDefaultSectionSize(self.row_height)
+        layout.addWidget(self.table, 1, 0)
+
+        # Initialize process CPU tracking
+        self.prev_cpu_times = {}
+        
+        # Set up timer for auto-refresh
+        self.timer = QTimer()
+        self.timer.timeout.connect(self.load_processes)
+        self.timer.start(self.refresh_period)
+
+        self.load_processes()
+
+    def calculate_visible_range(self):
+        scrollbar = self.table.verticalScrollBar()
+        viewport_height = self.table.viewport().height()
+        scroll_position = scrollbar.value()
+        
+        # Calculate visible rows
+        start_row = max(0, scroll_position // self.row_height - 5)  # Add 5 rows buffer above
+        visible_rows = viewport_height // self.row_height + 10  # Add 5 rows buffer below
+        end_row = start_row + visible_rows
+        
+        return start_row, end_row
+
+    def handle_scroll(self, value):
+        if not self.is_paused:
+            self.update_visible_processes()
+
+    def update_visible_processes(self):
+        if not self.all_processes:
+            return
+
+        start_row, end_row = self.calculate_visible_range()
+        if (start_row, end_row) == self.visible_range:
+            return
+
+        self.visible_range = (start_row, end_row)
+        visible_processes = self.all_processes[start_row:end_row]
+        
+        self.update_table_content(visible_processes, start_row)
+
+    def update_table_content(self, processes, start_row):
+        if not processes:
+            return
+
+        self.table.setRowCount(len(self.all_processes))  # Keep total row count
+        
+        for row, (pid, name, core, cpu, mem) in enumerate(processes, start=start_row):
+            # Create items with proper sorting
+            pid_item = QTableWidgetItem()
+            pid_item.setData(Qt.ItemDataRole.DisplayRole, int(pid))
+            
+            name_item = QTableWidgetItem(name)
+            
+            core_item = QTableWidgetItem()
+            core_item.setData(Qt.ItemDataRole.DisplayRole, int(core))
+            
+            cpu_item = QTableWidgetItem()
+            cpu_item.setData(Qt.ItemDataRole.DisplayRole, float(cpu))
+            cpu_item.setText(f"{cpu:.1f}%")
+            
+            mem_item = QTableWidgetItem()
+            mem_item.setData(Qt.ItemDataRole.DisplayRole, float(mem))
+            mem_item.setText(f"{mem:.1f}%")
+            
+            self.table.setItem(row, 0, pid_item)
+            self.table.setItem(row, 1, name_item)
+            self.table.setItem(row, 2, core_item)
+            self.table.setItem(row, 3, cpu_item)
+            self.table.setItem(row, 4, mem_item)
+
+    def toggle_pause(self, checked):
+        self.is_paused = checked
+        if checked:
+            self.pause_button.setText("Resume")
+            self.timer.stop()
+        else:
+            self.pause_button.setText("Pause")
+            self.timer.start(self.refresh_period)
+            self.load_processes()  # Immediate refresh when resuming
+
+    def update_refresh_period(self, value):
+        self.refresh_period = value
+        if not self.is_paused:
+            self.timer.setInterval(value)
+
+    def calculate_cpu_percent(self, pid):
+        try:
+            proc = psutil.Process(pid)
+            # Get current CPU times
+            current_time = proc.cpu_times()
+            current_total = sum(current_time)
+            
+            # Get previous CPU times
+            if pid in self.prev_cpu_times:
+                prev_total = self.prev_cpu_times[pid]
+                # Calculate CPU usage over the effective (possibly throttled) period
+                cpu_percent = ((current_total - prev_total) / (self.timer.interval() / 1000)) * 100
+            else:
+                cpu_percent = 0
+                
+            # Store current total for next calculation
+            self.prev_cpu_times[pid] = current_total
+            
+            return min(cpu_percent, 100.0)  # Cap at 100%
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return 0.0
+
+    def load_processes(self):
+        try:
+            if self.is_paused:
+                return
+
+            if self.budget:
+                self.timer.setInterval(int(self.budget.scale(self.refresh_period)))
+
+            processes = []
+            # Get all processes at once
+            for proc in psutil.process_iter(['pid', 'name', 'cpu_affinity', 'memory_percent']):
+                try:
+                    info = proc.info
+                    pid = info['pid']
+                    
+                    # Calculate CPU percentage more efficiently
+                    cpu_percent = self.calculate_cpu_percent(pid)
+                    
+                    # Get memory percentage
+                    memory_percent = info['memory_percent']
+                    
+                    # Add entry for each core
+                    for core_id in info['cpu_affinity']:
+                        processes.append((
+                            pid,
+                            info['name'],
+                            core_id,
+                            cpu_percent,
+                            memory_percent
+                        ))
+                except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                    continue
+
+            # Store all processes but only display visible ones
+            self.all_processes = sorted(processes, key=lambda x: x[0])  # Sort by PID initially
+            self.update_visible_processes()
+            
+            # Enable sorting after initial load
+            if not self.table.isSortingEnabled():
+                self.table.setSortingEnabled(True)
+                self.table.resizeColumnsToContents()
+
+        except Exception as e:
+            print(f"Error updating process list: {e}")
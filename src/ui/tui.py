@@ -1,6 +1,12 @@
 import curses
 import time
 from ..core.cpu_manager import CPUManager
+from ..core.sampler import AdaptiveInterval
+from ..core.budget import CPUBudget
+from ..core.profiles import ProfileStore
+from ..core.cpuidle import IdleMonitor
+from ..core.topology import Topology
+from ..core.snapshot_bus import SnapshotReader
 
 class Colors:
     """Color scheme management"""
@@ -28,6 +34,7 @@ class Colors:
     POPUP_SELECTED = 10
     POPUP_BORDER = 11
     CORE_NUMBER = 12
+    THROTTLED = 13
     
     @staticmethod
     def initialize():
@@ -239,16 +246,85 @@ class RefreshRateInput(BaseWindow):
             except curses.error:
                 continue  # Try again if there's a display error
 
+class FrequencyInput(BaseWindow):
+    """Prompt for a frequency in MHz (or another whole number); an empty entry means 'leave unchanged'"""
+    def __init__(self, stdscr, title, prompt="Frequency (MHz): "):
+        self.current_value = ""
+        self.prompt = prompt
+        
+        # Calculate dimensions
+        width = max(len(title), len("Enter: apply, empty: keep, ESC: cancel"), len(self.prompt) + 8) + 4
+        height = 6  # Title + input line + info + border
+        
+        super().__init__(stdscr, title, height, width)
+        
+    def show(self):
+        while True:
+            try:
+                self.window.clear()
+                self.window.box()
+                
+                # Draw title
+                self.window.addstr(1, 2, self.title, curses.A_BOLD | curses.color_pair(Colors.HEADER))
+                
+                # Show current input
+                display_text = f"{self.prompt}{self.current_value}"
+                self.window.addstr(2, 2, display_text, curses.color_pair(Colors.POPUP_NORMAL))
+                self.window.addstr(3, 2, "Enter: apply, empty: keep, ESC: cancel", curses.color_pair(Colors.INFO))
+                
+                # Show cursor position
+                self.window.addstr(2, len(display_text) + 2, " ", curses.A_REVERSE)
+                
+                self.window.refresh()
+                
+                # Handle input
+                key = self.window.getch()
+                if key == ord('\n'):
+                    return self.current_value
+                elif key == 27:  # ESC
+                    return None
+                elif key in [ord(str(i)) for i in range(10)]:
+                    if len(self.current_value) < 6:  # Limit length
+                        self.current_value += chr(key)
+                elif key in (curses.KEY_BACKSPACE, 127, 8):
+                    self.current_value = self.current_value[:-1]
+            except curses.error:
+                continue  # Try again if there's a display error
+
 class CPUMonitorTUI:
-    def __init__(self):
-        self.cpu_manager = CPUManager()
+    def __init__(self, adaptive=False, min_interval=0.1, max_interval=5.0, cpu_budget=None,
+                 profiles_path=None, bus_name=None, backend=None, change_log=None):
+        self.cpu_manager = CPUManager(backend)
+        if bus_name:
+            # Another process samples; we only read its published snapshots
+            self.cpu_manager.attach_bus(SnapshotReader(bus_name))
+        if change_log:
+            # Governor/EPP/hotplug change events, e.g. to a ChangeLog file
+            self.cpu_manager.on_change(change_log)
         self.selected_cores = set()
         self.current_row = 0
         self.scroll_position = 0
         self.refresh_rate = 1.0
+        self.adaptive = adaptive
+        self.adaptive_interval = AdaptiveInterval(min_interval, max_interval)
+        # Optional self-overhead budget, in percent of one CPU
+        self.budget = CPUBudget(cpu_budget) if cpu_budget else None
+        self.message = ""  # Result of the last action, shown on the status line
+        try:
+            self.profile_store = ProfileStore(profiles_path)
+        except (OSError, ValueError) as e:
+            self.profile_store = None
+            self.message = f"Profiles unavailable: {e}"
         self.running = True
         self.color_mode = True  # True for colored, False for black & white
         self.core_info = {}  # Cache for core information
+        self.header_info = {}  # Boost, temperatures and driver status as of the last sample
+        self.sort_by_ranking = False
+        self.idle_supported = self.cpu_manager.idle.supported
+        self.thermal_supported = self.cpu_manager.thermal.supported
+        self.group_level = None  # Topology level the core list is grouped by
+        # What each row shows: a core id, or (label, core ids) for a group header
+        self.row_order = list(self.cpu_manager.cores)
         self.last_freq_update = 0  # Track when we last updated frequencies
 
     def set_colors(self, stdscr):
@@ -267,6 +343,7 @@ class CPUMonitorTUI:
             curses.init_pair(Colors.POPUP_SELECTED, curses.COLOR_BLACK, curses.COLOR_WHITE)
             curses.init_pair(Colors.POPUP_BORDER, curses.COLOR_WHITE, curses.COLOR_BLACK)
             curses.init_pair(Colors.CORE_NUMBER, curses.COLOR_WHITE, curses.COLOR_BLACK)
+            curses.init_pair(Colors.THROTTLED, curses.COLOR_WHITE, curses.COLOR_RED)
             
             # Try to enhance colors if supported
             if curses.can_change_color():
@@ -295,14 +372,107 @@ class CPUMonitorTUI:
             curses.init_pair(Colors.POPUP_SELECTED, curses.COLOR_BLACK, curses.COLOR_WHITE)
             curses.init_pair(Colors.POPUP_BORDER, curses.COLOR_WHITE, curses.COLOR_BLACK)
             curses.init_pair(Colors.CORE_NUMBER, curses.COLOR_WHITE, curses.COLOR_BLACK)
+            curses.init_pair(Colors.THROTTLED, curses.COLOR_BLACK, curses.COLOR_WHITE)
 
     def start(self):
-        curses.wrapper(self.main)
+        try:
+            curses.wrapper(self.main)
+        finally:
+            self.cpu_manager.close()
 
     def update_core_info(self):
         """Update cached core information"""
-        for i in range(self.cpu_manager.cpu_cores):
-            self.core_info[i] = self.cpu_manager.get_cpu_info(i)
+        for i in self.cpu_manager.cores:
+            info = self.cpu_manager.get_cpu_info(i)
+            info.update(self.cpu_manager.get_freq_limits(i))
+            if self.idle_supported:
+                info['idle'] = IdleMonitor.summary(self.cpu_manager.get_idle_states(i))
+            self.core_info[i] = info
+        self.build_rows()
+
+    def update_header_info(self):
+        """Read the system-wide values the header shows, so redraws touch no sysfs"""
+        self.header_info = {
+            "boost": self.cpu_manager.get_boost(),
+            "temperatures": self.cpu_manager.get_temperatures(),
+            "driver_status": self.cpu_manager.get_driver_globals().get("status"),
+        }
+
+    def build_rows(self):
+        """Lay out rows by core order, with a header row per group when grouping"""
+        current = self.row_order[self.current_row] if self.current_row < len(self.row_order) else None
+        rows = self.cpu_manager.display_rows(self.sort_by_ranking and self.ranking_supported, self.group_level)
+        self.row_order = rows
+        # Keep the cursor on the same core or group while rows move
+        self.current_row = rows.index(current) if current in rows else min(self.current_row, len(rows) - 1)
+
+    def current_cores(self):
+        """Cores under the cursor: the core itself, or every core of a group header"""
+        entry = self.row_order[self.current_row]
+        return list(entry[1]) if isinstance(entry, tuple) else [entry]
+
+    def target_cores(self):
+        """Cores an action applies to: the selection, else whatever is under the cursor"""
+        return set(self.selected_cores) or set(self.current_cores())
+
+    def scroll_to_cursor(self, visible_lines):
+        max_scroll = max(0, len(self.row_order) - visible_lines)
+        if not self.scroll_position <= self.current_row < self.scroll_position + visible_lines:
+            self.scroll_position = min(max(self.current_row - visible_lines + 1, 0), max_scroll)
+
+    @property
+    def ranking_supported(self):
+        return any(
+            info.get('amd_pstate_prefcore_ranking', 'N/A').isdigit() for info in self.core_info.values()
+        )
+
+    def current_interval(self):
+        """Seconds until the next sample, fixed or driven by frequency volatility"""
+        interval = self.adaptive_interval.interval if self.adaptive else self.refresh_rate
+        if self.budget:
+            interval = self.budget.scale(interval)
+        return interval
+
+    def sample(self):
+        if self.budget:
+            self.budget.update()
+        self.check_hotplug()
+        self.check_changes()
+        self.cpu_manager.sample_utilization()
+        self.update_core_info()
+        self.update_header_info()
+        if self.thermal_supported:
+            events = self.cpu_manager.sample_thermal()
+            if events:
+                cores = sorted({core_id for event in events
+                                for core_id in (event["cores"] if "cores" in event else [event["core"]])})
+                self.message = f"Thermal throttling on {len(cores)} core(s): {', '.join(map(str, cores[:8]))}"
+        if self.adaptive:
+            self.adaptive_interval.update(
+                self.cpu_manager.current_frequencies(),
+                self.cpu_manager.last_settings_change
+            )
+
+    def check_hotplug(self):
+        """Drop cached rows and selections of cores that went offline"""
+        added, removed = self.cpu_manager.check_hotplug()
+        for core_id in removed:
+            self.core_info.pop(core_id, None)
+            self.selected_cores.discard(core_id)
+        if added or removed:
+            changes = [f"+{core_id}" for core_id in added] + [f"-{core_id}" for core_id in removed]
+            self.message = f"CPU hotplug: {' '.join(changes)}"
+
+    def check_changes(self):
+        """Report governor/EPP changes made by something other than us"""
+        external = [event for event in self.cpu_manager.check_changes()
+                    if event["source"] == "external" and "old" in event]
+        if external:
+            event = external[0]
+            self.message = (f"External {event['type'][:-len('_changed')]} change on core {event['core']}: "
+                            f"{event['old']} -> {event['new']}")
+            if len(external) > 1:
+                self.message += f" (+{len(external) - 1} more)"
 
     def get_core_info(self, core_id):
         """Get core information from cache"""
@@ -325,7 +495,7 @@ class CPUMonitorTUI:
         stdscr.nodelay(1)
         
         # Initialize core info
-        self.update_core_info()
+        self.sample()
         self.last_freq_update = time.time()
         needs_redraw = True
         
@@ -333,8 +503,8 @@ class CPUMonitorTUI:
             current_time = time.time()
             
             # Update frequencies at refresh interval
-            if current_time - self.last_freq_update >= self.refresh_rate:
-                self.update_core_info()
+            if current_time - self.last_freq_update >= self.current_interval():
+                self.sample()
                 self.last_freq_update = current_time
                 needs_redraw = True
             
@@ -351,7 +521,13 @@ class CPUMonitorTUI:
                     pass
             
             # Small sleep to prevent high CPU usage
-            time.sleep(0.01)  # Reduced sleep time for more responsive input
+            time.sleep(self.input_poll_interval())
+
+    def input_poll_interval(self):
+        """Short sleep for responsive input, stretched while over the CPU budget"""
+        if self.budget:
+            return min(self.budget.scale(0.01), 0.1)
+        return 0.01
 
     def format_frequency(self, freq):
         """Format frequency in MHz or GHz based on value"""
@@ -373,13 +549,18 @@ class CPUMonitorTUI:
                 
             height = stdscr.getmaxyx()[0]
             visible_lines = height - 4  # Account for header, actions, and separator lines
-            max_scroll = max(0, self.cpu_manager.cpu_cores - visible_lines)  # Maximum scroll position
+            max_scroll = max(0, len(self.row_order) - visible_lines)  # Maximum scroll position
             needs_redraw = True  # Most key handlers will need a redraw
             
             if key == ord('q'):
                 self.running = False
             elif key == ord(' '):
-                self.selected_cores.symmetric_difference_update([self.current_row])
+                cores = self.current_cores()
+                # A group header toggles the whole group
+                if all(core_id in self.selected_cores for core_id in cores):
+                    self.selected_cores.difference_update(cores)
+                else:
+                    self.selected_cores.update(cores)
             elif key == curses.KEY_UP:
                 if self.current_row > 0:
                     self.current_row -= 1
@@ -387,18 +568,18 @@ class CPUMonitorTUI:
                     if self.current_row < self.scroll_position:
                         self.scroll_position = self.current_row
             elif key == curses.KEY_DOWN:
-                if self.current_row < self.cpu_manager.cpu_cores - 1:
+                if self.current_row < len(self.row_order) - 1:
                     self.current_row += 1
                     # Adjust scroll position to keep current row visible
                     if self.current_row >= self.scroll_position + visible_lines:
                         self.scroll_position = min(self.current_row - visible_lines + 1, max_scroll)
             elif key == ord('j'):
                 stdscr.nodelay(0)
-                popup = NumberInput(stdscr, "Jump to Core", self.cpu_manager.cpu_cores - 1)
+                popup = NumberInput(stdscr, "Jump to Core", self.cpu_manager.cores[-1])
                 selected = popup.show()
                 stdscr.nodelay(1)
                 if selected is not None:
-                    self.current_row = selected
+                    self.current_row = self.row_order.index(selected) if selected in self.row_order else self.current_row
                     # Adjust scroll position to keep jumped-to core visible
                     if self.current_row < self.scroll_position:
                         self.scroll_position = self.current_row
@@ -406,25 +587,25 @@ class CPUMonitorTUI:
                         self.scroll_position = min(self.current_row - visible_lines + 1, max_scroll)
                 stdscr.clear()
             elif key == ord('a'):
-                if len(self.selected_cores) == self.cpu_manager.cpu_cores:
+                if self.selected_cores == set(self.cpu_manager.cores):
                     self.selected_cores.clear()
                 else:
-                    self.selected_cores = set(range(self.cpu_manager.cpu_cores))
+                    self.selected_cores = set(self.cpu_manager.cores)
             elif key == ord('g'):
                 stdscr.nodelay(0)
                 popup = PopupMenu(stdscr, "Select Governor", self.cpu_manager.available_governors)
                 selected = popup.show()
                 stdscr.nodelay(1)
                 if selected:
-                    cores_to_update = self.selected_cores or {self.current_row}
+                    cores_to_update = self.target_cores()
                     self.cpu_manager.update_all_governors(selected, cores_to_update)
                     # Force an immediate update of the cache for affected cores
                     for core in cores_to_update:
                         self.core_info[core] = self.cpu_manager.get_cpu_info(core)
                 stdscr.clear()
-            elif key == ord('e') and self.amd_pstate_active:
+            elif key == ord('e') and self.epp_supported:
                 # Get EPP info from current core or first selected core
-                core_id = next(iter(self.selected_cores)) if self.selected_cores else self.current_row
+                core_id = min(self.target_cores())
                 info = self.get_core_info(core_id)
                 available_preferences = info.get('energy_performance_available_preferences', '').split()
                 if available_preferences:
@@ -433,7 +614,7 @@ class CPUMonitorTUI:
                     selected = popup.show()
                     stdscr.nodelay(1)
                     if selected:
-                        cores_to_update = self.selected_cores or {self.current_row}
+                        cores_to_update = self.target_cores()
                         self.cpu_manager.update_all_epp(selected, list(cores_to_update))
                         # Force an immediate update of the cache for affected cores
                         for core in cores_to_update:
@@ -447,6 +628,88 @@ class CPUMonitorTUI:
                 if new_rate is not None:
                     self.refresh_rate = new_rate
                 stdscr.clear()
+            elif key == ord('p') and self.profile_store and self.profile_store.names():
+                stdscr.nodelay(0)
+                popup = PopupMenu(stdscr, "Apply Profile", self.profile_store.names())
+                selected = popup.show()
+                stdscr.nodelay(1)
+                if selected:
+                    result = self.cpu_manager.apply_profile(self.profile_store.get(selected))
+                    if result["success"]:
+                        self.message = f"Applied profile '{selected}'"
+                    else:
+                        self.message = f"Profile '{selected}' failed ({result['errors'][0]})"
+                        if result["rolled_back"]:
+                            self.message += ", rolled back"
+                    self.update_core_info()
+                    self.update_header_info()
+                stdscr.clear()
+            elif key == ord('f'):
+                cores_to_update = self.target_cores()
+                stdscr.nodelay(0)
+                min_mhz = FrequencyInput(stdscr, "Minimum Frequency Cap").show()
+                max_mhz = FrequencyInput(stdscr, "Maximum Frequency Cap").show() if min_mhz is not None else None
+                stdscr.nodelay(1)
+                if max_mhz is not None and (min_mhz or max_mhz):
+                    try:
+                        success = self.cpu_manager.update_freq_limits(
+                            sorted(cores_to_update),
+                            int(min_mhz) * 1000 if min_mhz else None,
+                            int(max_mhz) * 1000 if max_mhz else None
+                        )
+                        self.message = "Frequency caps applied" if success else "Failed to apply frequency caps"
+                    except ValueError as e:
+                        self.message = str(e)
+                    self.update_core_info()
+                stdscr.clear()
+            elif key == ord('b') and self.cpu_manager.boost_supported:
+                enabled = not self.header_info.get("boost")
+                if self.cpu_manager.set_boost(enabled):
+                    self.message = f"Boost {'enabled' if enabled else 'disabled'}"
+                else:
+                    self.message = "Failed to change boost"
+                self.update_header_info()
+            elif key == ord('o') and self.ranking_supported:
+                self.sort_by_ranking = not self.sort_by_ranking
+                self.build_rows()
+                self.scroll_to_cursor(visible_lines)
+                self.message = "Sorted by preferred-core ranking" if self.sort_by_ranking else "Sorted by core id"
+            elif key == ord('t'):
+                # Cycle the grouping: none -> package -> die -> cluster -> core -> type
+                levels = [None] + list(Topology.LEVELS)
+                self.group_level = levels[(levels.index(self.group_level) + 1) % len(levels)]
+                self.build_rows()
+                self.scroll_to_cursor(visible_lines)
+                self.message = f"Grouped by {self.group_level}" if self.group_level else "Grouping off"
+            elif key == ord('m') and self.cpu_manager.driver.modes:
+                stdscr.nodelay(0)
+                popup = PopupMenu(stdscr, f"{self.cpu_manager.driver.label} Mode", self.cpu_manager.driver.modes)
+                selected = popup.show()
+                stdscr.nodelay(1)
+                if selected:
+                    if self.cpu_manager.set_driver_mode(selected):
+                        self.message = f"{self.cpu_manager.driver.label} mode set to {selected}"
+                    else:
+                        self.message = f"Failed to switch to {selected} mode"
+                    self.update_core_info()
+                    self.update_header_info()
+                stdscr.clear()
+            elif key == ord('c') and self.idle_supported:
+                cores_to_update = self.target_cores()
+                stdscr.nodelay(0)
+                max_latency = FrequencyInput(stdscr, "Max C-state Exit Latency", "Latency (us): ").show()
+                stdscr.nodelay(1)
+                if max_latency:
+                    try:
+                        if self.cpu_manager.set_idle_latency_limit(sorted(cores_to_update), int(max_latency)):
+                            self.message = f"C-states above {max_latency} us disabled on {len(cores_to_update)} core(s)"
+                        else:
+                            self.message = "Failed to change C-states"
+                    except ValueError as e:
+                        self.message = str(e)
+                stdscr.clear()
+            elif key == ord('v'):
+                self.adaptive = not self.adaptive
             elif key == ord('z'):
                 self.color_mode = not self.color_mode
                 self.set_colors(stdscr)
@@ -516,45 +779,86 @@ class CPUMonitorTUI:
             
             # Display header (ensure it fits within bounds)
             header = " CPU Monitor (TUI) - Press 'q' to quit, 'space' to select, 'a' for all cores "
+            boost = self.header_info.get("boost")
+            if boost is not None:
+                header += f"| Boost: {'on' if boost else 'off'} "
+            temperatures = self.header_info.get("temperatures")
+            if temperatures:
+                header += f"| Max temp: {max(temperatures.values()):.0f}C "
+            driver_status = self.header_info.get("driver_status")
+            if driver_status:
+                header += f"| {self.cpu_manager.driver.label}: {driver_status} "
             header = header[:width-4]  # Leave space for borders
             header_pos = min((width - len(header)) // 2, width-len(header)-2)
             self.safe_addstr(stdscr, 0, header_pos, header, curses.A_BOLD | curses.color_pair(Colors.HEADER))
             
             # Display available actions
-            actions = "Press 'g' for governor selection, 'j' to jump to core, 'r' to adjust refresh rate, 'z' to toggle colors"
-            if self.amd_pstate_active:
+            actions = "Press 'g' for governor selection, 'f' for frequency caps, 'j' to jump to core, 't' to group by topology, 'r' to adjust refresh rate, 'v' for adaptive refresh, 'z' to toggle colors"
+            if self.epp_supported:
                 actions += ", 'e' for EPP profile selection"
+            if self.profile_store and self.profile_store.names():
+                actions += ", 'p' to apply a tuning profile"
+            if self.cpu_manager.boost_supported:
+                actions += ", 'b' to toggle boost"
+            if self.cpu_manager.driver.modes:
+                actions += ", 'm' for driver mode"
+            if self.idle_supported:
+                actions += ", 'c' for C-state latency limit"
+            show_ranking = self.ranking_supported
+            if show_ranking:
+                actions += ", 'o' to sort by core ranking"
             actions = actions[:width-4]  # Ensure it fits
             self.safe_addstr(stdscr, 1, 2, actions, curses.color_pair(Colors.INFO))
             
             # Calculate visible range based on scroll position
             visible_lines = height - 4  # Account for borders and headers
             start_idx = self.scroll_position
-            end_idx = min(start_idx + visible_lines, self.cpu_manager.cpu_cores)
+            end_idx = min(start_idx + visible_lines, len(self.row_order))
             
             # Draw separator line
             separator = "-" * (width-2)
             self.safe_addstr(stdscr, 2, 1, separator, curses.color_pair(Colors.BORDER))
             
             # Display core information
-            for i in range(start_idx, end_idx):
+            throttled = self.cpu_manager.throttled_cores
+            aggregates = {}
+            if self.group_level:
+                aggregates = {
+                    aggregate["group"]: aggregate for aggregate in self.cpu_manager.group_aggregates(self.group_level)
+                }
+            for row in range(start_idx, end_idx):
+                y_pos = row - start_idx + 3
+                i = self.row_order[row]
+                if isinstance(i, tuple):
+                    self.draw_group_header(stdscr, y_pos, row, aggregates.get(i[0]), i, width)
+                    continue
                 try:
                     info = self.get_core_info(i)
-                    y_pos = i - start_idx + 3
                     
                     # Base attributes for the line
                     base_attr = curses.color_pair(Colors.SELECTED) if i in self.selected_cores else curses.color_pair(Colors.NORMAL)
-                    if i == self.current_row:
+                    if row == self.current_row:
                         base_attr |= curses.A_REVERSE
                     
                     # Format each column with fixed width
                     x = 2  # Start position after left border
                     
-                    # Core number (with fixed width)
+                    # Core number (with fixed width), flagged while thermally throttled
                     core_text = f"Core {i:2d}"
-                    self.safe_addstr(stdscr, y_pos, x, core_text, base_attr)
+                    core_attr = base_attr
+                    if i in throttled:
+                        core_attr = curses.A_BOLD | curses.color_pair(Colors.THROTTLED)
+                    self.safe_addstr(stdscr, y_pos, x, core_text, core_attr)
                     x += 8  # Fixed width for core number
                     
+                    # Preferred-core ranking (higher is faster)
+                    if show_ranking:
+                        self.safe_addstr(stdscr, y_pos, x, "|", curses.color_pair(Colors.BORDER))
+                        x += 2
+                        rank_text = f"Rank: {info.get('amd_pstate_prefcore_ranking', 'N/A'):>3}"
+                        self.safe_addstr(stdscr, y_pos, x, rank_text, base_attr)
+                        x += len(rank_text) + 1
+                    
                     # Separator
                     self.safe_addstr(stdscr, y_pos, x, "|", curses.color_pair(Colors.BORDER))
                     x += 2
@@ -574,15 +878,43 @@ class CPUMonitorTUI:
                     x += len(gov_text) + 2
                     
                     # EPP if available
-                    if self.amd_pstate_active and x < width-20:  # Only if there's enough space
+                    if self.epp_supported and x < width-20:  # Only if there's enough space
                         self.safe_addstr(stdscr, y_pos, x-2, "|", curses.color_pair(Colors.BORDER))
                         epp_text = f"EPP: {info.get('energy_performance_preference', 'N/A'):<8}"
                         self.safe_addstr(stdscr, y_pos, x, epp_text, base_attr | curses.color_pair(Colors.EPP))
+                        x += len(epp_text) + 2
+                    
+                    # Frequency caps if there's room
+                    low, high = info.get('scaling_min_freq', 'N/A'), info.get('scaling_max_freq', 'N/A')
+                    if low.isdigit() and high.isdigit() and x < width-20:
+                        self.safe_addstr(stdscr, y_pos, x-2, "|", curses.color_pair(Colors.BORDER))
+                        limits_text = f"Cap: {int(low) // 1000}-{int(high) // 1000} MHz"
+                        self.safe_addstr(stdscr, y_pos, x, limits_text, base_attr)
+                        x += len(limits_text) + 2
+
+                    # Utilisation over the last interval
+                    busy = self.cpu_manager.utilization.percent.get(i)
+                    if busy is not None and x < width-12:
+                        self.safe_addstr(stdscr, y_pos, x-2, "|", curses.color_pair(Colors.BORDER))
+                        util_text = f"Util: {busy:3.0f}%"
+                        self.safe_addstr(stdscr, y_pos, x, util_text, base_attr)
+                        x += len(util_text) + 2
+
+                    # Dominant C-state residency over the last interval
+                    if 'idle' in info and x < width-16:
+                        self.safe_addstr(stdscr, y_pos, x-2, "|", curses.color_pair(Colors.BORDER))
+                        self.safe_addstr(stdscr, y_pos, x, f"Idle: {info['idle']}", base_attr)
                 except Exception as e:
                     error_msg = f"Error displaying core {i}: {str(e)}"
                     error_msg = error_msg[:width-4]  # Ensure error message fits
                     self.safe_addstr(stdscr, y_pos, 2, error_msg, curses.color_pair(Colors.NORMAL))
             
+            # Refresh status on the bottom border
+            status_attr = curses.color_pair(Colors.INFO)
+            if self.budget and self.budget.throttled:
+                status_attr = curses.A_BOLD | curses.color_pair(Colors.HEADER)
+            self.safe_addstr(stdscr, height-1, 2, self.status_text()[:width-4], status_attr)
+            
             stdscr.refresh()
         except Exception as e:
             # If there's an error, try to display it
@@ -595,6 +927,37 @@ class CPUMonitorTUI:
             except:
                 pass  # If we can't even display the error, just continue
 
+    def draw_group_header(self, stdscr, y_pos, row, aggregate, entry, width):
+        """Group row: label, member count and aggregate frequency/utilisation"""
+        label, cores = entry
+        text = f"[{label}] {len(cores)} cores"
+        if aggregate:
+            if aggregate["frequency_avg"] is not None:
+                # Aggregates are in kHz, format_frequency takes MHz
+                text += (f" | avg {self.format_frequency(aggregate['frequency_avg'] / 1000).strip()}"
+                         f" max {self.format_frequency(aggregate['frequency_max'] / 1000).strip()}")
+            if aggregate["utilization"] is not None:
+                text += f" | util {aggregate['utilization']:.0f}%"
+        if all(core_id in self.selected_cores for core_id in cores):
+            text += " | selected"
+        attr = curses.A_BOLD | curses.color_pair(Colors.HEADER)
+        if row == self.current_row:
+            attr |= curses.A_REVERSE
+        self.safe_addstr(stdscr, y_pos, 2, text[:width-4], attr)
+
+    def status_text(self):
+        if self.adaptive:
+            bounds = self.adaptive_interval
+            status = (f" Refresh: adaptive {bounds.min_interval:.2f}-{bounds.max_interval:.2f}s, "
+                      f"now {bounds.interval:.2f}s ")
+        else:
+            status = f" Refresh: {self.refresh_rate:.2f}s "
+        if self.budget:
+            status += f"| {self.budget.status_text()} "
+        if self.message:
+            status += f"| {self.message} "
+        return status
+
     @property
-    def amd_pstate_active(self):
-        return self.cpu_manager.amd_pstate_active 
\ No newline at end of file
+    def epp_supported(self):
+        return self.cpu_manager.epp_supported
\ No newline at end of file
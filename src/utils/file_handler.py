@@ -1,28 +1,168 @@
 import os
+import re
+import sys
+import time
+
+# Lets unprivileged agents (and their tests) read a fake sysfs tree; the
+# privileged helper ignores it and always writes under /sys
+SYSFS_ROOT = os.environ.get("CPU_MONITOR_SYSFS_ROOT", "/sys").rstrip("/") or "/sys"
+
+def sysfs_value(value):
+    """Numbers as ints, everything else (including 'N/A') as the raw string"""
+    return int(value) if value.isdigit() else value
+
+class LocalFiles:
+    """
+    The default FileHandler backend: the local filesystem.
+
+    Backends in src/core/backends.py implement the same read side (read,
+    read_snapshot, exists, listdir) plus apply_batch for writes.
+    """
+    name = "local"
+
+    def read(self, file_path):
+        """Contents of one file; raises OSError like open()"""
+        with open(file_path, 'r') as f:
+            return f.read()
+
+    def read_snapshot(self, file_paths):
+        """
+        Contents of many small files in one pass, as {path: contents or the
+        exception raised}. Uses raw os.open/os.read, no buffered file
+        objects; sysfs attributes fit in a single page-sized read.
+        """
+        values = {}
+        for file_path in file_paths:
+            try:
+                fd = os.open(file_path, os.O_RDONLY)
+                try:
+                    data = os.read(fd, 4096)
+                    # Only files larger than a page (e.g. /proc/stat) need a second read
+                    while len(data) % 4096 == 0 and data:
+                        chunk = os.read(fd, 65536)
+                        if not chunk:
+                            break
+                        data += chunk
+                    values[file_path] = data.decode()
+                finally:
+                    os.close(fd)
+            except (OSError, UnicodeDecodeError) as e:
+                values[file_path] = e
+        return values
+
+    def exists(self, path):
+        return os.path.exists(path)
+
+    def listdir(self, path):
+        return os.listdir(path)
+
+    def close(self):
+        pass
 
 class FileHandler:
+    CPU_ROOT = f"{SYSFS_ROOT}/devices/system/cpu"
+    # Thermal zones and hwmon sensors
+    CLASS_ROOT = f"{SYSFS_ROOT}/class"
+    # PMU devices (hybrid core types)
+    DEVICES_ROOT = f"{SYSFS_ROOT}/devices"
+    PROC_STAT = "/proc/stat"
+
     _is_amd_pstate_cache = None
     _is_amd_cpu_cache = None
 
+    # Every read goes through one backend per process (see use_backend)
+    backend = LocalFiles()
+
+    # Paths found missing; skipped without a syscall until reset_capabilities()
+    _unavailable = set()
+    # Diagnostics are repeated at most once per interval for each path pattern
+    WARNING_INTERVAL = 60.0
+    _warnings = {}  # pattern -> [next allowed time, suppressed count]
+
+    @staticmethod
+    def cpufreq_path(core_id, attribute):
+        return f"{FileHandler.CPU_ROOT}/cpu{core_id}/cpufreq/{attribute}"
+
+    @staticmethod
+    def use_backend(backend):
+        """Serve all reads from backend; what was missing on the previous one is forgotten"""
+        FileHandler.backend = backend
+        FileHandler.reset_capabilities()
+
+    @staticmethod
+    def exists(path):
+        return FileHandler.backend.exists(path)
+
+    @staticmethod
+    def listdir(path):
+        """Directory entries; raises OSError"""
+        return FileHandler.backend.listdir(path)
+
+    @staticmethod
+    def reset_capabilities():
+        """Forget missing paths, e.g. after a driver switch or CPU hotplug adds attributes"""
+        FileHandler._unavailable.clear()
+
+    @staticmethod
+    def is_available(file_path):
+        """False once a read found the path missing (until reset_capabilities)"""
+        return file_path not in FileHandler._unavailable
+
+    @staticmethod
+    def warn(file_path, message):
+        """
+        Print a diagnostic to stderr, rate-limited per path pattern so that
+        cpu0..cpuN (or state0..stateN) failing the same way is reported once.
+        """
+        pattern = re.sub(r"(?<=[a-z_])\d+", "*", file_path)
+        now = time.monotonic()
+        entry = FileHandler._warnings.setdefault(pattern, [0.0, 0])
+        if now < entry[0]:
+            entry[1] += 1
+            return
+        if entry[1]:
+            message = f"{message} ({entry[1]} similar messages for {pattern} suppressed)"
+        FileHandler._warnings[pattern] = [now + FileHandler.WARNING_INTERVAL, 0]
+        print(message, file=sys.stderr)
+
     @staticmethod
     def read_file(file_path, suppress_warnings=False):
-        if not os.path.exists(file_path):
-            if not suppress_warnings:
-                print(f"Warning: File not found: {file_path}")
+        if file_path in FileHandler._unavailable:
             return "N/A"
-            
-        if not os.access(file_path, os.R_OK):
-            if not suppress_warnings:
-                print(f"Error: Permission denied reading {file_path}. Try running with sudo.")
-            return "N/A"
-            
         try:
-            with open(file_path, 'r') as f:
-                return f.read().strip()
+            return FileHandler.backend.read(file_path).strip()
+        except FileNotFoundError:
+            FileHandler._unavailable.add(file_path)
+            if not suppress_warnings:
+                FileHandler.warn(file_path, f"Warning: File not found: {file_path}")
+        except PermissionError:
+            if not suppress_warnings:
+                FileHandler.warn(file_path, f"Error: Permission denied reading {file_path}. Try running with sudo.")
         except Exception as e:
             if not suppress_warnings:
-                print(f"Error reading {file_path}: {e}")
-            return "N/A"
+                FileHandler.warn(file_path, f"Error reading {file_path}: {e}")
+        return "N/A"
+
+    @staticmethod
+    def read_files(file_paths):
+        """
+        Read many small sysfs files with one backend read_snapshot, as
+        {path: value}. Never warns; missing files are "N/A" and remembered
+        like in read_file.
+        """
+        file_paths = list(file_paths)
+        unavailable = FileHandler._unavailable
+        contents = FileHandler.backend.read_snapshot([path for path in file_paths if path not in unavailable])
+        values = {}
+        for file_path in file_paths:
+            value = contents.get(file_path)
+            if isinstance(value, str):
+                values[file_path] = value.strip()
+                continue
+            if isinstance(value, FileNotFoundError):
+                unavailable.add(file_path)
+            values[file_path] = "N/A"
+        return values
 
     @staticmethod
     def write_file(file_path, content):
@@ -31,20 +171,20 @@ class FileHandler:
                 f.write(str(content))
             return True
         except Exception as e:
-            print(f"Error writing to file {file_path}: {e}")
+            FileHandler.warn(file_path, f"Error writing to file {file_path}: {e}")
             return False
 
     @staticmethod
     def get_cpu_frequency(core_id):
-        return FileHandler.read_file(f"/sys/devices/system/cpu/cpu{core_id}/cpufreq/scaling_cur_freq")
+        return FileHandler.read_file(FileHandler.cpufreq_path(core_id, "scaling_cur_freq"))
 
     @staticmethod
     def get_cpu_governor(core_id):
-        return FileHandler.read_file(f"/sys/devices/system/cpu/cpu{core_id}/cpufreq/scaling_governor")
+        return FileHandler.read_file(FileHandler.cpufreq_path(core_id, "scaling_governor"))
 
     @staticmethod
     def get_available_governors():
-        governors = FileHandler.read_file("/sys/devices/system/cpu/cpufreq/policy0/scaling_available_governors")
+        governors = FileHandler.read_file(f"{FileHandler.CPU_ROOT}/cpufreq/policy0/scaling_available_governors")
         if governors != "N/A":
             return governors.split()
         return ["conservative", "ondemand", "userspace", "powersave", "performance", "schedutil"]
@@ -62,7 +202,7 @@ class FileHandler:
             if not FileHandler.is_amd_cpu():
                 FileHandler._is_amd_pstate_cache = False
             else:
-                driver = FileHandler.read_file("/sys/devices/system/cpu/cpu0/cpufreq/scaling_driver")
+                driver = FileHandler.read_file(FileHandler.cpufreq_path(0, "scaling_driver"))
                 FileHandler._is_amd_pstate_cache = "amd-pstate" in driver if driver != "N/A" else False
         return FileHandler._is_amd_pstate_cache
 
@@ -71,7 +211,6 @@ class FileHandler:
         if not FileHandler.is_amd_pstate():
             return {}
             
-        base_path = f"/sys/devices/system/cpu/cpu{core_id}/cpufreq/"
         params = {}
         
         # Core parameters that should always be available
@@ -89,12 +228,12 @@ class FileHandler:
         
         # Get core parameters
         for param in core_params:
-            params[param] = FileHandler.read_file(f"{base_path}{param}")
+            params[param] = FileHandler.read_file(FileHandler.cpufreq_path(core_id, param))
             
         # Only try AMD parameters if we confirmed it's an AMD CPU with P-state
         # Suppress warnings for these optional parameters
         for param in amd_params:
-            value = FileHandler.read_file(f"{base_path}{param}", suppress_warnings=True)
+            value = FileHandler.read_file(FileHandler.cpufreq_path(core_id, param), suppress_warnings=True)
             if value != "N/A":  # Only add if the file exists and is readable
                 params[param] = value
         
@@ -102,4 +241,4 @@ class FileHandler:
 
     @staticmethod
     def get_max_freq(core_id):
-        return FileHandler.read_file(f"/sys/devices/system/cpu/cpu{core_id}/cpufreq/scaling_max_freq") 
\ No newline at end of file
+        return FileHandler.read_file(FileHandler.cpufreq_path(core_id, "scaling_max_freq")) 
@@ -1,17 +1,20 @@
-from PyQt6.QtCore import QThread, pyqtSignal
-from .file_handler import FileHandler
+from PyQt6.QtCore import QThread, QMutex, QMutexLocker, QWaitCondition, pyqtSignal
+from ..core.write_queue import WriteCoalescer
+
+# Workers read through CPUManager so they share its tiered attribute cache
 
 class FrequencyWorker(QThread):
     finished = pyqtSignal(str)  # frequency
     error = pyqtSignal(str)  # error message
     
-    def __init__(self, core_id):
+    def __init__(self, cpu_manager, core_id):
         super().__init__()
+        self.cpu_manager = cpu_manager
         self.core_id = core_id
         
     def run(self):
         try:
-            freq = FileHandler.get_cpu_frequency(self.core_id)
+            freq = self.cpu_manager.get_cpu_frequency(self.core_id)
             self.finished.emit(freq)
         except Exception as e:
             self.error.emit(str(e))
@@ -20,28 +23,94 @@ class GovernorWorker(QThread):
     finished = pyqtSignal(str)  # governor
     error = pyqtSignal(str)  # error message
     
-    def __init__(self, core_id):
+    def __init__(self, cpu_manager, core_id):
         super().__init__()
+        self.cpu_manager = cpu_manager
         self.core_id = core_id
         
     def run(self):
         try:
-            governor = FileHandler.get_cpu_governor(self.core_id)
+            governor = self.cpu_manager.get_cpu_governor(self.core_id)
             self.finished.emit(governor)
         except Exception as e:
             self.error.emit(str(e))
 
-class AMDPstateWorker(QThread):
+class DriverParamsWorker(QThread):
     finished = pyqtSignal(dict)  # params
     error = pyqtSignal(str)  # error message
     
-    def __init__(self, core_id):
+    def __init__(self, cpu_manager, core_id):
         super().__init__()
+        self.cpu_manager = cpu_manager
         self.core_id = core_id
         
     def run(self):
         try:
-            params = FileHandler.get_amd_pstate_params(self.core_id)
+            params = self.cpu_manager.get_driver_params(self.core_id)
             self.finished.emit(params)
         except Exception as e:
-            self.error.emit(str(e)) 
\ No newline at end of file
+            self.error.emit(str(e))
+
+class WriteQueueWorker(QThread):
+    """
+    Applies user-requested writes off the GUI thread.
+
+    Pending writes are coalesced per core and attribute, so only the latest
+    value wins, and each drain goes out as one privileged batch through
+    CPUManager.apply_transaction (which also skips values already in place,
+    and holds the manager's lock; the GUI skips refresh ticks meanwhile).
+    """
+    applied = pyqtSignal(list)  # core ids whose settings were written (may be empty)
+    failed = pyqtSignal(str)  # error message
+    
+    DEBOUNCE_MS = 50  # Let rapid clicks pile up before escalating privileges
+
+    def __init__(self, cpu_manager):
+        super().__init__()
+        self.cpu_manager = cpu_manager
+        self.coalescer = WriteCoalescer()
+        self.mutex = QMutex()
+        self.condition = QWaitCondition()
+        self._stopping = False
+
+    def submit(self, core_id, attribute, value):
+        with QMutexLocker(self.mutex):
+            self.coalescer.submit(core_id, attribute, value)
+            self.condition.wakeOne()
+
+    def submit_settings(self, settings):
+        with QMutexLocker(self.mutex):
+            self.coalescer.submit_settings(settings)
+            self.condition.wakeOne()
+
+    def stop(self):
+        with QMutexLocker(self.mutex):
+            self._stopping = True
+            self.condition.wakeOne()
+        self.wait()
+
+    def run(self):
+        while True:
+            self.mutex.lock()
+            while not self.coalescer and not self._stopping:
+                self.condition.wait(self.mutex)
+            if self._stopping and not self.coalescer:
+                self.mutex.unlock()
+                return
+            self.mutex.unlock()
+
+            self.msleep(self.DEBOUNCE_MS)
+            with QMutexLocker(self.mutex):
+                settings = self.coalescer.take()
+
+            try:
+                result = self.cpu_manager.apply_transaction(settings)
+            except Exception as e:
+                self.failed.emit(str(e))
+                continue
+            if result["success"]:
+                # System-wide settings (e.g. boost) are keyed by name rather than core id
+                self.applied.emit(sorted(core for core in settings if isinstance(core, int)))
+            else:
+                state = "previous settings restored" if result["rolled_back"] else "rollback failed"
+                self.failed.emit(f"{'; '.join(result['errors'])} ({state})")
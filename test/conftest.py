@@ -1,8 +1,171 @@
+import os
 import pytest
 
+def pytest_addoption(parser):
+    parser.addoption(
+        "--benchmark", action="store_true",
+        help="also run the start-up timing tests, which need an otherwise idle machine"
+    )
+
 def pytest_configure(config):
     """Register custom marks."""
     config.addinivalue_line(
         "markers",
         "privileged: mark test as requiring privileged (root) access"
-    ) 
\ No newline at end of file
+    )
+    config.addinivalue_line(
+        "markers",
+        "benchmark: wall-clock timing test, only run with --benchmark"
+    )
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--benchmark"):
+        return
+    skip = pytest.mark.skip(reason="timing test, run with --benchmark")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip)
+
+def write_tree(root, files):
+    """Create a fake sysfs tree from a {relative path: content} mapping"""
+    for relative, content in files.items():
+        path = root / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(f"{content}\n")
+
+def cpuidle_files(cores=4):
+    files = {}
+    for core in range(cores):
+        for index, (name, latency) in enumerate((("POLL", 0), ("C1", 1), ("C2", 18), ("C6", 350))):
+            base = f"cpu{core}/cpuidle/state{index}"
+            files.update({
+                f"{base}/name": name,
+                f"{base}/latency": latency,
+                f"{base}/usage": 0,
+                f"{base}/time": 0,
+                f"{base}/disable": 0,
+            })
+    return files
+
+def amd_pstate_files(cores=4):
+    files = {}
+    for core in range(cores):
+        base = f"cpu{core}/cpufreq"
+        files.update({
+            f"{base}/scaling_cur_freq": 2000000 + core * 1000,
+            f"{base}/scaling_governor": "powersave",
+            f"{base}/scaling_driver": "amd-pstate-epp",
+            f"{base}/scaling_min_freq": 400000,
+            f"{base}/scaling_max_freq": 4000000,
+            f"{base}/cpuinfo_min_freq": 400000,
+            f"{base}/cpuinfo_max_freq": 4000000,
+            f"{base}/energy_performance_preference": "balance_performance",
+            f"{base}/energy_performance_available_preferences":
+                "default performance balance_performance balance_power power",
+            f"{base}/amd_pstate_highest_perf": 166,
+            f"{base}/amd_pstate_lowest_perf": 16,
+            f"{base}/amd_pstate_hw_prefcore": "enabled",
+            # Odd cores are the preferred (faster) ones
+            f"{base}/amd_pstate_prefcore_ranking": 236 if core % 2 else 196,
+            f"cpu{core}/thermal_throttle/core_throttle_count": 0,
+            f"cpu{core}/thermal_throttle/package_throttle_count": 0,
+            # Two packages with one SMT core each: cpus 0-1 and 2-3
+            f"cpu{core}/topology/physical_package_id": core // 2,
+            f"cpu{core}/topology/die_id": 0,
+            f"cpu{core}/topology/cluster_id": core // 2,
+            f"cpu{core}/topology/core_id": 0,
+            f"cpu{core}/topology/thread_siblings_list": "0-1" if core < 2 else "2-3",
+        })
+    files["cpufreq/policy0/scaling_available_governors"] = "performance powersave"
+    files["cpufreq/boost"] = 1
+    files["amd_pstate/status"] = "active"
+    files.update(cpuidle_files(cores))
+    files["amd_pstate/prefcore"] = "enabled"
+    files["online"] = files["present"] = f"0-{cores - 1}"
+    return files
+
+def intel_pstate_files(cores=4):
+    files = {}
+    for core in range(cores):
+        base = f"cpu{core}/cpufreq"
+        files.update({
+            f"{base}/scaling_cur_freq": 1800000 + core * 1000,
+            f"{base}/scaling_governor": "powersave",
+            f"{base}/scaling_driver": "intel_pstate",
+            f"{base}/scaling_min_freq": 800000,
+            f"{base}/scaling_max_freq": 4600000,
+            f"{base}/cpuinfo_min_freq": 800000,
+            f"{base}/cpuinfo_max_freq": 4600000,
+            f"{base}/base_frequency": 2100000,
+            f"{base}/energy_performance_preference": "balance_performance",
+            f"{base}/energy_performance_available_preferences":
+                "default performance balance_performance balance_power power",
+        })
+    files.update({
+        "cpufreq/policy0/scaling_available_governors": "performance powersave",
+        "intel_pstate/status": "active",
+        "intel_pstate/min_perf_pct": 17,
+        "intel_pstate/max_perf_pct": 100,
+        "intel_pstate/hwp_dynamic_boost": 0,
+        "intel_pstate/no_turbo": 0,
+    })
+    return files
+
+def sys_class_files():
+    return {
+        "thermal/thermal_zone0/type": "x86_pkg_temp",
+        "thermal/thermal_zone0/temp": 61000,
+        "hwmon/hwmon1/name": "k10temp",
+        "hwmon/hwmon1/temp1_input": 58500,
+        "hwmon/hwmon1/temp1_label": "Tctl",
+    }
+
+def multi_device_class_files():
+    """Two sockets' coretemp and two NVMe drives, each pair with the same name and labels"""
+    files = {}
+    for hwmon, name, label, temp in (
+        ("hwmon2", "coretemp", "Core 0", 45000), ("hwmon3", "coretemp", "Core 0", 47000),
+        ("hwmon4", "nvme", "Composite", 38850), ("hwmon5", "nvme", "Composite", 41850),
+    ):
+        files.update({
+            f"hwmon/{hwmon}/name": name, f"hwmon/{hwmon}/temp1_input": temp, f"hwmon/{hwmon}/temp1_label": label,
+        })
+    files["hwmon/hwmon3/temp2_input"] = 52000
+    files["hwmon/hwmon3/temp2_label"] = "Package id 1"
+    return files
+
+@pytest.fixture
+def fake_sysfs(tmp_path, monkeypatch):
+    """Point FileHandler at a fake amd-pstate cpufreq tree"""
+    from src.utils.file_handler import FileHandler, LocalFiles
+
+    root = tmp_path / "cpu"
+    write_tree(root, amd_pstate_files())
+    write_tree(tmp_path / "class", sys_class_files())
+    monkeypatch.setattr(FileHandler, "CPU_ROOT", str(root))
+    monkeypatch.setattr(FileHandler, "CLASS_ROOT", str(tmp_path / "class"))
+    monkeypatch.setattr(FileHandler, "DEVICES_ROOT", str(tmp_path / "devices"))
+    monkeypatch.setattr(FileHandler, "PROC_STAT", str(tmp_path / "stat"))
+    monkeypatch.setattr(FileHandler, "_is_amd_cpu_cache", True)
+    monkeypatch.setattr(FileHandler, "_is_amd_pstate_cache", None)
+    monkeypatch.setattr(FileHandler, "_unavailable", set())
+    monkeypatch.setattr(FileHandler, "_warnings", {})
+    monkeypatch.setattr(FileHandler, "backend", LocalFiles())
+    monkeypatch.setattr(os, "cpu_count", lambda: 4)
+    return root
+
+@pytest.fixture
+def fake_intel_sysfs(tmp_path, monkeypatch):
+    """Point FileHandler at a fake intel_pstate (HWP active) tree"""
+    from src.utils.file_handler import FileHandler, LocalFiles
+
+    root = tmp_path / "cpu"
+    write_tree(root, intel_pstate_files())
+    monkeypatch.setattr(FileHandler, "CPU_ROOT", str(root))
+    monkeypatch.setattr(FileHandler, "_is_amd_cpu_cache", False)
+    monkeypatch.setattr(FileHandler, "_is_amd_pstate_cache", None)
+    monkeypatch.setattr(FileHandler, "_unavailable", set())
+    monkeypatch.setattr(FileHandler, "_warnings", {})
+    monkeypatch.setattr(FileHandler, "backend", LocalFiles())
+    monkeypatch.setattr(os, "cpu_count", lambda: 4)
+    return root
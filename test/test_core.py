@@ -0,0 +1,931 @@
+import sys
+import pytest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.core.sampler import TieredSampler, AdaptiveInterval
+from src.core.budget import CPUBudget, parse_percent
+from src.core.cpu_manager import CPUManager, GLOBAL_SETTINGS
+from src.core.drivers import AmdPstateDriver, IntelPstateDriver, detect_driver
+from src.core.privilege_handler import PrivilegeHandler
+from src.core.profiles import ProfileStore
+from src.core.write_queue import WriteCoalescer
+from src.utils.file_handler import FileHandler
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def count_reads(monkeypatch):
+    reads = []
+    original = FileHandler.read_file
+
+    def counting_read(path, suppress_warnings=False):
+        reads.append(path)
+        return original(path, suppress_warnings)
+
+    monkeypatch.setattr(FileHandler, "read_file", staticmethod(counting_read))
+    return reads
+
+def legacy_tick(cores):
+    for core in cores:
+        FileHandler.get_cpu_frequency(core)
+        FileHandler.get_cpu_governor(core)
+        FileHandler.get_amd_pstate_params(core)
+
+def tiered_tick(sampler, cores):
+    for core in cores:
+        sampler.get(core, "scaling_cur_freq")
+        sampler.get(core, "scaling_governor")
+        sampler.get_driver_params(core)
+
+def test_tiered_sampler_cuts_per_tick_reads(fake_sysfs, monkeypatch):
+    """Static attributes are read once and slow ones every few seconds"""
+    cores = range(4)
+    clock = FakeClock()
+    sampler = TieredSampler(cores, epp_supported=True, slow_interval=3.0, clock=clock,
+                            driver_attributes=AmdPstateDriver.core_attributes)
+    tiered_tick(sampler, cores)  # warm-up reads every tier
+
+    reads = count_reads(monkeypatch)
+    legacy_tick(cores)
+    legacy_reads = len(reads)
+
+    reads.clear()
+    for _ in range(30):
+        clock.now += 1.0
+        tiered_tick(sampler, cores)
+    tiered_reads = len(reads) / 30
+
+    assert tiered_reads <= legacy_reads * 0.3
+
+def test_tiered_sampler_rereads_after_invalidate(fake_sysfs):
+    clock = FakeClock()
+    sampler = TieredSampler(range(4), epp_supported=True, clock=clock)
+    assert sampler.get(0, "scaling_governor") == "powersave"
+
+    (fake_sysfs / "cpu0/cpufreq/scaling_governor").write_text("performance\n")
+    assert sampler.get(0, "scaling_governor") == "powersave"
+    sampler.invalidate(0)
+    assert sampler.get(0, "scaling_governor") == "performance"
+
+def test_tiered_sampler_refreshes_static_on_driver_change(fake_sysfs):
+    clock = FakeClock()
+    sampler = TieredSampler(range(4), epp_supported=True, slow_interval=3.0, clock=clock)
+    assert sampler.get_epp_params(1)["scaling_driver"] == "amd-pstate-epp"
+
+    for core in range(4):
+        (fake_sysfs / f"cpu{core}/cpufreq/scaling_driver").write_text("amd-pstate\n")
+    clock.now += 3.0
+    assert sampler.get_epp_params(1)["scaling_driver"] == "amd-pstate"
+
+def test_adaptive_interval_backs_off_and_reacts():
+    clock = FakeClock()
+    adaptive = AdaptiveInterval(min_interval=0.1, max_interval=2.0, clock=clock)
+    stable = ["2000000", "3000000"]
+    for _ in range(20):
+        interval = adaptive.update(stable)
+    assert interval == 2.0
+
+    # A core jumping by more than the threshold snaps back to the fastest rate
+    assert adaptive.update(["2000000", "4000000"]) == 0.1
+
+    for _ in range(20):
+        adaptive.update(["2000000", "4000000"])
+    clock.now = 100.0
+    assert adaptive.update(["2000000", "4000000"], last_change=98.0) == 0.1
+
+def test_cpu_budget_throttles_and_recovers():
+    clock = FakeClock()
+    cpu = FakeClock()
+    budget = CPUBudget(0.5, window=1.0, clock=clock, cpu_clock=cpu)
+
+    # 2% of a CPU over the window is four times the budget
+    clock.now += 1.0
+    cpu.now += 0.02
+    assert budget.update() == 4.0
+    assert budget.throttled
+    assert budget.scale(1.0) == 4.0
+
+    # Idle windows relax the throttle back to normal
+    for _ in range(20):
+        clock.now += 1.0
+        budget.update()
+    assert not budget.throttled
+
+def test_parse_percent():
+    assert parse_percent("0.5%") == 0.5
+    assert parse_percent("2") == 2.0
+    with pytest.raises(ValueError):
+        parse_percent("0%")
+
+@pytest.fixture
+def in_process_writes(monkeypatch):
+    """Apply privileged batches in-process so tests never shell out to sudo"""
+    monkeypatch.setattr(PrivilegeHandler, "apply_batch", staticmethod(PrivilegeHandler.write_batch))
+
+def test_profile_resolves_core_sets():
+    profile = [
+        {"cores": "all", "governor": "powersave"},
+        {"cores": "0-1,3", "governor": "performance", "epp": "performance"},
+    ]
+    settings = ProfileStore.resolve(profile, range(4))
+    assert settings[0] == {"scaling_governor": "performance", "energy_performance_preference": "performance"}
+    assert settings[2] == {"scaling_governor": "powersave"}
+
+def test_apply_profile_verifies_writes(fake_sysfs, in_process_writes):
+    manager = CPUManager()
+    result = manager.apply_profile({"cores": "0-3", "governor": "performance", "epp": "performance"})
+    assert result["success"], result["errors"]
+    assert result["writes"] == 8
+    assert (fake_sysfs / "cpu3/cpufreq/energy_performance_preference").read_text() == "performance"
+
+def test_apply_profile_rolls_back_on_failure(fake_sysfs, in_process_writes):
+    # Make the last core's EPP unwritable so the batch fails part-way
+    epp = fake_sysfs / "cpu3/cpufreq/energy_performance_preference"
+    epp.unlink()
+    epp.mkdir()
+
+    manager = CPUManager()
+    result = manager.apply_profile({"cores": "all", "governor": "performance", "epp": "performance"})
+    assert not result["success"]
+    assert result["rolled_back"]
+    for core in range(4):
+        assert (fake_sysfs / f"cpu{core}/cpufreq/scaling_governor").read_text() == "powersave"
+
+def test_rollback_restores_in_write_order(monkeypatch):
+    from conftest import amd_pstate_files
+    from src.core.backends import MemoryBackend
+    root = "/nowhere/cpu"
+    monkeypatch.setattr(FileHandler, "CPU_ROOT", root)
+    backend = MemoryBackend({f"{root}/{path}": value for path, value in amd_pstate_files().items()})
+    backend.set(f"{root}/cpufreq/policy0/scaling_available_governors", "performance powersave userspace")
+    backend.set(f"{root}/cpu0/cpufreq/scaling_setspeed", "<unsupported>")
+    manager = CPUManager(backend)
+    batches = []
+    apply_batch = backend.apply_batch
+    monkeypatch.setattr(backend, "apply_batch", lambda writes: batches.append(list(writes)) or apply_batch(writes))
+
+    # Core 1's EPP is rejected after core 0 was pinned to 1 GHz
+    result = manager.apply_transaction({
+        0: {"scaling_governor": "userspace", "scaling_setspeed": "1000000",
+            "scaling_min_freq": "800000", "scaling_max_freq": "1000000"},
+        1: {"energy_performance_preference": "turbo"},
+    })
+    assert not result["success"] and result["rolled_back"]
+    cpufreq = f"{root}/cpu0/cpufreq"
+    # min goes back down before max goes back up, and the setspeed placeholder is not written
+    assert batches[-1] == [
+        (f"{cpufreq}/scaling_governor", "powersave"),
+        (f"{cpufreq}/scaling_min_freq", "400000"),
+        (f"{cpufreq}/scaling_max_freq", "4000000"),
+        (f"{root}/cpu1/cpufreq/energy_performance_preference", "balance_performance"),
+    ]
+    assert backend.files[f"{cpufreq}/scaling_max_freq"] == "4000000"
+
+def test_write_coalescer_keeps_latest_value():
+    coalescer = WriteCoalescer()
+    coalescer.submit(0, "scaling_governor", "powersave")
+    coalescer.submit(1, "scaling_governor", "powersave")
+    coalescer.submit(0, "scaling_governor", "performance")
+    assert len(coalescer) == 2
+    assert coalescer.take() == {
+        0: {"scaling_governor": "performance"},
+        1: {"scaling_governor": "powersave"},
+    }
+    assert len(coalescer) == 0
+
+def test_transaction_skips_unchanged_values(fake_sysfs, in_process_writes):
+    manager = CPUManager()
+    result = manager.apply_transaction({core: {"scaling_governor": "powersave"} for core in range(4)})
+    assert result["success"]
+    assert result["writes"] == 0
+
+def test_freq_limits_are_validated_and_applied(fake_sysfs, in_process_writes):
+    manager = CPUManager()
+    with pytest.raises(ValueError):
+        manager.freq_limit_settings(0, max_freq=5000000)  # above cpuinfo_max_freq
+    with pytest.raises(ValueError):
+        manager.freq_limit_settings(0, min_freq=3000000, max_freq=2000000)
+
+    assert manager.update_freq_limits([0, 1], min_freq=3000000, max_freq=3500000)
+    assert (fake_sysfs / "cpu1/cpufreq/scaling_min_freq").read_text() == "3000000"
+    assert manager.get_freq_limits(1)["scaling_max_freq"] == "3500000"
+
+def test_boost_toggle_and_profile(fake_sysfs, in_process_writes):
+    manager = CPUManager()
+    assert manager.get_boost() is True
+    assert manager.set_boost(False)
+    assert (fake_sysfs / "cpufreq/boost").read_text() == "0"
+    assert manager.get_boost() is False
+
+    result = manager.apply_profile([{"cores": "all", "governor": "performance"}, {"boost": True}])
+    assert result["success"], result["errors"]
+    assert manager.get_boost() is True
+
+def test_intel_no_turbo_is_inverted(fake_sysfs, in_process_writes):
+    (fake_sysfs / "cpufreq/boost").unlink()
+    (fake_sysfs / "intel_pstate").mkdir()
+    (fake_sysfs / "intel_pstate/no_turbo").write_text("0\n")
+    manager = CPUManager()
+    assert manager.get_boost() is True
+    assert manager.set_boost(False)
+    assert (fake_sysfs / "intel_pstate/no_turbo").read_text() == "1"
+
+def test_intel_pstate_driver(fake_intel_sysfs, in_process_writes):
+    manager = CPUManager()
+    assert isinstance(manager.driver, IntelPstateDriver)
+    assert manager.epp_supported and not manager.amd_pstate_active
+    assert detect_driver() is manager.driver
+
+    params = manager.get_driver_params(2)
+    assert params["energy_performance_preference"] == "balance_performance"
+    assert params["base_frequency"] == "2100000"
+    assert manager.get_driver_globals()["status"] == "active"
+
+    assert manager.update_all_epp("power", [0, 1])
+    assert (fake_intel_sysfs / "cpu1/cpufreq/energy_performance_preference").read_text() == "power"
+
+    assert manager.set_driver_globals({"max_perf_pct": 80, "hwp_dynamic_boost": 1})
+    assert manager.get_driver_globals()["max_perf_pct"] == "80"
+    # Raising min above the current max only works when max is written first
+    settings = manager.driver_global_settings({"min_perf_pct": 90, "max_perf_pct": 95})
+    assert list(settings)[0].endswith("max_perf_pct")
+    with pytest.raises(ValueError):
+        manager.driver_global_settings({"min_perf_pct": 90})
+    with pytest.raises(ValueError):
+        manager.driver_global_settings({"status": "guided"})
+
+def test_driver_switch_reconfigures_sampler(fake_intel_sysfs, in_process_writes):
+    manager = CPUManager()
+    for core in range(4):
+        (fake_intel_sysfs / f"cpu{core}/cpufreq/scaling_driver").write_text("intel_cpufreq\n")
+        (fake_intel_sysfs / f"cpu{core}/cpufreq/energy_performance_preference").unlink()
+    assert manager.set_driver_globals({"status": "passive"})
+    assert manager.driver.scaling_driver == "intel_cpufreq"
+    assert not manager.epp_supported
+    assert "energy_performance_preference" not in manager.get_cpu_info(0)
+
+def test_amd_pstate_mode_switch(fake_sysfs, in_process_writes):
+    manager = CPUManager()
+    assert manager.driver.modes == ["active", "passive", "guided"]
+    assert manager.get_driver_globals()["status"] == "active"
+    with pytest.raises(ValueError):
+        manager.set_driver_mode("off")
+
+    # The kernel swaps amd-pstate-epp for amd-pstate and drops EPP in passive mode
+    for core in range(4):
+        (fake_sysfs / f"cpu{core}/cpufreq/scaling_driver").write_text("amd-pstate\n")
+        (fake_sysfs / f"cpu{core}/cpufreq/energy_performance_preference").unlink()
+    assert manager.set_driver_mode("passive")
+    assert (fake_sysfs / "amd_pstate/status").read_text() == "passive"
+    assert manager.get_driver_globals()["status"] == "passive"
+    assert not manager.epp_supported and not manager.amd_pstate_active
+
+def test_prefcore_ranking_order(fake_sysfs):
+    manager = CPUManager()
+    assert manager.ranking_supported
+    assert manager.get_driver_params(0)["amd_pstate_hw_prefcore"] == "enabled"
+    assert manager.get_prefcore_ranking(1) == 236
+    assert manager.cores_by_ranking() == [(236, [1, 3]), (196, [0, 2])]
+    assert manager.core_order(by_ranking=True) == [1, 3, 0, 2]
+    assert manager.core_order() == [0, 1, 2, 3]
+
+    (fake_sysfs / "cpu2/cpufreq/amd_pstate_prefcore_ranking").unlink()
+    manager.sampler.invalidate()
+    assert manager.cores_by_ranking() == [(236, [1, 3]), (196, [0]), (None, [2])]
+
+def test_cpuidle_residency_from_deltas(fake_sysfs):
+    from src.core.cpuidle import IdleMonitor
+    clock = FakeClock()
+    idle = IdleMonitor(range(4), clock=clock)
+    states = idle.sample(0)
+    assert [state["name"] for state in states] == ["POLL", "C1", "C2", "C6"]
+    assert states[3]["residency"] is None
+
+    clock.now += 2.0
+    (fake_sysfs / "cpu0/cpuidle/state3/time").write_text("1500000\n")
+    (fake_sysfs / "cpu0/cpuidle/state3/usage").write_text("40\n")
+    (fake_sysfs / "cpu0/cpuidle/state1/time").write_text("100000\n")
+    states = idle.sample(0)
+    assert states[3]["residency"] == pytest.approx(0.75)
+    assert states[3]["usage_delta"] == 40
+    assert states[1]["residency"] == pytest.approx(0.05)
+    assert IdleMonitor.summary(states) == "C6 75%"
+
+def test_cpuidle_latency_limit(fake_sysfs, in_process_writes):
+    manager = CPUManager()
+    assert manager.idle.supported
+    assert manager.set_idle_latency_limit([0, 2], 20)
+    assert (fake_sysfs / "cpu0/cpuidle/state3/disable").read_text() == "1"
+    # Already-enabled shallow states are left untouched
+    assert (fake_sysfs / "cpu2/cpuidle/state2/disable").read_text() == "0\n"
+    assert (fake_sysfs / "cpu1/cpuidle/state3/disable").read_text() == "0\n"
+    assert manager.get_idle_states(2)[3]["disable"] == "1"
+
+    # Raising the limit re-enables the deep state
+    assert manager.set_idle_latency_limit([0], 1000)
+    assert (fake_sysfs / "cpu0/cpuidle/state3/disable").read_text() == "0"
+    with pytest.raises(ValueError):
+        manager.idle_latency_settings([0], -1)
+
+def test_throttle_events_and_temperatures(fake_sysfs):
+    from src.core.thermal import ThermalMonitor
+    thermal = ThermalMonitor(range(4), clock=FakeClock())
+    assert thermal.supported
+    assert thermal.sample({0: "3000000"}) == []
+
+    (fake_sysfs / "cpu1/thermal_throttle/core_throttle_count").write_text("3\n")
+    (fake_sysfs / "cpu2/thermal_throttle/package_throttle_count").write_text("1\n")
+    events = thermal.sample({1: "1400000"})
+    # One package counter tick is one event for the package, not one per core
+    assert [(event["type"], event.get("core"), event.get("package")) for event in events] == [
+        ("core_throttle", 1, "0"), ("package_throttle", None, "1")
+    ]
+    assert events[0]["count_delta"] == 3 and events[0]["frequency"] == "1400000"
+    assert events[1]["cores"] == [2, 3] and events[1]["count_delta"] == 1
+    assert thermal.throttled == {1: ["core"], 2: ["package"], 3: ["package"]}
+    # Counters that stopped moving clear the flag on the next interval
+    assert thermal.sample() == [] and thermal.throttled == {}
+    assert thermal.temperatures() == {"thermal_zone0/x86_pkg_temp": 61.0, "k10temp/Tctl": 58.5}
+
+def test_tui_redraws_from_the_sampled_header(fake_sysfs, monkeypatch):
+    import curses
+    from src.ui.tui import CPUMonitorTUI
+
+    class Window:
+        def __init__(self):
+            self.lines = {}
+
+        def getmaxyx(self):
+            return 30, 200
+
+        def addstr(self, y, x, text, attr=0):
+            self.lines[y] = self.lines.get(y, "") + text
+
+        def clear(self):
+            self.lines = {}
+
+        def refresh(self):
+            pass
+
+    monkeypatch.setattr(curses, "color_pair", lambda pair: 0)
+    tui = CPUMonitorTUI()
+    tui.sample()
+    reads = []
+    for name in ("get_boost", "get_temperatures", "get_driver_globals"):
+        monkeypatch.setattr(tui.cpu_manager, name, lambda name=name: reads.append(name))
+    window = Window()
+    for _ in range(3):
+        tui.update_display(window)
+    # Redraws and keypresses only render what the last sample read
+    assert reads == []
+    assert "| Boost: on | Max temp: 61C | AMD P-State: active" in window.lines[0]
+
+def test_same_named_hwmon_sensors_stay_apart(fake_sysfs):
+    from conftest import write_tree, multi_device_class_files
+    from src.core.thermal import ThermalMonitor
+    write_tree(fake_sysfs.parent / "class", multi_device_class_files())
+    assert ThermalMonitor(range(4)).temperatures() == {
+        "thermal_zone0/x86_pkg_temp": 61.0,
+        "k10temp/Tctl": 58.5,
+        "hwmon2/coretemp/Core 0": 45.0,
+        "hwmon3/coretemp/Core 0": 47.0,
+        "coretemp/Package id 1": 52.0,
+        "hwmon4/nvme/Composite": 38.85,
+        "hwmon5/nvme/Composite": 41.85,
+    }
+
+def test_headless_records_throttle_events(fake_sysfs):
+    import io
+    import json
+    from src.headless.monitor import HeadlessMonitor
+    output = io.StringIO()
+    monitor = HeadlessMonitor(interval=0.01, count=1, output=output)
+    monitor.run()
+    (fake_sysfs / "cpu0/thermal_throttle/core_throttle_count").write_text("1\n")
+    monitor.count = 2
+    monitor.run()
+
+    records = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert len(records) == 3
+    assert records[0]["cores"]["0"]["frequency"] == 2000000
+    assert records[0]["temperatures"]["k10temp/Tctl"] == 58.5
+    assert records[1]["events"][0]["core"] == 0
+    assert records[1]["cores"]["0"]["throttled"] == ["core"]
+    assert "throttled" not in records[2]["cores"]["0"]
+
+def write_proc_stat(path, busy, idle):
+    lines = ["cpu  0 0 0 0 0 0 0 0 0 0"]
+    for core, (core_busy, core_idle) in enumerate(zip(busy, idle)):
+        lines.append(f"cpu{core} {core_busy} 0 0 {core_idle} 0 0 0 0 0 0")
+    path.write_text("\n".join(lines) + "\n")
+
+def test_topology_groups_and_aggregates(fake_sysfs):
+    manager = CPUManager()
+    assert manager.core_groups("package") == [("package 0", [0, 1]), ("package 1", [2, 3])]
+    assert manager.core_groups("core") == [("package 0 core 0", [0, 1]), ("package 1 core 0", [2, 3])]
+    assert manager.topology.siblings(3) == [2, 3]
+    assert manager.display_rows(group_level="package") == [("package 0", [0, 1]), 0, 1, ("package 1", [2, 3]), 2, 3]
+    with pytest.raises(ValueError):
+        manager.core_groups("socket")
+
+    stat = fake_sysfs.parent / "stat"
+    write_proc_stat(stat, busy=[0, 0, 0, 0], idle=[0, 0, 0, 0])
+    manager.sample_utilization()
+    write_proc_stat(stat, busy=[50, 100, 0, 25], idle=[50, 0, 100, 75])
+    assert manager.sample_utilization() == {0: 50.0, 1: 100.0, 2: 0.0, 3: 25.0}
+
+    for core in range(4):
+        manager.get_cpu_frequency(core)
+    package0, package1 = manager.group_aggregates("package")
+    assert package0["cores"] == [0, 1] and package0["utilization"] == 75.0
+    assert package0["frequency_avg"] == 2000500 and package0["frequency_max"] == 2001000
+    assert package1["utilization"] == 12.5
+
+def test_hybrid_core_types(fake_sysfs):
+    from conftest import write_tree
+    write_tree(fake_sysfs.parent / "devices", {"cpu_core/cpus": "0-1", "cpu_atom/cpus": "2-3"})
+    manager = CPUManager()
+    assert manager.core_groups("type") == [("P-core", [0, 1]), ("E-core", [2, 3])]
+
+def test_sparse_online_cores_and_hotplug(fake_sysfs, monkeypatch):
+    import io
+    import json
+    from src.headless.monitor import HeadlessMonitor
+    (fake_sysfs / "online").write_text("0,2-3\n")
+    reads = []
+    read_file = FileHandler.read_file
+    monkeypatch.setattr(FileHandler, "read_file", staticmethod(
+        lambda path, suppress_warnings=False: reads.append(path) or read_file(path, suppress_warnings)
+    ))
+
+    manager = CPUManager()
+    assert manager.cores == [0, 2, 3] and manager.present_cores == [0, 1, 2, 3]
+    assert manager.cpu_cores == 3
+    assert manager.core_order() == [0, 2, 3]
+    assert manager.core_groups("package") == [("package 0", [0]), ("package 1", [2, 3])]
+    output = io.StringIO()
+    HeadlessMonitor(interval=0.01, count=1, output=output, cpu_manager=manager).run()
+    assert sorted(json.loads(output.getvalue())["cores"]) == ["0", "2", "3"]
+    # Offline cores are never polled
+    assert not [path for path in reads if "/cpu1/" in path]
+
+    (fake_sysfs / "online").write_text("0-3\n")
+    assert manager.check_hotplug() == ([], [])  # rate-limited to the slow interval
+    assert manager.check_hotplug(force=True) == ([1], [])
+    assert sorted(manager.sampler.values) == [0, 1, 2, 3]
+    assert manager.core_groups("package") == [("package 0", [0, 1]), ("package 1", [2, 3])]
+    assert manager.get_cpu_frequency(1) == "2001000"
+
+    (fake_sysfs / "online").write_text("0,2-3\n")
+    assert manager.check_hotplug(force=True) == ([], [1])
+    assert sorted(manager.sampler.values) == [0, 2, 3]
+    assert 1 not in manager.thermal.core_package and 1 not in manager.topology.cores
+
+def test_missing_attributes_cached_and_warned_once(fake_sysfs, capsys, monkeypatch):
+    opened = []
+    real_open = open
+    monkeypatch.setattr("builtins.open", lambda path, *args, **kwargs: opened.append(path) or real_open(path, *args, **kwargs))
+
+    for _ in range(3):
+        for core in range(4):
+            assert FileHandler.read_file(FileHandler.cpufreq_path(core, "scaling_setspeed")) == "N/A"
+    # One failed open per path, then the availability map answers
+    assert len(opened) == 4
+    captured = capsys.readouterr()
+    assert captured.out == ""
+    assert captured.err.count("File not found") == 1
+
+    path = FileHandler.cpufreq_path(0, "scaling_setspeed")
+    (fake_sysfs / "cpu0/cpufreq/scaling_setspeed").write_text("1000000\n")
+    assert not FileHandler.is_available(path)
+    FileHandler.reset_capabilities()
+    assert FileHandler.read_file(path) == "1000000"
+
+def test_exporter_serves_cached_payload(fake_sysfs, monkeypatch):
+    import urllib.request
+    from src.headless.exporter import MetricsExporter, parse_address
+    assert parse_address(":9101") == ("", 9101)
+    assert parse_address("127.0.0.1:9101") == ("127.0.0.1", 9101)
+    with pytest.raises(ValueError):
+        parse_address("localhost:metrics")
+
+    exporter = MetricsExporter("127.0.0.1:0", interval=60)
+    exporter.start()
+    try:
+        reads = []
+        read_file = FileHandler.read_file
+        monkeypatch.setattr(FileHandler, "read_file", staticmethod(
+            lambda path, suppress_warnings=False: reads.append(path) or read_file(path, suppress_warnings)
+        ))
+        url = f"http://127.0.0.1:{exporter.address[1]}/metrics"
+        request = urllib.request.Request(url, headers={"Accept": "application/openmetrics-text"})
+        with urllib.request.urlopen(request) as response:
+            assert response.headers["Content-Type"].startswith("application/openmetrics-text")
+            body = response.read().decode()
+        with urllib.request.urlopen(url) as response:
+            assert response.headers["Content-Type"].startswith("text/plain")
+            plain = response.read().decode()
+        # Scrapes are served from the pre-rendered payload
+        assert reads == []
+    finally:
+        exporter.stop()
+
+    assert 'cpu_monitor_frequency_hertz{core="0"} 2000000000' in body
+    assert 'cpu_monitor_core_info{core="1",governor="powersave",epp="balance_performance"} 1' in body
+    assert 'cpu_monitor_temperature_celsius{sensor="k10temp/Tctl"} 58.5' in body
+    assert body.endswith("# EOF\n")
+    assert "# TYPE cpu_monitor_core_info gauge" in plain and "# EOF" not in plain
+
+def test_exporter_counts_package_throttles_once(fake_sysfs):
+    from src.headless.exporter import MetricsExporter
+    exporter = MetricsExporter("127.0.0.1:0", interval=60)
+    try:
+        exporter.emit(exporter.cpu_manager.snapshot())
+        (fake_sysfs / "cpu0/thermal_throttle/core_throttle_count").write_text("2\n")
+        (fake_sysfs / "cpu2/thermal_throttle/package_throttle_count").write_text("5\n")
+        exporter.emit(exporter.cpu_manager.snapshot())
+    finally:
+        exporter.server.server_close()
+    body = exporter.payload().decode()
+    assert [line for line in body.splitlines() if "_throttle_events_total" in line] == [
+        'cpu_monitor_thermal_throttle_events_total{core="0",type="core"} 2',
+        'cpu_monitor_thermal_package_throttle_events_total{package="1"} 5',
+    ]
+
+def test_snapshot_bus_shares_one_sampler(fake_sysfs, tmp_path, monkeypatch):
+    import os
+    import time
+    from src.core import snapshot_bus
+    from src.core.snapshot_bus import SnapshotReader, SnapshotWriter
+    from src.headless.publisher import SnapshotPublisher
+    monkeypatch.setattr(snapshot_bus, "SHM_ROOT", str(tmp_path))
+
+    reader = SnapshotReader("test_bus")
+    assert reader.latest() is None  # no publisher yet
+    publisher = SnapshotPublisher("test_bus", interval=0.01, count=1)
+    viewer = CPUManager()
+    viewer.attach_bus(SnapshotReader("test_bus"))
+    assert viewer.sample_utilization() == {}  # unpublished: falls back to /proc/stat
+    (fake_sysfs / "cpu2/cpufreq/scaling_governor").write_text("performance\n")
+    publisher.run()
+    (fake_sysfs / "cpu2/cpufreq/scaling_governor").write_text("powersave\n")
+
+    reads = []
+    read_file = FileHandler.read_file
+    monkeypatch.setattr(FileHandler, "read_file", staticmethod(
+        lambda path, suppress_warnings=False: reads.append(path) or read_file(path, suppress_warnings)
+    ))
+    for _ in range(3):
+        assert [viewer.get_cpu_frequency(core) for core in viewer.cores] == ["2000000", "2001000", "2002000", "2003000"]
+        assert viewer.get_cpu_governor(2) == "performance"  # as published, not re-read
+        assert viewer.get_temperatures()["k10temp/Tctl"] == 58.5
+        assert viewer.sample_thermal() == []
+    # Only the once-per-slow-interval driver switch check still touches sysfs
+    assert [path for path in reads if not path.endswith("/scaling_driver")] == []
+
+    # A torn copy (odd sequence) is never handed out
+    writer = SnapshotWriter("torn_bus")
+    writer.publish({"cores": {"0": {"frequency": 1}}, "events": [], "temperatures": {}})
+    snapshot_bus.SEQUENCE.pack_into(writer._map, snapshot_bus.SEQUENCE_OFFSET, 3)
+    torn = SnapshotReader("torn_bus")
+    assert torn.latest() is None
+    snapshot_bus.SEQUENCE.pack_into(writer._map, snapshot_bus.SEQUENCE_OFFSET, 2)
+    assert torn.latest()["cores"] == {0: {"frequency": 1}}
+    writer.close()
+
+    # A planted symlink is replaced, never written through
+    target = tmp_path / "victim"
+    target.write_text("keep")
+    (tmp_path / "planted_bus").symlink_to(target)
+    writer = SnapshotWriter("planted_bus")
+    assert target.read_text() == "keep" and not (tmp_path / "planted_bus").is_symlink()
+    assert (tmp_path / "planted_bus").stat().st_mode & 0o777 == 0o644
+    writer.publish({"cores": {"0": {"frequency": 1}}, "events": [], "temperatures": {}})
+    assert SnapshotReader("planted_bus", owners={os.geteuid() + 1}).latest() is None  # someone else's region
+
+    # A restarted publisher's new region is picked up once the old one is stale
+    clock = FakeClock()
+    clock.now = time.time()
+    restarted = SnapshotReader("planted_bus", clock=clock)
+    assert restarted.latest()["cores"] == {0: {"frequency": 1}}
+    writer.close(unlink=False)
+    writer = SnapshotWriter("planted_bus")
+    writer.publish({"cores": {"0": {"frequency": 2}}, "events": [], "temperatures": {}})
+    clock.now += 10
+    assert restarted.latest() is None
+    clock.now = time.time()
+    assert restarted.latest()["cores"] == {0: {"frequency": 2}}
+    writer.close()
+
+def test_unprivileged_reader_attaches_to_root_publisher(monkeypatch):
+    import os
+    import json
+    import shutil
+    import tempfile
+    from src.core import snapshot_bus
+    from src.core.snapshot_bus import SnapshotReader, SnapshotWriter
+    if os.geteuid() != 0:
+        pytest.skip("Needs root to publish as one uid and read as another")
+    shm = tempfile.mkdtemp()
+    os.chmod(shm, 0o755)
+    monkeypatch.setattr(snapshot_bus, "SHM_ROOT", shm)
+    writer = SnapshotWriter("root_bus")
+    # Other users must be able to read it (not every kernel sandbox enforces the mode for them)
+    assert os.stat(os.path.join(shm, "root_bus")).st_mode & 0o004
+    writer.publish({"cores": {"0": {"frequency": 1}}, "events": [], "temperatures": {}})
+    read_end, write_end = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            os.setuid(65534)
+            snapshot = SnapshotReader("root_bus").latest()
+            os.write(write_end, json.dumps(snapshot and snapshot["cores"]).encode())
+        finally:
+            os._exit(0)
+    os.close(write_end)
+    os.waitpid(pid, 0)
+    with os.fdopen(read_end) as f:
+        assert json.loads(f.read()) == {"0": {"frequency": 1}}
+    writer.close()
+    shutil.rmtree(shm)
+
+def test_once_snapshot_reads_sysfs_in_one_pass(fake_sysfs, monkeypatch):
+    import io
+    import time
+    from src.headless import once
+    from conftest import write_tree, amd_pstate_files
+
+    stat = fake_sysfs.parent / "stat"
+    write_proc_stat(stat, busy=[0, 0, 0, 0], idle=[0, 0, 0, 0])
+    monkeypatch.setattr(once.time, "sleep", lambda seconds: write_proc_stat(
+        stat, busy=[50, 100, 0, 25], idle=[50, 0, 100, 75]))
+    reads = count_reads(monkeypatch)
+    snapshot = once.one_shot(window=0.1)
+    # Per-core files all go through the batched read; read_file only sees the CPU lists and driver globals
+    assert not any("/cpu0/" in path for path in reads)
+    assert snapshot["driver"] == {"name": "amd-pstate", "scaling_driver": "amd-pstate-epp",
+                                  "globals": {"status": "active", "prefcore": "enabled"}}
+    assert snapshot["cores"][3] == {
+        "frequency": 2003000, "governor": "powersave", "epp": "balance_performance", "driver": "amd-pstate-epp",
+        "min_freq": 400000, "max_freq": 4000000, "cpuinfo_min_freq": 400000, "cpuinfo_max_freq": 4000000,
+        "package": 1, "die": 0, "cluster": 1, "core": 0, "siblings": "2-3", "core_type": "N/A", "utilization": 25.0,
+    }
+    output = io.StringIO()
+    once.write_csv(snapshot, output)
+    rows = output.getvalue().splitlines()
+    assert rows[0].startswith("cpu,frequency,governor,epp,driver") and rows[0].endswith(",utilization")
+    assert rows[2].startswith("1,2001000,powersave,balance_performance,") and rows[2].endswith(",100.0")
+
+    # Large hosts stay well inside the one-shot budget
+    big = fake_sysfs.parent / "big"
+    write_tree(big, amd_pstate_files(256))
+    monkeypatch.setattr(FileHandler, "CPU_ROOT", str(big))
+    timings = []
+    for _ in range(3):
+        FileHandler.reset_capabilities()
+        start = time.perf_counter()
+        snapshot = once.one_shot()
+        timings.append(time.perf_counter() - start)
+    assert len(snapshot["cores"]) == 256 and "utilization" not in snapshot["cores"][255]
+    assert min(timings) < 0.1, f"one-shot snapshot of 256 cores took {min(timings) * 1000:.0f} ms"
+
+def test_sample_schedule_skips_missed_ticks():
+    from src.core.sampler import SampleSchedule
+    clock = FakeClock()
+    schedule = SampleSchedule(1.0, clock=clock)
+    assert schedule.delay() == 0.0
+    clock.now = 0.3  # sampling took 0.3 s
+    assert schedule.advance() == 0 and schedule.delay() == pytest.approx(0.7)
+    clock.now = 1.0
+    assert schedule.advance() == 0 and schedule.delay() == 1.0
+    # Tick 2 is sampled at 2.0 s, then a consumer busy until 5.5 s misses ticks 3 and 4;
+    # tick 5 (due at 5.0 s) is sampled right away rather than at 6.0 s
+    clock.now = 5.5
+    assert schedule.advance() == 2 and schedule.delay() == 0.0
+    assert schedule.tick == 5
+    # ...after which sampling is back on the grid
+    clock.now = 5.6
+    assert schedule.advance() == 0 and schedule.tick == 6 and schedule.delay() == pytest.approx(0.4)
+    with pytest.raises(ValueError):
+        SampleSchedule(0)
+
+def test_snapshot_streams_drop_samples_for_slow_consumers(fake_sysfs):
+    import time
+    import asyncio
+    from concurrent.futures import ThreadPoolExecutor
+    manager = CPUManager()
+
+    records = []
+    for record in manager.iter_snapshots(0.02, count=3):
+        records.append(record)
+        if len(records) == 2:
+            time.sleep(0.07)  # slow consumer
+    assert [record["dropped"] for record in records][:2] == [0, 0]
+    assert records[2]["dropped"] >= 2
+    assert records[0]["cores"][3]["frequency"] == 2003000 and records[0]["cores"][3]["epp"] == "balance_performance"
+
+    import threading
+    threads = set()
+    original = manager.snapshot
+    manager.snapshot = lambda: threads.add(threading.get_ident()) or original()
+
+    async def consume():
+        received = []
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            async for record in manager.astream(0.02, count=3, executor=executor):
+                received.append(record)
+                if len(received) == 1:
+                    await asyncio.sleep(0.07)
+        return received
+
+    received = asyncio.run(consume())
+    assert len(received) == 3 and received[0]["dropped"] == 0 and received[1]["dropped"] >= 2
+    assert set(received[2]["cores"]) == {0, 1, 2, 3}
+    assert threading.get_ident() not in threads  # sysfs reads stay off the event loop
+
+def test_memory_backend_drives_manager_without_sysfs(fake_sysfs, monkeypatch, tmp_path):
+    from conftest import amd_pstate_files
+    from src.core.backends import MemoryBackend, RecordingBackend, RecordedBackend
+    root = "/nowhere/cpu"
+    monkeypatch.setattr(FileHandler, "CPU_ROOT", root)
+    backend = MemoryBackend({f"{root}/{path}": value for path, value in amd_pstate_files().items()})
+    manager = CPUManager(backend)
+    assert FileHandler.backend is backend
+    assert manager.cores == [0, 1, 2, 3] and manager.driver.name == "amd-pstate" and manager.epp_supported
+    assert manager.get_cpu_frequency(2) == "2002000"
+    assert manager.topology.groups("package") == [("package 0", [0, 1]), ("package 1", [2, 3])]
+
+    result = manager.apply_transaction({0: {"scaling_governor": "performance"}, 1: {"scaling_max_freq": "3000000"}})
+    assert result["success"] and result["writes"] == 2
+    assert backend.files[f"{root}/cpu0/cpufreq/scaling_cur_freq"] == "4000000"  # performance pins to the max cap
+    assert manager.get_cpu_governor(0) == "performance"
+
+    # The simulated kernel rejects an unadvertised EPP and the transaction rolls back
+    result = manager.apply_transaction({2: {"scaling_governor": "performance", "energy_performance_preference": "turbo"}})
+    assert not result["success"] and result["rolled_back"] and "Invalid argument" in result["errors"][0]
+    assert backend.files[f"{root}/cpu2/cpufreq/scaling_governor"] == "powersave"
+
+    # Record a session, then replay it on another root
+    recording = tmp_path / "session.jsonl"
+    clock = FakeClock()
+    recorder = CPUManager(RecordingBackend(backend, recording, clock=clock))
+    first = recorder.snapshot()
+    clock.now = 1.0
+    backend.set(f"{root}/cpu3/cpufreq/scaling_cur_freq", 3333000)
+    recorder.sampler.invalidate()
+    second = recorder.snapshot()
+    recorder.close()
+    assert second["cores"][3]["frequency"] == 3333000
+
+    monkeypatch.setattr(FileHandler, "CPU_ROOT", "/elsewhere/cpu")
+    replay_clock = FakeClock()
+    replayed = CPUManager(RecordedBackend(recording, clock=replay_clock))
+    assert replayed.snapshot()["cores"] == first["cores"]
+    replay_clock.now = 1.0
+    assert replayed.get_cpu_frequency(3) == "3333000"
+    assert replayed.backend.finished
+
+def test_change_events_attribute_source(fake_sysfs, monkeypatch, tmp_path):
+    import json
+    import time
+    from conftest import amd_pstate_files
+    from src.core.backends import MemoryBackend
+    from src.core.changes import ChangeTracker, ChangeLog
+    root = "/nowhere/cpu"
+    monkeypatch.setattr(FileHandler, "CPU_ROOT", root)
+    backend = MemoryBackend({f"{root}/{path}": value for path, value in amd_pstate_files().items()})
+    manager = CPUManager(backend)
+    seen = []
+    manager.on_change(seen.append)
+    manager.on_change(ChangeLog(tmp_path / "changes.jsonl"))
+    assert manager.check_changes() == []  # baseline
+
+    assert manager.apply_transaction({0: {"scaling_governor": "performance"}})["success"]
+    backend.set(f"{root}/cpu1/cpufreq/energy_performance_preference", "power")
+    manager.sampler.invalidate()
+    events = manager.check_changes()
+    assert [(event["core"], event["type"], event["old"], event["new"], event["source"]) for event in events] == [
+        (0, "governor_changed", "powersave", "performance", "ours"),
+        (1, "epp_changed", "balance_performance", "power", "external"),
+    ]
+    assert manager.check_changes() == []
+
+    # A batch that failed and rolled back leaves nothing to claim
+    result = manager.apply_transaction({2: {"scaling_governor": "performance", "energy_performance_preference": "turbo"}})
+    assert result["rolled_back"]
+    assert manager.check_changes() == []
+    backend.set(f"{root}/cpu2/cpufreq/scaling_governor", "performance")
+    manager.sampler.invalidate()
+    failed = manager.check_changes()
+    assert [(event["core"], event["new"], event["source"]) for event in failed] == [(2, "performance", "external")]
+    events += failed
+
+    # Someone else setting our value back is not ours
+    backend.set(f"{root}/cpu0/cpufreq/scaling_governor", "powersave")
+    backend.set(f"{root}/online", "0-2")
+    manager.sampler.invalidate()
+    manager.check_hotplug(force=True)
+    record = manager.snapshot()
+    assert [(event["core"], event["type"], event["source"]) for event in record["events"]] == [
+        (3, "core_offline", "external"), (0, "governor_changed", "external"),
+    ]
+    assert seen == events + record["events"]
+    assert [json.loads(line) for line in (tmp_path / "changes.jsonl").read_text().splitlines()] == seen
+
+    # An unchanged tick is one tuple comparison per field
+    tracker = ChangeTracker()
+    records = {core_id: {"governor": "powersave", "epp": "balance_power"} for core_id in range(256)}
+    tracker.update(records, 0.0)
+    started = time.perf_counter()
+    for _ in range(100):
+        assert tracker.update(records, 0.0) == []
+    assert time.perf_counter() - started < 0.2
+
+def test_policy_daemon_switches_groups_with_hysteresis(fake_sysfs, in_process_writes, tmp_path):
+    import io
+    import json
+    from src.core.policy import Policy
+    from src.headless.policy import PolicyDaemon
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps({"groups": "package", "cooldown": 10, "rules": [
+        {"name": "busy", "above": 70, "for": 5, "set": {"governor": "performance", "epp": "performance"}},
+        {"name": "idle", "below": 10, "for": 60, "set": {"governor": "powersave", "epp": "power"}},
+    ]}))
+    with pytest.raises(ValueError):
+        Policy.parse({"rules": [{"above": 70, "below": 10, "set": {"governor": "performance"}}]})
+    with pytest.raises(ValueError):
+        Policy.parse({"rules": [{"above": 70, "set": {"turbo": True}}]})
+
+    stat = fake_sysfs.parent / "stat"
+    clock = FakeClock()
+    busy, idle = [0] * 4, [0] * 4
+    write_proc_stat(stat, busy, idle)
+    output = io.StringIO()
+    daemon = PolicyDaemon(Policy.load(path), output=output, clock=clock)
+    daemon.cpu_manager.sample_utilization()
+    daemon.cpu_manager.check_changes()
+    governor = lambda core_id: (fake_sysfs / f"cpu{core_id}/cpufreq/scaling_governor").read_text().strip()
+
+    def run_until(end):
+        # Package 0 (cores 0-1) fully busy, package 1 (cores 2-3) idle
+        records = []
+        while clock.now < end:
+            clock.now += 1
+            busy[0] += 100
+            busy[1] += 100
+            idle[2] += 100
+            idle[3] += 100
+            write_proc_stat(stat, busy, idle)
+            records += [(clock.now, record) for record in daemon.step()]
+        return records
+
+    records = run_until(10)
+    assert [(now, record["switches"][0]["group"], record["writes"]) for now, record in records] == [(6, "package 0", 4)]
+    assert records[0][1]["ok"] and records[0][1]["switches"][0]["rule"] == "busy"
+    assert [governor(core_id) for core_id in range(4)] == ["performance", "performance", "powersave", "powersave"]
+
+    # Changed behind our back: reported, then re-applied once the cooldown has passed
+    (fake_sysfs / "cpu0/cpufreq/scaling_governor").write_text("powersave\n")
+    daemon.cpu_manager.sampler.invalidate()
+    records = run_until(61)
+    assert records[0][1]["type"] == "governor_changed" and records[0][1]["group"] == "package 0"
+    assert [(now, record["switches"][0]["rule"], record["writes"]) for now, record in records[1:]] == [
+        (16, "busy", 1), (61, "idle", 2),
+    ]
+    assert (fake_sysfs / "cpu3/cpufreq/energy_performance_preference").read_text() == "power"
+
+def test_manager_serialises_writes_and_reads_across_threads(fake_sysfs, monkeypatch):
+    import threading
+    from conftest import amd_pstate_files
+    from src.core.backends import MemoryBackend
+    root = "/nowhere/cpu"
+    monkeypatch.setattr(FileHandler, "CPU_ROOT", root)
+    backend = MemoryBackend({f"{root}/{path}": value for path, value in amd_pstate_files().items()})
+    manager = CPUManager(backend)
+    writing, release = threading.Event(), threading.Event()
+    apply_batch = backend.apply_batch
+
+    def slow_apply_batch(writes):
+        writing.set()
+        release.wait(5)
+        return apply_batch(writes)
+    monkeypatch.setattr(backend, "apply_batch", slow_apply_batch)
+
+    writer = threading.Thread(target=manager.apply_transaction, args=({0: {"scaling_governor": "performance"}},))
+    writer.start()
+    assert writing.wait(5)
+    governors = []
+    reader = threading.Thread(target=lambda: governors.append(manager.get_cpu_governor(0)))
+    reader.start()
+    reader.join(0.2)
+    assert reader.is_alive()  # waits for the batch instead of reading half-updated state
+    release.set()
+    writer.join(5)
+    reader.join(5)
+    assert governors == ["performance"]
@@ -77,7 +77,7 @@ def test_all_cores_checkbox(monitor):
     QTest.qWait(10)  # Wait for UI updates
 
     # Verify all core checkboxes are checked
-    assert all(controls.checkbox.isChecked() for controls in monitor.core_controls)
+    assert all(controls.checkbox.isChecked() for controls in monitor.core_controls.values())
 
 @pytest.mark.privileged
 def test_governor_change_individual(monitor):
@@ -95,8 +95,12 @@ def test_governor_change_individual(monitor):
     
     index = gov_combo.findText("powersave")
     assert index >= 0, "Powersave governor not available"
+    # Simulate a user pick; programmatic index changes must not trigger writes
     gov_combo.setCurrentIndex(index)
-    QApplication.processEvents()
+    gov_combo.activated.emit(index)
+    # Writes are applied asynchronously by the write queue
+    QTest.qWaitFor(lambda: not monitor.write_queue.coalescer, 5000)
+    QTest.qWait(500)
     
     # Note: This test requires root privileges
     try:
@@ -151,6 +155,17 @@ def test_error_handling():
             os.remove(test_file)
         FileHandler.write_file = staticmethod(original_write_file)
 
+def test_refresh_does_not_trigger_writes(monitor):
+    """Programmatic combo updates (UI refreshes) must never queue privileged writes"""
+    controls = monitor.core_controls[0]
+    other = next(
+        gov for gov in monitor.cpu_manager.available_governors
+        if gov != controls.gov_combo.currentText()
+    )
+    controls.update_governor(other)
+    QApplication.processEvents()
+    assert len(monitor.write_queue.coalescer) == 0
+
 def test_refresh_rate_update(monitor):
     """Test if refresh rate updates correctly when changed"""
     QTest.qWait(100)  # Wait for UI updates
@@ -203,3 +218,37 @@ def test_process_window_opens(monitor):
 
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
+
+def test_refresh_skips_while_write_queue_holds_manager(monitor, monkeypatch):
+    """A tick that fires during a privileged write must not block the GUI thread"""
+    import threading
+    calls = []
+    check_hotplug = monitor.cpu_manager.check_hotplug
+    monkeypatch.setattr(monitor.cpu_manager, "check_hotplug", lambda *args: calls.append(1) or check_hotplug(*args))
+    holding, release = threading.Event(), threading.Event()
+
+    def write_queue():
+        with monitor.cpu_manager.lock:
+            holding.set()
+            release.wait(5)
+
+    writer = threading.Thread(target=write_queue)
+    writer.start()
+    assert holding.wait(5)
+    started = time.monotonic()
+    monitor.timer.timeout.emit()
+    assert time.monotonic() - started < 1.0 and calls == []
+    release.set()
+    writer.join(5)
+    monitor.timer.timeout.emit()
+    assert calls == [1]
+
+def test_external_changes_go_to_the_status_bar(monitor, capsys):
+    """Changes made outside the window are shown in it, not printed"""
+    monitor.show_external_changes([
+        {"core": 0, "type": "governor_changed", "old": "powersave", "new": "performance", "source": "ours"},
+        {"core": 1, "type": "epp_changed", "old": "balance_performance", "new": "power", "source": "external"},
+        {"core": 2, "type": "core_offline", "source": "external"},
+    ])
+    assert monitor.statusBar().currentMessage() == "External epp change on core 1: balance_performance -> power"
+    assert capsys.readouterr().out == ""
@@ -0,0 +1,230 @@
+import os
+import sys
+import time
+import select
+import subprocess
+import pytest
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+from conftest import write_tree, amd_pstate_files, sys_class_files
+from src.core.aggregator import FleetAggregator, parse_agent
+from src.core.protocol import snapshot_delta, apply_delta
+
+def start_agent(sysfs_root, extra_args=(), env=None):
+    """Run `cpu_monitor.py --agent` on an ephemeral port against a fake sysfs tree"""
+    process = subprocess.Popen(
+        [sys.executable, "cpu_monitor.py", "--agent", "127.0.0.1:0", "--interval", "0.05", *extra_args],
+        cwd=ROOT,
+        env={**os.environ, "CPU_MONITOR_SYSFS_ROOT": str(sysfs_root), **(env or {})},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        ready, _, _ = select.select([process.stderr], [], [], 0.5)
+        if ready:
+            line = process.stderr.readline()
+            if "listening on" in line:
+                return process, int(line.rsplit(":", 1)[1])
+            if not line and process.poll() is not None:
+                break
+    process.kill()
+    raise RuntimeError("Agent did not start")
+
+def fake_node(path, cores=4):
+    write_tree(path / "devices/system/cpu", amd_pstate_files(cores))
+    write_tree(path / "class", sys_class_files())
+    return path
+
+@pytest.fixture
+def agents(tmp_path):
+    started = []
+    def start(name, cores=4, extra_args=(), env=None):
+        root = fake_node(tmp_path / name, cores)
+        process, port = start_agent(root, extra_args, env)
+        started.append(process)
+        return root, port
+    yield start
+    for process in started:
+        process.terminate()
+        process.wait(timeout=5)
+
+def wait_for(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        result = condition()
+        if result:
+            return result
+        time.sleep(0.05)
+    raise AssertionError("Timed out waiting for condition")
+
+def test_snapshot_delta_round_trip():
+    first = {
+        "time": 1.0, "events": [], "temperatures": {"a": 50.0, "b": 40.0},
+        "cores": {0: {"frequency": 2000000, "governor": "powersave", "throttled": ["core"]},
+                  1: {"frequency": 2100000, "governor": "powersave"}},
+    }
+    second = {
+        "time": 2.0, "events": [{"type": "core_offline", "core": 1}], "temperatures": {"a": 51.0},
+        "cores": {0: {"frequency": 2500000, "governor": "powersave"}, 2: {"frequency": 1, "governor": "performance"}},
+    }
+    delta = snapshot_delta(first, second)
+    # Unchanged fields stay off the wire
+    assert delta["cores"] == {"0": {"frequency": 2500000, "throttled": None}, "2": second["cores"][2]}
+    assert delta["removed"] == ["1"]
+    assert apply_delta(apply_delta(None, snapshot_delta(None, first)), delta) == second
+
+def test_aggregator_merges_several_agents(agents):
+    assert parse_agent("node1") == ("node1", 9102)
+    roots = {}
+    ports = []
+    for name, cores in (("node-a", 4), ("node-b", 2), ("node-c", 4)):
+        root, port = agents(name, cores)
+        roots[port] = root
+        ports.append(port)
+
+    aggregator = FleetAggregator([f"127.0.0.1:{port}" for port in ports] + ["127.0.0.1:1"], reconnect=0.2)
+    aggregator.start()
+    try:
+        # Several frames in, so deltas have been applied on top of the full snapshot
+        nodes = wait_for(lambda: (lambda nodes: nodes if all(
+            node["sequence"] and node["sequence"] >= 3 for node in nodes[:3]) else None)(aggregator.summaries()))
+        assert [node["summary"]["cores"] for node in nodes[:3]] == [4, 2, 4]
+        assert nodes[0]["summary"]["frequency_max"] == 2003000
+        assert nodes[0]["summary"]["governors"] == ["powersave"]
+        assert nodes[0]["summary"]["temperature_max"] == 61.0
+        assert not nodes[3]["connected"] and nodes[3]["error"]
+
+        # Drill-down data follows changes on one node only
+        (roots[ports[1]] / "devices/system/cpu/cpu1/cpufreq/scaling_cur_freq").write_text("3500000\n")
+        node_b = wait_for(lambda: (lambda node: node if node["snapshot"]["cores"][1]["frequency"] == 3500000
+                                   else None)(aggregator.nodes()[1]))
+        assert node_b["snapshot"]["cores"][0]["frequency"] == 2000000
+        assert aggregator.nodes()[0]["snapshot"]["cores"][1]["frequency"] == 2001000
+    finally:
+        aggregator.stop()
+
+def test_fleet_apply_dry_run_and_apply(agents):
+    from src.core.fleet import fleet_apply, format_results
+    env = {"CPU_MONITOR_AGENT_TOKEN": "s3cret"}
+    nodes = [agents(name, 4, env=env) for name in ("node-a", "node-b", "node-c")]
+    locked_root, locked_port = agents("node-locked", 2)  # started without a token
+    addresses = [f"127.0.0.1:{port}" for _, port in nodes]
+    profile = [{"cores": "0-1", "governor": "performance"}]
+
+    results = fleet_apply(addresses, "s3cret", profile, dry_run=True, concurrency=2)
+    assert [result["ok"] for result in results] == [True, True, True]
+    assert results[0]["changes"] == {
+        "0": {"scaling_governor": ["powersave", "performance"]},
+        "1": {"scaling_governor": ["powersave", "performance"]},
+    }
+    assert "  core 1: scaling_governor powersave -> performance" in format_results(results)
+    for root, _ in nodes:
+        assert (root / "devices/system/cpu/cpu0/cpufreq/scaling_governor").read_text().strip() == "powersave"
+
+    denied = fleet_apply(addresses[:1] + [f"127.0.0.1:{locked_port}"], "wrong", profile)
+    assert denied[0]["error"] == "Authentication failed"
+    assert "disabled" in denied[1]["error"]
+
+    if os.geteuid() != 0:
+        pytest.skip("Agents write through sudo unless they run as root")
+    results = fleet_apply(addresses, "s3cret", profile)
+    assert all(result["ok"] and result["writes"] == 2 for result in results)
+    for root, _ in nodes:
+        cpu = root / "devices/system/cpu"
+        assert (cpu / "cpu1/cpufreq/scaling_governor").read_text() == "performance"
+        assert (cpu / "cpu2/cpufreq/scaling_governor").read_text().strip() == "powersave"
+
+def test_remote_backend_drives_a_local_manager(agents, monkeypatch):
+    from src.core.cpu_manager import CPUManager
+    from src.core.backends import RemoteBackend
+    from src.utils.file_handler import FileHandler
+    monkeypatch.setattr(FileHandler, "backend", FileHandler.backend)
+    monkeypatch.setattr(FileHandler, "_unavailable", set())
+    root, port = agents("node-a", 4, env={"CPU_MONITOR_AGENT_TOKEN": "s3cret"})
+
+    manager = CPUManager(RemoteBackend(f"127.0.0.1:{port}", token="s3cret"))
+    try:
+        # Static attributes come over batched fs requests, per-tick values from the stream
+        assert manager.cores == [0, 1, 2, 3] and manager.driver.name == "amd-pstate"
+        assert manager.available_governors == ["performance", "powersave"]
+        assert manager.topology.groups("package") == [("package 0", [0, 1]), ("package 1", [2, 3])]
+        wait_for(lambda: manager.backend.latest())
+        (root / "devices/system/cpu/cpu1/cpufreq/scaling_cur_freq").write_text("3100000\n")
+        wait_for(lambda: manager.get_cpu_frequency(1) == "3100000")
+        with pytest.raises(FileNotFoundError):
+            manager.backend.read(f"{FileHandler.CPU_ROOT}/cpu9/cpufreq/scaling_governor")
+        with pytest.raises(ValueError):
+            manager.backend.read("/etc/passwd")
+
+        if os.geteuid() != 0:
+            pytest.skip("Agents write through sudo unless they run as root")
+        result = manager.apply_transaction({2: {"scaling_governor": "performance"}})
+        assert result["success"] and result["writes"] == 1
+        assert (root / "devices/system/cpu/cpu2/cpufreq/scaling_governor").read_text() == "performance"
+    finally:
+        manager.close()
+
+    manager.backend.token = None
+    assert manager.backend.apply_batch([("x", 1)])[0]["error"] == "Remote writes need the agent token"
+
+def agent_request(port, kind, request, token=None, counter=1):
+    """One (optionally signed) request on a fresh control connection, and its reply"""
+    import socket
+    from src.core.protocol import encode_frame, recv_frame, request_mac
+    with socket.create_connection(("127.0.0.1", port), 5) as sock:
+        hello = recv_frame(sock)
+        message = {"type": kind, "id": 1, "request": request, "counter": counter}
+        if token:
+            message["mac"] = request_mac(token, hello["nonce"], counter, request)
+        sock.sendall(encode_frame(message))
+        while True:
+            reply = recv_frame(sock)
+            if reply.get("id") == 1:
+                return reply
+
+def test_agent_fs_requests_need_the_token_and_stay_on_the_allowlist(agents):
+    from src.core.backends import RemoteBackend
+    from src.utils.file_handler import FileHandler
+    root, port = agents("node-a", 2, env={"CPU_MONITOR_AGENT_TOKEN": "s3cret"})
+    (root / "devices/virtual/dmi/id").mkdir(parents=True)
+    (root / "devices/virtual/dmi/id/product_serial").write_text("SECRET\n")
+
+    def fs(request, token=None):
+        return agent_request(port, "fs", request, token)
+
+    request = {"op": "read", "paths": ["cpu:/cpu0/cpufreq/scaling_governor"]}
+    assert "results" not in fs(request)
+    assert fs(request, "wrong")["error"] == "Authentication failed"
+    assert fs(request, "s3cret")["results"] == {"cpu:/cpu0/cpufreq/scaling_governor": "powersave\n"}
+
+    secret = fs({"op": "read", "paths": ["devices:/virtual/dmi/id/product_serial", "cpu:/cpu0/../../virtual"]},
+                "s3cret")["results"]
+    assert all("not served" in result["error"] for result in secret.values())
+
+    backend = RemoteBackend(f"127.0.0.1:{port}")
+    try:
+        with pytest.raises(PermissionError):
+            backend.read(f"{FileHandler.CPU_ROOT}/online")
+    finally:
+        backend.close()
+
+def test_agent_refuses_raw_writes_outside_the_settings(agents):
+    root, port = agents("node-a", 2, env={"CPU_MONITOR_AGENT_TOKEN": "s3cret"})
+    online = root / "devices/system/cpu/cpu1/online"
+    online.write_text("1\n")
+    reply = agent_request(port, "apply", {"writes": [["cpu:/cpu1/cpufreq/scaling_governor", "performance"],
+                                                     ["cpu:/cpu1/online", "0"]]}, "s3cret")
+    assert not reply["ok"] and "not writable" in reply["error"]
+    # Nothing in a refused batch is written
+    assert online.read_text() == "1\n"
+    assert (root / "devices/system/cpu/cpu1/cpufreq/scaling_governor").read_text().strip() == "powersave"
+
+    if os.geteuid() != 0:
+        pytest.skip("Agents write through sudo unless they run as root")
+    reply = agent_request(port, "apply", {"writes": [["cpu:/cpu1/cpufreq/scaling_governor", "performance"]]}, "s3cret")
+    assert reply["ok"] and reply["results"] == [{"ok": True, "error": None}]
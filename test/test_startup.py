@@ -0,0 +1,119 @@
+import os
+import pty
+import sys
+import time
+import select
+import subprocess
+import pytest
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+
+# Modules that must never be loaded by the lightweight entry points
+HEAVY_MODULES = ("PyQt6", "psutil", "src.ui")
+
+def import_profile(args):
+    """Run a Python process with -X importtime and return (wall seconds, imported module names)"""
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        cwd=ROOT,
+        capture_output=True,
+        text=True
+    )
+    elapsed = time.perf_counter() - start
+    modules = set()
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            modules.add(line.rsplit("|", 1)[1].strip())
+    return elapsed, modules, result
+
+def best_of(runs, args):
+    timings = []
+    modules = set()
+    for _ in range(runs):
+        elapsed, modules, result = import_profile(args)
+        assert result.returncode == 0, result.stderr
+        timings.append(elapsed)
+    return min(timings), modules
+
+def test_apply_entry_point_is_lightweight():
+    """The privileged helper must not pull in Qt, psutil or the UI packages"""
+    _, modules = best_of(1, ["-S", "cpu_apply.py", "--help"])
+    for heavy in HEAVY_MODULES:
+        assert not any(m == heavy or m.startswith(heavy + ".") for m in modules), heavy
+
+@pytest.mark.benchmark
+def test_apply_entry_point_starts_fast():
+    """Interpreter start-up dominates; the helper itself should add very little"""
+    baseline, _ = best_of(3, ["-S", "-c", "pass"])
+    elapsed, _ = best_of(3, ["-S", "cpu_apply.py", "--help"])
+    assert elapsed - baseline < 0.15, f"cpu_apply.py added {(elapsed - baseline) * 1000:.0f} ms to start-up"
+
+def test_cli_help_does_not_load_qt():
+    """One-shot CLI invocations should not pay for the GUI stack"""
+    _, modules = best_of(1, ["cpu_monitor.py", "--help"])
+    assert "PyQt6" not in modules
+    assert "psutil" not in modules
+
+def test_once_snapshot_skips_ui_and_manager():
+    """--once reads sysfs directly: no Qt, no curses, not even CPUManager"""
+    _, modules = best_of(1, ["cpu_monitor.py", "--once", "--csv"])
+    for heavy in HEAVY_MODULES + ("curses", "src.core.cpu_manager"):
+        assert not any(m == heavy or m.startswith(heavy + ".") for m in modules), heavy
+
+def time_to_first_paint(args, marker, timeout=5.0):
+    """Start a curses frontend on a pseudo-terminal and time until marker is drawn"""
+    master, slave = pty.openpty()
+    env = dict(os.environ, TERM="xterm", LINES="40", COLUMNS="160")
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, *args],
+        cwd=ROOT,
+        stdin=slave,
+        stdout=slave,
+        stderr=subprocess.DEVNULL,
+        env=env,
+        close_fds=True
+    )
+    os.close(slave)
+    output = b""
+    elapsed = None
+    try:
+        while time.perf_counter() - start < timeout:
+            ready, _, _ = select.select([master], [], [], 0.05)
+            if not ready:
+                continue
+            try:
+                output += os.read(master, 65536)
+            except OSError:
+                break
+            if marker in output:
+                elapsed = time.perf_counter() - start
+                break
+        os.write(master, b"q")
+        proc.wait(timeout=timeout)
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+        os.close(master)
+    return elapsed
+
+def test_tui_paints_without_qt():
+    """The TUI must start without Qt and paint its first frame"""
+    _, modules = best_of(1, ["-c", "import src.ui.tui"])
+    assert "PyQt6" not in modules
+    assert time_to_first_paint(["cpu_monitor.py", "--tui"], b"CPU Monitor (TUI)") is not None, \
+        "TUI never painted its header"
+
+@pytest.mark.benchmark
+def test_tui_first_paint_is_fast():
+    """The first frame should follow interpreter start-up within 150 ms"""
+    baseline, _ = best_of(3, ["-c", "pass"])
+    timings = [
+        time_to_first_paint(["cpu_monitor.py", "--tui"], b"CPU Monitor (TUI)")
+        for _ in range(3)
+    ]
+    assert all(t is not None for t in timings), "TUI never painted its header"
+    first_paint = min(timings) - baseline
+    assert first_paint < 0.15, f"TUI first paint took {first_paint * 1000:.0f} ms after interpreter start-up"